@@ -0,0 +1,141 @@
+# admission.py
+"""
+무거운 작업과 가벼운 조회의 입장 제어(admission control)
+
+동기 엔드포인트는 Starlette 의 기본 스레드 풀과 작은 커넥션 풀을 함께 쓰므로, 교재 복사 몇 개가 커넥션을 모두 잡으면
+/categories/ 같은 조회까지 타임아웃됩니다. 엔드포인트를 두 종류(gate)로 나눠 각각
+- 동시에 처리할 요청 수(limit),
+- 슬롯을 기다릴 수 있는 요청 수(queue)와 최대 대기 시간(timeout)
+을 따로 제한합니다. 대기열이 가득 차면 즉시 429, 대기 시간이 지나면 503 을 Retry-After 와 함께 반환합니다.
+
+    @app.post(..., dependencies=[admission.HEAVY])
+
+슬롯은 응답(스트리밍 포함)이 끝날 때 반환됩니다. 제한은 프로세스(uvicorn 워커) 단위입니다.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque
+
+from fastapi import Depends, HTTPException
+
+import metrics
+
+
+class _Waiter:
+    __slots__ = ("future", "loop", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future = loop.create_future()
+        self.granted = False
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class AdmissionGate:
+    """동시 처리 수와 대기열 길이가 제한된 FIFO 입장 관리자"""
+
+    def __init__(self, name: str, limit: int, queue: int, timeout: float, retry_after: int):
+        self.name = name
+        self.limit = max(limit, 1)
+        self.queue = max(queue, 0)
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.active = 0
+        self._waiters: Deque[_Waiter] = deque()
+        # TestClient 등 이벤트 루프가 여러 개일 수 있으므로 asyncio.Semaphore 대신 스레드 락으로 관리
+        self._lock = threading.Lock()
+
+    def _report(self) -> None:
+        metrics.ADMISSION_IN_FLIGHT.set(self.active, gate=self.name)
+        metrics.ADMISSION_QUEUE_DEPTH.set(len(self._waiters), gate=self.name)
+
+    def _reject(self, status_code: int, reason: str, detail: str) -> HTTPException:
+        metrics.ADMISSION_REJECTED.inc(gate=self.name, reason=reason)
+        return HTTPException(status_code=status_code, detail=detail, headers={"Retry-After": str(self.retry_after)})
+
+    async def acquire(self) -> None:
+        # 1. 빈 슬롯이 있고 먼저 기다리는 요청이 없으면 바로 입장
+        with self._lock:
+            if self.active < self.limit and not self._waiters:
+                self.active += 1
+                self._report()
+                metrics.ADMISSION_WAIT.observe(0.0, gate=self.name)
+                return
+            # 2. 대기열이 가득 차면 기다리지 않고 거절
+            if len(self._waiters) >= self.queue:
+                raise self._reject(429, "queue_full", f"Too many {self.name} requests; retry later")
+            waiter = _Waiter(asyncio.get_running_loop())
+            self._waiters.append(waiter)
+            self._report()
+
+        # 3. 앞선 요청이 release 하면서 슬롯을 넘겨줄 때까지 대기
+        started = time.perf_counter()
+        cancelled = False
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            cancelled = True
+        finally:
+            metrics.ADMISSION_WAIT.observe(time.perf_counter() - started, gate=self.name)
+
+        with self._lock:
+            granted = waiter.granted
+            if not granted:
+                self._waiters.remove(waiter)
+                self._report()
+        if cancelled:
+            # 클라이언트 연결 종료 등 - 이미 넘겨받은 슬롯이면 반환
+            if granted:
+                self.release()
+            raise asyncio.CancelledError()
+        if not granted:
+            raise self._reject(503, "timeout", f"Timed out waiting for a {self.name} slot; retry later")
+
+    def release(self) -> None:
+        """슬롯을 반환합니다. 기다리는 요청이 있으면 슬롯을 그대로 넘겨줍니다. (active 유지)"""
+        with self._lock:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                waiter.loop.call_soon_threadsafe(_resolve, waiter.future)
+            else:
+                self.active -= 1
+            self._report()
+
+    async def admit(self):
+        """FastAPI 의존성 - 요청 동안 슬롯 하나를 차지합니다."""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+# 무거운 작업: 교재 복사/일괄 등록/삭제/비교, 전체 스트리밍 - 커넥션과 스레드를 오래 잡음
+heavy = AdmissionGate(
+    "heavy",
+    limit=int(os.getenv("ADMISSION_HEAVY_LIMIT", "4")),
+    queue=int(os.getenv("ADMISSION_HEAVY_QUEUE", "16")),
+    timeout=float(os.getenv("ADMISSION_HEAVY_TIMEOUT", "30")),
+    retry_after=int(os.getenv("ADMISSION_HEAVY_RETRY_AFTER", "10")),
+)
+# 가벼운 조회: 목록/트리/검색/상태 조회
+light = AdmissionGate(
+    "light",
+    limit=int(os.getenv("ADMISSION_LIGHT_LIMIT", "32")),
+    queue=int(os.getenv("ADMISSION_LIGHT_QUEUE", "256")),
+    timeout=float(os.getenv("ADMISSION_LIGHT_TIMEOUT", "5")),
+    retry_after=int(os.getenv("ADMISSION_LIGHT_RETRY_AFTER", "1")),
+)
+
+HEAVY = Depends(heavy.admit)
+LIGHT = Depends(light.admit)
@@ -0,0 +1,169 @@
+# batch.py
+"""
+여러 교재 일괄 복사
+
+교재마다 복사 작업(jobs.CopyJob)을 하나씩 만들고, 일괄 복사(CopyBatch)의 워커(lane)들이 작업을 하나씩 가져가
+교재마다 독립된 DB 세션/트랜잭션으로 복사합니다. HTTP 요청은 등록만 하고 바로 반환하며,
+GET /copy-batches/{id} 가 교재별 결과/소요 시간과 전체 처리량(rows/sec)을 모아 보여줍니다.
+
+- 워커 수는 요청마다 정할 수 있고(workers, 기본 BATCH_COPY_WORKERS), 모든 일괄 복사가 함께 쓰는 스레드 수
+  BATCH_COPY_MAX_WORKERS 와 엔진 커넥션 풀 용량(pool_size + max_overflow)을 넘지 않습니다.
+- 교재는 워커가 앞 교재를 끝낼 때마다 하나씩 시작하므로, 교재 수가 단일 복사 대기열(COPY_QUEUE_LIMIT)에
+  묶이지 않습니다. 대신 한 번에 BATCH_COPY_MAX_BOOKS 교재, 진행 중인 일괄 복사 BATCH_COPY_QUEUE_LIMIT 개까지 받습니다.
+- 한 교재의 실패는 다른 교재의 복사에 영향을 주지 않습니다.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import jobs
+from loader import book_t
+
+BATCH_COPY_WORKERS = int(os.getenv("BATCH_COPY_WORKERS", "4"))
+BATCH_COPY_MAX_WORKERS = int(os.getenv("BATCH_COPY_MAX_WORKERS", "8"))
+BATCH_COPY_MAX_BOOKS = int(os.getenv("BATCH_COPY_MAX_BOOKS", "500"))
+BATCH_COPY_QUEUE_LIMIT = int(os.getenv("BATCH_COPY_QUEUE_LIMIT", "4"))
+# 조회를 위해 보관하는 끝난 일괄 복사 수 (오래된 것부터 삭제)
+BATCH_COPY_HISTORY = int(os.getenv("BATCH_COPY_HISTORY", "100"))
+
+
+class BatchTooLargeError(Exception):
+    """교재 수가 BATCH_COPY_MAX_BOOKS 를 넘을 때"""
+
+
+def max_workers() -> int:
+    """모든 일괄 복사가 동시에 쓸 수 있는 워커 수 (커넥션 풀 용량 이하)"""
+    return max(1, min(BATCH_COPY_MAX_WORKERS, jobs.pool_capacity()))
+
+
+@dataclass
+class CopyBatch:
+    id: str
+    workers: int
+    jobs: List[jobs.CopyJob]
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    _next: int = field(default=0, repr=False)
+    _lanes: int = field(default=0, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def _start_lane(self) -> None:
+        with self._lock:
+            self._lanes += 1
+            if self.started_at is None:
+                self.started_at = time.time()
+
+    def _next_job(self) -> Optional[jobs.CopyJob]:
+        """다음에 복사할 작업. 남은 작업이 없으면 워커를 끝내고 None"""
+        with self._lock:
+            if self._next < len(self.jobs):
+                self._next += 1
+                return self.jobs[self._next - 1]
+            self._lanes -= 1
+            if self._lanes == 0:
+                self.finished_at = time.time()
+            return None
+
+    def run_lane(self) -> None:
+        """워커 하나 - 남은 교재가 없을 때까지 하나씩 복사합니다."""
+        self._start_lane()
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            jobs.run_copy(job)
+
+    @property
+    def done(self) -> bool:
+        with self._lock:
+            return self.finished_at is not None
+
+    def snapshot(self) -> dict:
+        results = [job.snapshot() for job in self.jobs]
+        with self._lock:
+            started_at, finished_at = self.started_at, self.finished_at
+        succeeded = sum(1 for r in results if r["state"] == jobs.SUCCEEDED)
+        failed = sum(1 for r in results if r["state"] == jobs.FAILED)
+        if started_at is None:
+            state = jobs.PENDING
+        elif finished_at is None:
+            state = jobs.RUNNING
+        else:
+            state = jobs.FAILED if failed else jobs.SUCCEEDED
+        elapsed = 0.0 if started_at is None else (finished_at or time.time()) - started_at
+        rows = sum(sum(r["rows"].values()) for r in results)
+        return {
+            "id": self.id,
+            "state": state,
+            "workers": self.workers,
+            "books": len(results),
+            "succeeded": succeeded,
+            "failed": failed,
+            "rows": rows,
+            "elapsed": round(elapsed, 3),
+            "rows_per_sec": round(rows / elapsed, 1) if elapsed > 0 else 0.0,
+            "jobs": results,
+        }
+
+
+_executor = ThreadPoolExecutor(max_workers=max_workers(), thread_name_prefix="batch-copy")
+_batches: "OrderedDict[str, CopyBatch]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def resolve_book_ids(
+    db: Session, book_ids: List[int], cate_lvl1_idx: Optional[int] = None, cate_lvl2_idx: Optional[int] = None,
+) -> List[int]:
+    """book_ids 에 카테고리에 속한 교재를 (idx 순, 중복 없이) 더한 목록"""
+    book_ids = list(dict.fromkeys(book_ids))
+    if cate_lvl1_idx is None and cate_lvl2_idx is None:
+        return book_ids
+    stmt = select(book_t.c.idx).order_by(book_t.c.idx)
+    if cate_lvl1_idx is not None:
+        stmt = stmt.where(book_t.c.cate_lvl1_idx == cate_lvl1_idx)
+    if cate_lvl2_idx is not None:
+        stmt = stmt.where(book_t.c.cate_lvl2_idx == cate_lvl2_idx)
+    return list(dict.fromkeys(book_ids + db.execute(stmt).scalars().all()))
+
+
+def submit_books(book_ids: List[int], workers: Optional[int] = None) -> CopyBatch:
+    """
+    교재마다 복사 작업을 만들어 일괄 복사로 등록하고 즉시 반환합니다.
+    - 교재가 BATCH_COPY_MAX_BOOKS 를 넘으면 BatchTooLargeError
+    - 진행 중인 일괄 복사가 BATCH_COPY_QUEUE_LIMIT 개이면 jobs.QueueFullError
+    """
+    if len(book_ids) > BATCH_COPY_MAX_BOOKS:
+        raise BatchTooLargeError(f"{len(book_ids)} books requested (limit {BATCH_COPY_MAX_BOOKS})")
+    workers = max(1, min(workers or BATCH_COPY_WORKERS, max_workers(), len(book_ids)))
+    batch_id = uuid.uuid4().hex
+    copy_batch = CopyBatch(
+        id=batch_id, workers=workers,
+        jobs=[jobs.CopyJob(id=uuid.uuid4().hex, source_book_idx=book_idx, batch_id=batch_id) for book_idx in book_ids],
+    )
+    with _lock:
+        active = sum(1 for b in _batches.values() if not b.done)
+        if active >= BATCH_COPY_QUEUE_LIMIT:
+            raise jobs.QueueFullError(f"{active} batch copies are already running (limit {BATCH_COPY_QUEUE_LIMIT})")
+        finished = [b for b in _batches.values() if b.done]
+        for old in finished[:max(0, len(finished) - BATCH_COPY_HISTORY)]:
+            del _batches[old.id]
+        _batches[copy_batch.id] = copy_batch
+    # 교재별 작업도 GET /copy-jobs/{id} 로 조회할 수 있도록 등록 (실행은 이 일괄 복사의 워커가 함)
+    jobs.register(copy_batch.jobs)
+    for _ in range(workers):
+        _executor.submit(copy_batch.run_lane)
+    return copy_batch
+
+
+def get_batch(batch_id: str) -> Optional[CopyBatch]:
+    with _lock:
+        return _batches.get(batch_id)
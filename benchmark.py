@@ -0,0 +1,326 @@
+# benchmark.py
+"""
+교재 복사/조회 벤치마크
+
+합성(synthetic) 교재를 크기별로 만들어 copier.copy_book 과 읽기 경로(loader.load_book_tree)의
+소요 시간, 처리량(rows/sec), SQL 문장 수, 최대 메모리를 측정하고 JSON 으로 출력합니다.
+커밋 간 결과를 비교해 성능 회귀를 확인하는 용도입니다.
+
+--http 를 주면 TestClient 로 실제 엔드포인트(핸들러, 직렬화, 캐시, 입장 제어 포함)도 측정합니다.
+- GET /books/{id}/tree : 캐시를 비운 첫 요청, If-None-Match 로 다시 요청(304)
+- GET /books/{id}/vocas, /units/{id}/vocas : next_cursor 를 따라 모든 페이지
+- GET /books/{id}/vocas/stream : 전체 스트리밍 응답
+- POST /books/{id}/copy : 복사 엔드포인트 (rows/sec 포함)
+엔드포인트는 앱의 엔진을 쓰므로 --http 는 앱 설정(DATABASE_URL / ASYNC_DATABASE_URL)의 DB 에서 실행합니다.
+
+    python benchmark.py                                  # 임시 SQLite
+    python benchmark.py --sizes small,medium --output bench.json
+    python benchmark.py --url mysql+pymysql://user:pw@host/bench_db
+    DATABASE_URL=sqlite:///bench.db ASYNC_DATABASE_URL=sqlite+aiosqlite:///bench.db python benchmark.py --http
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, sessionmaker
+
+import cache
+import copier
+import database
+import loader
+import migrations
+import models
+import pagination
+
+
+@dataclass
+class BookShape:
+    chapters: int = 5
+    units_per_chapter: int = 4
+    vocas_per_unit: int = 25
+    derivatives_per_voca: int = 1
+    meanings_per_voca: int = 2
+    examples_per_meaning: int = 2
+    snyants_per_meaning: int = 1
+
+    @property
+    def rows(self) -> int:
+        units = self.chapters * self.units_per_chapter
+        vocas = units * self.vocas_per_unit
+        meanings = vocas * self.meanings_per_voca
+        return (
+            1 + self.chapters + units * 2 + vocas * (1 + self.derivatives_per_voca)
+            + meanings * (1 + self.examples_per_meaning + self.snyants_per_meaning)
+        )
+
+
+SIZES: Dict[str, BookShape] = {
+    "small": BookShape(chapters=2, units_per_chapter=2, vocas_per_unit=25),
+    "medium": BookShape(chapters=5, units_per_chapter=4, vocas_per_unit=50),
+    "large": BookShape(chapters=10, units_per_chapter=10, vocas_per_unit=50),
+}
+
+
+def _insert_rows(db: Session, table, rows: List[dict], *new_scope) -> List[int]:
+    """rows 를 한 번에 넣고, new_scope 범위에서 새 idx 를 삽입 순서대로 반환"""
+    if rows:
+        db.execute(insert(table), rows)
+    return db.execute(select(table.c.idx).where(*new_scope).order_by(table.c.idx)).scalars().all()
+
+
+def generate_book(db: Session, shape: BookShape, title: str = "synthetic") -> int:
+    """shape 모양대로 합성 교재를 만들고 교재 idx 를 반환합니다. (커밋 포함)"""
+    vt_idx = db.execute(select(models.VocaType.__table__.c.idx).limit(1)).scalar()
+    if vt_idx is None:
+        vt_idx = db.execute(insert(models.VocaType.__table__).values(vt_title="bench")).inserted_primary_key[0]
+
+    book_idx = db.execute(insert(loader.book_t).values(book_title=title)).inserted_primary_key[0]
+    chapter_ids = _insert_rows(db, loader.chapter_t, [
+        {"ch_title": f"Chapter {c + 1}", "ch_order": c + 1, "book_idx": book_idx}
+        for c in range(shape.chapters)
+    ], loader.chapter_t.c.book_idx == book_idx)
+    unit_ids = _insert_rows(db, loader.unit_t, [
+        {"un_title": f"Unit {c + 1}-{u + 1}", "un_order": c * shape.units_per_chapter + u + 1, "book_idx": book_idx}
+        for c in range(shape.chapters) for u in range(shape.units_per_chapter)
+    ], loader.unit_t.c.book_idx == book_idx)
+    db.execute(insert(loader.mapping_t), [
+        {"ch_idx": chapter_ids[i // shape.units_per_chapter], "un_idx": un_idx}
+        for i, un_idx in enumerate(unit_ids)
+    ])
+    voca_ids = _insert_rows(db, loader.voca_t, [
+        {
+            "vc_word": f"word{u}_{v}", "vt_idx": vt_idx, "vc_type": 1, "vc_order": v + 1,
+            "vc_root": f"root{v}", "vc_unikey": f"{title}-{u}-{v}", "un_idx": un_idx, "book_idx": book_idx,
+        }
+        for u, un_idx in enumerate(unit_ids) for v in range(shape.vocas_per_unit)
+    ], loader.voca_t.c.book_idx == book_idx)
+    voca_scope = select(loader.voca_t.c.idx).where(loader.voca_t.c.book_idx == book_idx)
+    if shape.derivatives_per_voca:
+        db.execute(insert(loader.dr_t), [
+            {"dr_word": f"derived{d}", "dr_meaning": f"파생 {d}", "voca_idx": voca_idx}
+            for voca_idx in voca_ids for d in range(shape.derivatives_per_voca)
+        ])
+    meaning_rows = [
+        (voca_idx, {"mi_meaning": f"뜻 {m + 1}", "mi_engmeaning": f"meaning {m + 1}", "mi_order": m + 1, "voca_idx": voca_idx})
+        for voca_idx in voca_ids for m in range(shape.meanings_per_voca)
+    ]
+    meaning_ids = _insert_rows(
+        db, loader.meaning_t, [row for _, row in meaning_rows], loader.meaning_t.c.voca_idx.in_(voca_scope),
+    )
+    children = list(zip(meaning_ids, (voca_idx for voca_idx, _ in meaning_rows)))
+    if shape.examples_per_meaning:
+        db.execute(insert(loader.example_t), [
+            {"ex_sentence": f"Example sentence {e + 1}.", "ex_translation": f"예문 {e + 1}", "meaning_idx": mi, "voca_idx": vi}
+            for mi, vi in children for e in range(shape.examples_per_meaning)
+        ])
+    if shape.snyants_per_meaning:
+        db.execute(insert(loader.snyant_t), [
+            {"snyant_type": s % 2 + 1, "snyant_word": f"syn{s}", "snyant_meaning": f"유의어 {s}", "meaning_idx": mi, "voca_idx": vi}
+            for mi, vi in children for s in range(shape.snyants_per_meaning)
+        ])
+    db.commit()
+    return book_idx
+
+
+def _measure(fn, *engines) -> dict:
+    """
+    fn() 의 소요 시간과 engines 에서 실행된 SQL 문장 수를 재고, 최대 메모리(tracemalloc)는 fn() 을 한 번 더
+    실행해 따로 잽니다. (tracemalloc 은 할당마다 추적 비용이 들어 시간 측정과 함께 켜면 시간이 부풀려짐)
+    """
+    started = time.perf_counter()
+    with ExitStack() as stack:
+        counters = [stack.enter_context(database.count_queries(engine)) for engine in engines]
+        extra = fn()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "seconds": round(elapsed, 4), "statements": sum(c.count for c in counters),
+        "peak_memory_kb": round(peak / 1024, 1), **(extra or {}),
+    }
+
+
+# =============================================
+#  HTTP 시나리오 (TestClient)
+# =============================================
+def app_engines() -> list:
+    """엔드포인트가 쓰는 앱 엔진 전체 (primary/복제본, 동기/비동기)"""
+    return [
+        database.engine, database.async_engine.sync_engine, *database.replica_engines,
+        *(e.sync_engine for e in database.async_replica_engines),
+    ]
+
+
+def _walk_pages(client, path: str, limit: int) -> dict:
+    """next_cursor 를 따라 모든 페이지를 읽고 {pages, items} 를 반환합니다."""
+    pages = items = 0
+    cursor = None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        r = client.get(path, params=params)
+        r.raise_for_status()
+        page = r.json()
+        pages += 1
+        items += len(page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            return {"pages": pages, "items": items}
+
+
+def _http_scenarios(client, book_idx: int, unit_idx: int, rows: int) -> Dict[str, dict]:
+    engines = app_engines()
+
+    def _tree_cold():
+        cache.invalidate_book(book_idx)
+        r = client.get(f"/books/{book_idx}/tree")
+        r.raise_for_status()
+        return {"status": r.status_code, "bytes": len(r.content)}
+
+    etag = client.get(f"/books/{book_idx}/tree").headers["ETag"]
+
+    def _tree_etag():
+        r = client.get(f"/books/{book_idx}/tree", headers={"If-None-Match": etag})
+        if r.status_code != 304:
+            raise RuntimeError(f"expected 304 for a matching ETag, got {r.status_code}")
+        return {"status": r.status_code}
+
+    def _stream():
+        with client.stream("GET", f"/books/{book_idx}/vocas/stream") as r:
+            r.raise_for_status()
+            size = sum(len(chunk) for chunk in r.iter_bytes())
+        return {"status": r.status_code, "bytes": size}
+
+    def _copy():
+        r = client.post(f"/books/{book_idx}/copy")
+        r.raise_for_status()
+        return {"status": r.status_code}
+
+    copy = _measure(_copy, *engines)
+    copy["rows_per_sec"] = round(rows / copy["seconds"], 1) if copy["seconds"] else None
+
+    return {
+        "http_tree_cold": _measure(_tree_cold, *engines),
+        "http_tree_etag": _measure(_tree_etag, *engines),
+        "http_book_vocas_pages": _measure(
+            lambda: _walk_pages(client, f"/books/{book_idx}/vocas", pagination.DEFAULT_PAGE_SIZE), *engines,
+        ),
+        "http_unit_vocas_pages": _measure(
+            lambda: _walk_pages(client, f"/units/{unit_idx}/vocas", 10), *engines,
+        ),
+        "http_vocas_stream": _measure(_stream, *engines),
+        "http_copy_book": copy,
+    }
+
+
+def run(engine, sizes: List[str], repeat: int = 3, http: bool = False) -> List[dict]:
+    """
+    크기별로 합성 교재를 만들어 읽기/복사(와 http 이면 엔드포인트)를 repeat 번 측정합니다.
+    http 시나리오는 앱의 엔진을 쓰므로 engine 이 database.engine 이어야 합니다.
+    """
+    client = None
+    if http:
+        if engine is not database.engine:
+            raise ValueError("http scenarios run against the app engine (database.engine)")
+        from fastapi.testclient import TestClient
+
+        import main as app_main
+        client = TestClient(app_main.app)
+
+    SessionFactory = sessionmaker(bind=engine, autoflush=False)
+    results = []
+    for name in sizes:
+        shape = SIZES[name]
+        with SessionFactory() as db:
+            book_idx = generate_book(db, shape, title=f"bench-{name}")
+            unit_idx = db.execute(
+                select(loader.unit_t.c.idx).where(loader.unit_t.c.book_idx == book_idx).order_by(loader.unit_t.c.idx)
+            ).scalars().first()
+
+        for _ in range(repeat):
+            with SessionFactory() as db:
+                read = _measure(lambda: loader.load_book_tree(db, book_idx) and None, engine)
+            with SessionFactory() as db:
+                def _copy():
+                    copier.copy_book(db, loader.load_book_tree(db, book_idx))
+                    db.commit()
+                copy = _measure(_copy, engine)
+            for metric in (read, copy):
+                metric["rows_per_sec"] = round(shape.rows / metric["seconds"], 1) if metric["seconds"] else None
+            result = {"size": name, "shape": asdict(shape), "rows": shape.rows, "read_tree": read, "copy_book": copy}
+            if client is not None:
+                result.update(_http_scenarios(client, book_idx, unit_idx, shape.rows))
+            results.append(result)
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="교재 복사/조회 벤치마크")
+    parser.add_argument("--url", help="DB URL (기본값: 임시 SQLite 파일)")
+    parser.add_argument("--sizes", default="small,medium", help=f"쉼표로 구분한 크기 ({', '.join(SIZES)})")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="결과 JSON 파일 (기본값: 표준 출력)")
+    parser.add_argument("--http", action="store_true", help="TestClient 로 엔드포인트도 측정 (앱 설정의 DB 사용)")
+    args = parser.parse_args(argv)
+    if args.http and args.url:
+        parser.error("--http uses the app database (DATABASE_URL / ASYNC_DATABASE_URL); omit --url")
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(unknown)}")
+
+    tmpdir = None
+    url = args.url
+    if args.http:
+        engine = database.engine
+    else:
+        if url is None:
+            tmpdir = tempfile.TemporaryDirectory()
+            url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+        engine = create_engine(url, **database.engine_options(url))
+    migrations.upgrade(engine)
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "dialect": engine.dialect.name,
+        "results": run(engine, sizes, args.repeat, args.http),
+    }
+    engine.dispose()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
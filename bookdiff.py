@@ -0,0 +1,136 @@
+# bookdiff.py
+"""
+두 교재의 단어 트리 비교 (예: 원본 ↔ "(개정)" 복사본)
+
+1. 두 교재의 단어를 vc_unikey(없으면 vc_word)로 짝짓습니다. 같은 키가 여러 개면 (vc_order, idx) 순서대로 짝짓습니다.
+2. 짝지어진 단어의 내용 해시(pt_voca_hash)가 같으면 하위 트리까지 같으므로 바로 건너뜁니다.
+3. 해시가 다른 단어만 하위 트리를 읽어, 뜻은 순서(mi_order)로, 파생어/예문/유의어·반의어는 순서대로 맞춰
+   추가/삭제/수정된 노드를 찾습니다.
+
+쿼리 수는 교재 크기와 관계없이 일정하고, 필드 단위 비교는 바뀐 단어에만 수행됩니다.
+해시 행이 없는 단어는 해시를 메모리에서만 계산하며 아무것도 쓰지 않으므로 읽기 전용 복제본에서도 실행할 수 있습니다.
+"""
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import loader
+import vocahash
+from loader import book_t, hash_t, voca_t
+
+# vocahash.voca_contents 노드 안의 하위 목록 이름
+_CHILD_LISTS = ("derivatives", "meanings", "examples", "snyants")
+
+
+def _voca_key(v) -> str:
+    return v.vc_unikey or v.vc_word
+
+
+def _voca_ref(v) -> dict:
+    return {"key": _voca_key(v), "idx": v.idx, "vc_word": v.vc_word, "un_idx": v.un_idx}
+
+
+def _load_index(db: Session, book_idx: int) -> List[Any]:
+    """단어 목록과 해시를 (vc_order, idx) 순으로 한 번에 조회"""
+    return db.execute(
+        select(voca_t.c.idx, voca_t.c.vc_word, voca_t.c.vc_unikey, voca_t.c.un_idx, hash_t.c.vh_hash)
+        .select_from(voca_t.outerjoin(hash_t, hash_t.c.voca_idx == voca_t.c.idx))
+        .where(voca_t.c.book_idx == book_idx)
+        .order_by(voca_t.c.vc_order, voca_t.c.idx)
+    ).all()
+
+
+def _match(source: List[Any], target: List[Any]) -> Tuple[List[Tuple[Any, Any]], List[Any], List[Any]]:
+    """키로 짝지은 (원본, 대상) 쌍, 원본에만 있는 단어, 대상에만 있는 단어"""
+    by_key: Dict[str, List[Any]] = defaultdict(list)
+    for v in target:
+        by_key[_voca_key(v)].append(v)
+    pairs, removed = [], []
+    for v in source:
+        candidates = by_key.get(_voca_key(v))
+        if candidates:
+            pairs.append((v, candidates.pop(0)))
+        else:
+            removed.append(v)
+    added = sorted((v for vs in by_key.values() for v in vs), key=lambda v: v.idx)
+    return pairs, removed, added
+
+
+def _fields(node: dict) -> dict:
+    return {k: v for k, v in node.items() if k not in _CHILD_LISTS}
+
+
+def _diff_node(path: str, before: dict, after: dict, changes: List[dict]) -> None:
+    """같은 위치의 두 노드를 비교해 바뀐 필드와 하위 목록의 변화를 changes 에 추가"""
+    changed = {k for k in _fields(before) if before[k] != after.get(k)}
+    if changed:
+        changes.append({
+            "path": path or "voca", "change": "modified",
+            "before": {k: before[k] for k in sorted(changed)},
+            "after": {k: after.get(k) for k in sorted(changed)},
+        })
+    for name in _CHILD_LISTS:
+        if name in before or name in after:
+            _diff_list(f"{path}.{name}" if path else name, before.get(name, []), after.get(name, []), changes)
+
+
+def _diff_list(path: str, before: List[dict], after: List[dict], changes: List[dict]) -> None:
+    for i in range(max(len(before), len(after))):
+        item_path = f"{path}[{i}]"
+        if i >= len(after):
+            changes.append({"path": item_path, "change": "removed", "before": before[i], "after": None})
+        elif i >= len(before):
+            changes.append({"path": item_path, "change": "added", "before": None, "after": after[i]})
+        elif before[i] != after[i]:
+            _diff_node(item_path, before[i], after[i], changes)
+
+
+def diff_books(db: Session, source_book_idx: int, target_book_idx: int) -> Optional[dict]:
+    """
+    두 교재를 비교합니다. 어느 한쪽 교재가 없으면 None
+    해시 행이 없는 단어는 계산만 하고 저장하지 않습니다. (hashes_computed 가 0 보다 크면
+    호출자가 vocahash.backfill_book_hashes 로 주 DB 에 채울 수 있습니다)
+    """
+    found = db.execute(
+        select(book_t.c.idx).where(book_t.c.idx.in_([source_book_idx, target_book_idx]))
+    ).scalars().all()
+    if len(set(found)) < len({source_book_idx, target_book_idx}):
+        return None
+
+    source, target = _load_index(db, source_book_idx), _load_index(db, target_book_idx)
+
+    # 1. 해시 행이 없는(새로 만들었거나 수정된) 단어만 메모리에서 해시 계산
+    hashes = {v.idx: v.vh_hash for v in source + target}
+    missing = [idx for idx, vh_hash in hashes.items() if vh_hash is None]
+    if missing:
+        hashes.update(vocahash.compute_hashes(db, voca_t.c.idx.in_(missing)))
+
+    # 2. 단어 짝짓기, 해시가 같은 단어는 건너뜀
+    pairs, removed, added = _match(source, target)
+    changed_pairs = [(s, t) for s, t in pairs if hashes[s.idx] != hashes[t.idx]]
+
+    # 3. 해시가 다른 단어만 하위 트리를 읽어 노드 단위로 비교
+    modified = []
+    if changed_pairs:
+        contents = vocahash.voca_contents(loader.load_voca_subtrees(
+            db, voca_t.c.idx.in_([v.idx for pair in changed_pairs for v in pair]),
+        ))
+        for s, t in changed_pairs:
+            changes: List[dict] = []
+            _diff_node("", contents[s.idx], contents[t.idx], changes)
+            modified.append({
+                "key": _voca_key(s), "vc_word": t.vc_word,
+                "source_idx": s.idx, "target_idx": t.idx, "changes": changes,
+            })
+
+    return {
+        "source_book_idx": source_book_idx,
+        "target_book_idx": target_book_idx,
+        "unchanged": len(pairs) - len(changed_pairs),
+        "hashes_computed": len(missing),
+        "added": [_voca_ref(v) for v in added],
+        "removed": [_voca_ref(v) for v in removed],
+        "modified": modified,
+    }
@@ -0,0 +1,94 @@
+# cache.py
+"""
+프로세스 내 LRU + TTL 캐시
+
+교재 트리 응답(직렬화된 JSON 본문과 ETag)을 교재 idx 로 캐시합니다.
+교재나 하위 데이터를 쓰는 경로는 커밋 후 invalidate(book_idx) 를 호출해야 합니다.
+(uvicorn 워커마다 캐시가 따로 있으므로, 다른 워커의 무효화는 TTL 로만 반영됩니다.)
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, NamedTuple, Optional
+
+BOOK_TREE_CACHE_SIZE = int(os.getenv("BOOK_TREE_CACHE_SIZE", "128"))
+BOOK_TREE_CACHE_TTL = float(os.getenv("BOOK_TREE_CACHE_TTL", "300"))
+
+
+class CachedBody(NamedTuple):
+    body: bytes
+    etag: str
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 헤더(쉼표 구분 목록, W/ 접두어, * 허용)가 etag 와 일치하는지"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip().removeprefix("W/")
+        if tag == "*" or tag == etag:
+            return True
+    return False
+
+
+class TTLCache:
+    """크기 제한(LRU)과 만료 시간(TTL)이 있는 스레드 안전 캐시"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+book_tree_cache = TTLCache(BOOK_TREE_CACHE_SIZE, BOOK_TREE_CACHE_TTL)
+
+# 교재 단위로 무효화해야 하는 다른 프로세스 내 구조 (예: search 의 교재별 색인)
+_book_listeners: List[Callable[[int], None]] = []
+
+
+def on_invalidate_book(listener: Callable[[int], None]) -> None:
+    _book_listeners.append(listener)
+
+
+def invalidate_book(book_idx: Optional[int]) -> None:
+    """교재 또는 그 하위 데이터가 바뀌었을 때 호출"""
+    if book_idx is not None:
+        book_tree_cache.invalidate(book_idx)
+        for listener in _book_listeners:
+            listener(book_idx)
@@ -0,0 +1,112 @@
+# categories.py
+"""
+카테고리 계층(adjacency list) 하위 트리 조회/복사
+
+lazy `children` 을 한 단계씩 따라가는 대신 재귀 CTE 한 번으로 하위 트리 전체를 읽고,
+복사는 깊이(depth)별로 다중 행 INSERT 한 번 + 새 idx 재조회 한 번으로 처리합니다.
+(문장 수는 카테고리 수가 아니라 트리 깊이에만 비례합니다.)
+"""
+from itertools import groupby
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, literal, or_, select
+from sqlalchemy.orm import Session
+
+import copier
+import loader
+import models
+
+category_t = models.Category.__table__
+
+
+def _subtree_cte(root_idx: int):
+    subtree = (
+        select(category_t.c.idx, literal(0).label("depth"))
+        .where(category_t.c.idx == root_idx)
+        .cte("subtree", recursive=True)
+    )
+    return subtree.union_all(
+        select(category_t.c.idx, (subtree.c.depth + 1).label("depth"))
+        .where(category_t.c.cate_pidx == subtree.c.idx)
+    )
+
+
+def subtree_select(root_idx: int):
+    """root_idx 와 모든 하위 카테고리를 (depth, idx) 순으로 조회하는 SELECT (재귀 CTE)"""
+    subtree = _subtree_cte(root_idx)
+    return (
+        select(category_t, subtree.c.depth)
+        .join(subtree, category_t.c.idx == subtree.c.idx)
+        .order_by(subtree.c.depth, category_t.c.idx)
+    )
+
+
+def load_subtree(db: Session, root_idx: int) -> List[Any]:
+    return db.execute(subtree_select(root_idx)).all()
+
+
+def subtree_book_ids(db: Session, root_idx: int) -> List[int]:
+    """하위 트리의 카테고리에 cate_lvl1_idx/cate_lvl2_idx 로 연결된 교재 idx 목록"""
+    book_t = loader.book_t
+    scope = select(_subtree_cte(root_idx).c.idx)
+    return db.execute(
+        select(book_t.c.idx)
+        .where(or_(book_t.c.cate_lvl1_idx.in_(scope), book_t.c.cate_lvl2_idx.in_(scope)))
+        .order_by(book_t.c.idx)
+    ).scalars().all()
+
+
+def copy_subtree(
+    db: Session, root_idx: int, include_books: bool = False,
+) -> Optional[Tuple[Dict[int, int], Dict[int, int]]]:
+    """
+    카테고리 하위 트리를 복사하고 (category_map, book_map) 을 반환합니다. 원본이 없으면 None
+    - 루트 복사본은 원본과 같은 부모를 가지며 이름은 "Copy of [원본 이름]" 입니다.
+    - **include_books**: 하위 트리에 cate_lvl1_idx/cate_lvl2_idx 로 연결된 교재도
+      새 카테고리로 다시 연결하여 복사합니다.
+    커밋/롤백은 호출자가 담당합니다.
+    """
+    rows = load_subtree(db, root_idx)
+    if not rows:
+        return None
+
+    category_map: Dict[int, int] = {}
+    for depth, level in groupby(rows, key=lambda r: r.depth):
+        level = list(level)
+        if depth == 0:
+            root = level[0]
+            result = db.execute(insert(category_t).values(
+                cate_name=f"Copy of {root.cate_name}",
+                cate_lvl=root.cate_lvl,
+                cate_pidx=root.cate_pidx,  # 원본과 동일한 부모를 가짐
+                created_by=root.created_by,
+            ))
+            category_map[root.idx] = result.inserted_primary_key[0]
+            continue
+
+        new_parents = {category_map[c.cate_pidx] for c in level}
+        db.execute(insert(category_t), [
+            {"cate_name": c.cate_name, "cate_lvl": c.cate_lvl, "cate_pidx": category_map[c.cate_pidx], "created_by": c.created_by}
+            for c in level
+        ])
+        new_ids = db.execute(
+            select(category_t.c.idx).where(category_t.c.cate_pidx.in_(new_parents)).order_by(category_t.c.idx)
+        ).scalars().all()
+        category_map.update(copier.build_id_map([c.idx for c in level], new_ids, category_t.name))
+
+    book_map: Dict[int, int] = {}
+    if include_books:
+        old_ids = list(category_map)
+        book_t = loader.book_t
+        book_ids = db.execute(
+            select(book_t.c.idx)
+            .where(or_(book_t.c.cate_lvl1_idx.in_(old_ids), book_t.c.cate_lvl2_idx.in_(old_ids)))
+            .order_by(book_t.c.idx)
+        ).scalars().all()
+        for book_idx in book_ids:
+            tree = loader.load_book_tree(db, book_idx)
+            book_map[book_idx] = copier.copy_book(db, tree, overrides={
+                "cate_lvl1_idx": category_map.get(tree.book.cate_lvl1_idx, tree.book.cate_lvl1_idx),
+                "cate_lvl2_idx": category_map.get(tree.book.cate_lvl2_idx, tree.book.cate_lvl2_idx),
+            })
+    return category_map, book_map
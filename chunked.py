@@ -0,0 +1,163 @@
+# chunked.py
+"""
+나눠서(chunk) 커밋하는 이어받기 가능한 교재 복사
+
+교재 하나를 한 트랜잭션으로 복사하면 7개 테이블의 행 잠금과 undo log 가 복사 내내 유지되고,
+끝 무렵 실패하면 모든 작업이 롤백됩니다. 여기서는
+  1) 교재/챕터/유닛/매핑을 복사하고 id 매핑을 복사 기록(pt_copy_journal)에 남긴 뒤 커밋,
+  2) 단어를 chunk_size 개씩 하위 데이터와 함께 복사하고, 같은 트랜잭션에서
+     기록의 high-water mark(cj_src_hwm) 를 갱신한 뒤 커밋
+하므로, 중단되더라도 마지막으로 커밋된 chunk 다음부터 이어서 복사할 수 있습니다.
+"""
+import json
+import os
+from typing import Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+import cache
+import copier
+import loader
+import models
+import purge
+from progress import CopyObserver
+
+COPY_CHUNK_SIZE = int(os.getenv("COPY_CHUNK_SIZE", "500"))
+
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+ABANDONED = "abandoned"
+
+
+class JournalStateError(Exception):
+    """현재 상태에서 허용되지 않는 작업 (예: 완료된 복사를 이어받기)"""
+
+
+def _dump_map(mapping: Dict[int, int]) -> str:
+    return json.dumps({str(k): v for k, v in mapping.items()})
+
+
+def _load_map(text: Optional[str]) -> Dict[int, int]:
+    return {int(k): v for k, v in json.loads(text or "{}").items()}
+
+
+def _lock_journal(db: Session, journal_idx: int) -> Optional[models.CopyJournal]:
+    return (
+        db.query(models.CopyJournal)
+        .filter(models.CopyJournal.idx == journal_idx)
+        .with_for_update()
+        .populate_existing()
+        .first()
+    )
+
+
+def start_copy(
+    db: Session, source_book_idx: int, chunk_size: Optional[int] = None,
+    observer: Optional[CopyObserver] = None,
+) -> Optional[models.CopyJournal]:
+    """
+    교재/챕터/유닛/매핑을 복사하고 복사 기록을 만든 뒤 커밋합니다. 원본이 없으면 None
+    단어 이하는 run_chunks 로 복사합니다.
+    """
+    tree = loader.load_book_structure(db, source_book_idx)
+    if tree is None:
+        return None
+    try:
+        new_book_idx = copier.copy_book_row(db, tree.book, observer)
+        chapter_map, unit_map = copier.copy_structure(db, tree, new_book_idx, observer)
+        vocas_total = db.execute(
+            select(func.count()).select_from(loader.voca_t).where(loader.voca_t.c.book_idx == source_book_idx)
+        ).scalar()
+        journal = models.CopyJournal(
+            src_book_idx=source_book_idx,
+            new_book_idx=new_book_idx,
+            cj_state=RUNNING,
+            cj_chunk_size=chunk_size or COPY_CHUNK_SIZE,
+            cj_chapter_map=_dump_map(chapter_map),
+            cj_unit_map=_dump_map(unit_map),
+            cj_src_hwm=0,
+            cj_new_hwm=0,
+            cj_vocas_done=0,
+            cj_vocas_total=vocas_total,
+            created_by=tree.book.created_by,
+        )
+        db.add(journal)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return journal
+
+
+def run_chunks(
+    db: Session, journal_idx: int, observer: Optional[CopyObserver] = None,
+    max_chunks: Optional[int] = None,
+) -> models.CopyJournal:
+    """
+    복사 기록의 high-water mark 다음 단어부터 chunk 단위로 복사/커밋합니다.
+    중단되었거나 실패한 복사를 이어받을 때도 같은 함수를 사용합니다.
+    - **max_chunks**: 이번 호출에서 처리할 최대 chunk 수 (None 이면 끝까지)
+    """
+    journal = None
+    done = 0
+    while max_chunks is None or done < max_chunks:
+        # 같은 기록을 동시에 이어받는 요청이 있으면 여기서 직렬화됩니다.
+        journal = _lock_journal(db, journal_idx)
+        if journal is None:
+            db.rollback()
+            raise LookupError("Copy journal not found")
+        if journal.cj_state not in (RUNNING, FAILED):
+            db.rollback()
+            raise JournalStateError(f"Copy journal is {journal.cj_state}")
+        try:
+            chunk = loader.load_voca_chunk(db, journal.src_book_idx, journal.cj_src_hwm, journal.cj_chunk_size)
+            if not chunk.vocas:
+                journal.cj_state = COMPLETED
+                journal.cj_error = None
+                db.commit()
+                return journal
+
+            voca_map = copier.copy_vocas(
+                db, chunk, journal.new_book_idx, _load_map(journal.cj_unit_map),
+                observer, new_voca_floor=journal.cj_new_hwm,
+            )
+            journal.cj_src_hwm = chunk.vocas[-1].idx
+            if voca_map:
+                journal.cj_new_hwm = max(voca_map.values())
+            journal.cj_vocas_done += len(chunk.vocas)
+            journal.cj_state = RUNNING
+            journal.cj_error = None
+            db.commit()
+            cache.invalidate_book(journal.new_book_idx)
+        except Exception as e:
+            db.rollback()
+            journal = _lock_journal(db, journal_idx)
+            journal.cj_state = FAILED
+            journal.cj_error = str(e)[:500]
+            db.commit()
+            raise
+        done += 1
+    return journal if journal is not None else db.get(models.CopyJournal, journal_idx)
+
+
+def abandon(db: Session, journal_idx: int) -> Optional[models.CopyJournal]:
+    """완료되지 않은 복사를 포기하고, 만들다 만 새 교재를 삭제합니다."""
+    journal = _lock_journal(db, journal_idx)
+    if journal is None:
+        db.rollback()
+        return None
+    if journal.cj_state == COMPLETED:
+        db.rollback()
+        raise JournalStateError("Copy journal is completed; delete the book instead")
+    try:
+        if journal.cj_state != ABANDONED and journal.new_book_idx is not None:
+            purge.delete_book(db, journal.new_book_idx)
+        journal.cj_state = ABANDONED
+        db.commit()
+        cache.invalidate_book(journal.new_book_idx)
+    except Exception:
+        db.rollback()
+        raise
+    return journal
@@ -0,0 +1,212 @@
+# copier.py
+"""
+교재(Book) 복사 엔진
+
+행 단위로 `db.flush()` 하던 방식 대신, `loader.load_book_tree` 로 원본 트리를
+계층 단위로 한 번에 읽고 테이블마다 다중 행 INSERT 로 한 번에 씁니다.
+old → new idx 매핑은 "새 부모 범위에서 idx 순으로 다시 조회"하여 일괄 재구성합니다.
+(같은 문장/커넥션 안에서 auto increment 값은 삽입 순서대로 증가하므로,
+ 원본을 idx 순으로 넣고 새 행을 idx 순으로 읽으면 1:1 로 대응됩니다.)
+
+교재 크기와 관계없이 왕복(round trip) 횟수가 고정됩니다.
+MySQL(pymysql) 에서는 executemany 가 다중 행 VALUES 로 합쳐지고,
+SQLite 등 다른 방언에서도 같은 코드로 동작합니다.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+import vocahash
+from loader import (
+    BookTree, book_t, chapter_t, unit_t, mapping_t, voca_t, dr_t, meaning_t, example_t, snyant_t,
+)
+from progress import CopyObserver
+
+
+def bulk_insert(db: Session, table, rows: List[dict]) -> None:
+    """여러 행을 한 번의 executemany(다중 행 INSERT)로 저장"""
+    if rows:
+        db.execute(insert(table), rows)
+
+
+def build_id_map(old_ids: Sequence[int], new_ids: Sequence[int], what: str) -> Dict[int, int]:
+    """idx 순으로 정렬된 원본/신규 id 목록을 짝지어 매핑 딕셔너리 생성"""
+    if len(old_ids) != len(new_ids):
+        raise RuntimeError(f"{what} 매핑 불일치: 원본 {len(old_ids)}건, 신규 {len(new_ids)}건")
+    return dict(zip(old_ids, new_ids))
+
+
+def new_ids_in_order(db: Session, table, *where) -> List[int]:
+    """새로 삽입된 행의 idx 를 삽입 순서(idx 오름차순)대로 조회"""
+    return db.execute(select(table.c.idx).where(*where).order_by(table.c.idx)).scalars().all()
+
+
+def tree_row_count(tree: BookTree) -> int:
+    """트리를 복사할 때 쓰게 될 전체 행 수 (교재 1행 포함)"""
+    return 1 + sum(len(rows) for rows in (
+        tree.chapters, tree.units, tree.mappings, tree.vocas,
+        tree.derivatives, tree.meanings, tree.examples, tree.snyants,
+    ))
+
+
+def _inserter(db: Session, observer: Optional[CopyObserver]):
+    """테이블을 한 번에 쓰고 관찰자에게 알리는 함수를 만듭니다."""
+    def _insert(phase: str, table, rows: List[dict]) -> None:
+        bulk_insert(db, table, rows)
+        if observer is not None:
+            observer.on_phase(phase, len(rows))
+    return _insert
+
+
+def copy_book_row(
+    db: Session, original_book, observer: Optional[CopyObserver] = None, overrides: Optional[dict] = None,
+) -> int:
+    """
+    교재(Book) 레코드 한 건을 복사하고 새 idx 를 반환
+    - **overrides**: 원본 대신 사용할 컬럼 값 (예: 새 카테고리 idx)
+    """
+    values = dict(
+        book_title=f"{original_book.book_title} (개정)",
+        book_isbn=original_book.book_isbn,
+        book_imagelink=original_book.book_imagelink,
+        cate_lvl1_idx=original_book.cate_lvl1_idx,
+        cate_lvl2_idx=original_book.cate_lvl2_idx,
+        created_by=original_book.created_by,  # 필요시 현재 사용자 ID로 변경
+    )
+    values.update(overrides or {})
+    result = db.execute(insert(book_t).values(**values))
+    if observer is not None:
+        observer.on_phase("book", 1)
+    return result.inserted_primary_key[0]
+
+
+def copy_structure(
+    db: Session, tree: BookTree, new_book_idx: int, observer: Optional[CopyObserver] = None,
+) -> Tuple[Dict[int, int], Dict[int, int]]:
+    """챕터, 유닛, 챕터-유닛 매핑을 복사하고 (chapter_map, unit_map) 을 반환"""
+    _insert = _inserter(db, observer)
+
+    # 1. 챕터(Chapters) 복사
+    _insert("chapters", chapter_t, [
+        {"ch_title": ch.ch_title, "ch_order": ch.ch_order, "book_idx": new_book_idx, "created_by": ch.created_by}
+        for ch in tree.chapters
+    ])
+    chapter_map = build_id_map(
+        [ch.idx for ch in tree.chapters],
+        new_ids_in_order(db, chapter_t, chapter_t.c.book_idx == new_book_idx),
+        chapter_t.name,
+    )
+
+    # 2. 유닛(Units) 복사
+    _insert("units", unit_t, [
+        {"un_title": un.un_title, "un_order": un.un_order, "book_idx": new_book_idx, "created_by": un.created_by}
+        for un in tree.units
+    ])
+    unit_map = build_id_map(
+        [un.idx for un in tree.units],
+        new_ids_in_order(db, unit_t, unit_t.c.book_idx == new_book_idx),
+        unit_t.name,
+    )
+
+    # 3. 챕터-유닛 매핑(Chapter-Unit Mappings) 복사
+    _insert("mappings", mapping_t, [
+        {"ch_idx": chapter_map[m.ch_idx], "un_idx": unit_map[m.un_idx], "created_by": m.created_by}
+        for m in tree.mappings
+        if m.ch_idx in chapter_map and m.un_idx in unit_map
+    ])
+    return chapter_map, unit_map
+
+
+def copy_vocas(
+    db: Session, tree: BookTree, new_book_idx: int, unit_map: Dict[int, int],
+    observer: Optional[CopyObserver] = None, new_voca_floor: int = 0,
+) -> Dict[int, int]:
+    """
+    단어와 그 하위 데이터(파생어, 뜻, 예문, 유의어/반의어)를 복사하고 voca_map 을 반환합니다.
+    - **new_voca_floor**: 새 교재에 이미 들어 있는 단어 idx 의 최댓값.
+      나눠서 복사할 때 이번에 삽입한 단어만 골라 매핑하기 위해 사용합니다.
+    """
+    _insert = _inserter(db, observer)
+    new_voca_scope = (voca_t.c.book_idx == new_book_idx, voca_t.c.idx > new_voca_floor)
+
+    # 1. 단어(Voca) 복사 - 매핑되는 유닛이 없으면 건너뜀
+    vocas = [v for v in tree.vocas if v.un_idx in unit_map]
+    _insert("vocas", voca_t, [
+        {
+            "vc_word": v.vc_word, "vt_idx": v.vt_idx, "vc_type": v.vc_type, "vc_root": v.vc_root,
+            "vc_unikey": v.vc_unikey, "vc_mp3_link": v.vc_mp3_link, "un_idx": unit_map[v.un_idx],
+            "book_idx": new_book_idx, "vc_order": v.vc_order, "created_by": v.created_by,
+        }
+        for v in vocas
+    ])
+    voca_map = build_id_map(
+        [v.idx for v in vocas],
+        new_ids_in_order(db, voca_t, *new_voca_scope),
+        voca_t.name,
+    )
+    # 내용이 같으므로 원본의 내용 해시(pt_voca_hash)도 그대로 가져감
+    vocahash.copy_hashes(db, voca_map)
+
+    # 2. 파생어(Derivatives) 복사
+    _insert("derivatives", dr_t, [
+        {"dr_word": d.dr_word, "dr_meaning": d.dr_meaning, "voca_idx": voca_map[d.voca_idx], "created_by": d.created_by}
+        for d in tree.derivatives
+        if d.voca_idx in voca_map
+    ])
+
+    # 3. 단어 뜻(Meanings) 복사
+    meanings = [m for m in tree.meanings if m.voca_idx in voca_map]
+    _insert("meanings", meaning_t, [
+        {
+            "mi_meaning": m.mi_meaning, "mi_engmeaning": m.mi_engmeaning, "mi_order": m.mi_order,
+            "voca_idx": voca_map[m.voca_idx], "created_by": m.created_by,
+        }
+        for m in meanings
+    ])
+    meaning_map = build_id_map(
+        [m.idx for m in meanings],
+        new_ids_in_order(db, meaning_t, meaning_t.c.voca_idx.in_(select(voca_t.c.idx).where(*new_voca_scope))),
+        meaning_t.name,
+    )
+    meaning_voca = {m.idx: m.voca_idx for m in meanings}
+
+    # 4. 예문(Examples) 복사
+    _insert("examples", example_t, [
+        {
+            "ex_sentence": e.ex_sentence, "ex_translation": e.ex_translation,
+            "meaning_idx": meaning_map[e.meaning_idx], "voca_idx": voca_map[meaning_voca[e.meaning_idx]],
+            "created_by": e.created_by,
+        }
+        for e in tree.examples
+        if e.meaning_idx in meaning_map
+    ])
+
+    # 5. 유의어/반의어(Synonyms/Antonyms) 복사
+    _insert("snyants", snyant_t, [
+        {
+            "snyant_type": s.snyant_type, "snyant_word": s.snyant_word, "snyant_meaning": s.snyant_meaning,
+            "meaning_idx": meaning_map[s.meaning_idx], "voca_idx": voca_map[meaning_voca[s.meaning_idx]],
+            "created_by": s.created_by,
+        }
+        for s in tree.snyants
+        if s.meaning_idx in meaning_map
+    ])
+    return voca_map
+
+
+def copy_book(
+    db: Session, tree: BookTree, observer: Optional[CopyObserver] = None, overrides: Optional[dict] = None,
+) -> int:
+    """
+    loader 로 읽은 원본 트리를 테이블 단위로 복사하고 새 교재의 idx 를 반환합니다.
+    커밋/롤백은 호출자가 담당합니다.
+    - **observer**: 테이블 하나를 쓸 때마다 on_phase(단계 이름, 행 수)를 받는 관찰자
+    - **overrides**: 새 교재 레코드에 원본 대신 사용할 컬럼 값
+    """
+    if observer is not None:
+        observer.on_start(tree_row_count(tree))
+    new_book_idx = copy_book_row(db, tree.book, observer, overrides)
+    _, unit_map = copy_structure(db, tree, new_book_idx, observer)
+    copy_vocas(db, tree, new_book_idx, unit_map, observer)
+    return new_book_idx
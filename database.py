@@ -1,6 +1,12 @@
+import itertools
 import os
+from contextlib import contextmanager
+from typing import List, Optional
+
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from fastapi import Header
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -12,15 +18,63 @@ DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_HOST = os.getenv("DB_HOST")
 DB_DATABASE = os.getenv("DB_DATABASE")
 
-# MySQL 연결 URL 생성
-SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_DATABASE}"
+# 커넥션 풀 설정
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # MySQL wait_timeout 보다 짧게
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_PREWARM_CONNECTIONS = int(os.getenv("DB_PREWARM_CONNECTIONS", "2"))  # 워커 시작 시 미리 열어둘 커넥션 수 (엔진별)
+
+# MySQL 연결 URL 생성 (DATABASE_URL / ASYNC_DATABASE_URL 로 덮어쓸 수 있음. 예: 테스트용 sqlite)
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL") or f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_DATABASE}"
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_DATABASE}"
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+# 읽기 전용 복제본 (쉼표로 구분). DB_REPLICA_HOSTS 는 primary 와 같은 계정/DB 이름을 씁니다.
+# DATABASE_REPLICA_URLS / ASYNC_DATABASE_REPLICA_URLS 로 직접 지정할 수 있습니다. (예: 로컬 테스트용 sqlite 파일 두 개)
+DB_REPLICA_HOSTS = _split(os.getenv("DB_REPLICA_HOSTS"))
+REPLICA_DATABASE_URLS = _split(os.getenv("DATABASE_REPLICA_URLS")) or [
+    f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{host}/{DB_DATABASE}" for host in DB_REPLICA_HOSTS
+]
+ASYNC_REPLICA_DATABASE_URLS = _split(os.getenv("ASYNC_DATABASE_REPLICA_URLS")) or [
+    f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{host}/{DB_DATABASE}" for host in DB_REPLICA_HOSTS
+]
+
+
+def engine_options(url: str) -> dict:
+    """URL 에 맞는 create_engine 옵션 (sqlite 는 풀 크기 설정을 쓰지 않음)"""
+    if url.startswith("sqlite"):
+        return {"connect_args": {"check_same_thread": False}} if "aiosqlite" not in url else {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
 
 # SQLAlchemy 엔진 생성
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL))
 
 # 데이터베이스 세션 생성을 위한 SessionLocal 클래스
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 비동기 엔진과 세션 (읽기 전용 엔드포인트용)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# 읽기 전용 복제본 엔진 (없으면 모든 읽기가 primary 로)
+replica_engines = [create_engine(url, **engine_options(url)) for url in REPLICA_DATABASE_URLS]
+async_replica_engines = [create_async_engine(url, **engine_options(url)) for url in ASYNC_REPLICA_DATABASE_URLS]
+_replicas = itertools.cycle(replica_engines)
+_async_replicas = itertools.cycle(async_replica_engines)
+
 # ORM 모델의 기본 클래스
 Base = declarative_base()
 
@@ -30,4 +84,124 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# 비동기 엔드포인트용 DB 세션 Dependency
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# =============================================
+#  읽기 복제본 라우팅
+#  읽기 전용 엔드포인트와 복사의 원본 트리 읽기는 복제본으로, 쓰기는 항상 primary 로 보냅니다.
+#  복제 지연 때문에 방금 쓴 데이터를 읽어야 하면 요청 헤더 X-Read-Your-Writes: true 로 primary 에서 읽습니다.
+# =============================================
+READ_YOUR_WRITES_HEADER = "X-Read-Your-Writes"
+
+
+def wants_primary(value: Optional[str]) -> bool:
+    return (value or "").strip().lower() in ("1", "true", "yes")
+
+
+def read_engine(primary: bool = False):
+    """복제본을 돌아가며 고르고, 복제본이 없거나 primary=True 이면 primary 엔진"""
+    return engine if primary or not replica_engines else next(_replicas)
+
+
+def async_read_engine(primary: bool = False):
+    return async_engine if primary or not async_replica_engines else next(_async_replicas)
+
+
+def read_session(primary: bool = False):
+    """읽기용 세션 (쓰기에 사용하지 않습니다)"""
+    return SessionLocal(bind=read_engine(primary))
+
+
+def async_read_session(primary: bool = False):
+    return AsyncSessionLocal(bind=async_read_engine(primary))
+
+
+def get_read_db(x_read_your_writes: Optional[str] = Header(None)):
+    db = read_session(wants_primary(x_read_your_writes))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(x_read_your_writes: Optional[str] = Header(None)):
+    async with async_read_session(wants_primary(x_read_your_writes)) as db:
+        yield db
+
+
+# =============================================
+#  커넥션 풀 예열 (워커 시작 시)
+# =============================================
+def _prewarm_count(engine, n: int) -> int:
+    size = getattr(engine.pool, "size", None)
+    return min(n, size()) if callable(size) else n
+
+
+def prewarm(engine, n: int = DB_PREWARM_CONNECTIONS) -> int:
+    """커넥션 n 개를 동시에 열었다가 풀에 돌려놓고, 실제로 연 개수를 반환합니다."""
+    connections = []
+    try:
+        for _ in range(_prewarm_count(engine, n)):
+            connections.append(engine.connect())
+    finally:
+        for conn in connections:
+            conn.close()
+    return len(connections)
+
+
+async def prewarm_async(engine, n: int = DB_PREWARM_CONNECTIONS) -> int:
+    """비동기 엔진용 prewarm"""
+    connections = []
+    try:
+        for _ in range(_prewarm_count(engine.sync_engine, n)):
+            connections.append(await engine.connect())
+    finally:
+        for conn in connections:
+            await conn.close()
+    return len(connections)
+
+
+# =============================================
+#  쿼리 수 측정 도우미
+# =============================================
+class QueryCounter:
+    """count_queries 블록 안에서 실행된 SQL 문장 수와 문장 목록 (parameters 는 같은 순서의 바인드 값)"""
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+        self.parameters = []
+
+
+@contextmanager
+def count_queries(bind=None):
+    """블록 안에서 bind(기본값: engine)로 실행된 SQL 문장을 셉니다."""
+    bind = bind if bind is not None else engine
+    counter = QueryCounter()
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter.count += 1
+        counter.statements.append(statement)
+        counter.parameters.append(parameters)
+
+    event.listen(bind, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(bind, "before_cursor_execute", _before_cursor_execute)
+
+
+@contextmanager
+def assert_query_count(expected: int, bind=None):
+    """블록 안에서 실행된 SQL 문장 수가 expected 와 다르면 AssertionError"""
+    with count_queries(bind) as counter:
+        yield counter
+    if counter.count != expected:
+        raise AssertionError(
+            f"expected {expected} queries, got {counter.count}:\n" + "\n".join(counter.statements)
+        )
@@ -0,0 +1,210 @@
+# explain_check.py
+"""
+실행 계획(EXPLAIN) 회귀 확인
+
+합성 교재를 몇 개 만든 뒤 TestClient 로 실제 엔드포인트(트리 조회, 전체/부분/chunk 복사, 목록 페이지, 검색,
+카테고리 하위 트리 CTE, 교재 비교, 단어 일괄 등록, 삭제 dry-run / batch 삭제)를 호출하고,
+database.count_queries 로 앱 엔진에서 실행된 SELECT/UPDATE/DELETE 를 모두 수집해 각 문장을 EXPLAIN 합니다.
+모델 테이블을 전체 스캔하는 문장이 있으면 목록을 출력하고 종료 코드 1 로 끝납니다.
+
+엔드포인트는 앱의 엔진을 쓰므로 앱 설정(DATABASE_URL / ASYNC_DATABASE_URL)의 DB 에서 실행합니다.
+
+    DATABASE_URL=sqlite:///explain.db ASYNC_DATABASE_URL=sqlite+aiosqlite:///explain.db python explain_check.py
+    DATABASE_URL=mysql+pymysql://user:pw@host/check_db ASYNC_DATABASE_URL=mysql+aiomysql://user:pw@host/check_db \\
+        python explain_check.py --verbose                      # 문장별 실행 계획 출력
+
+MySQL 은 행이 아주 적으면 인덱스가 있어도 전체 스캔을 고르므로, 교재를 여러 개 만들고 ANALYZE TABLE 후 확인합니다.
+빈 DB 를 대상으로 실행하세요. (합성 교재를 만들고 지우지 않습니다)
+"""
+import argparse
+import json
+import re
+import sys
+from contextlib import ExitStack
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+import benchmark
+import cache
+import database
+import loader
+import migrations
+import models
+
+TABLES = {table.name for table in models.Base.metadata.sorted_tables}
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)$")
+_EXPLAINED_VERBS = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+class Statement(NamedTuple):
+    scenario: str
+    sql: str
+    parameters: object
+
+
+class Finding(NamedTuple):
+    statement: Statement
+    table: str
+    plan: List[str]
+
+
+class _Fixture(NamedTuple):
+    book_idx: int
+    other_book_idx: int
+    purge_book_idx: int
+    unit_idx: int
+    vt_idx: int
+    category_idx: int
+
+
+def _setup(books: int) -> _Fixture:
+    """카테고리 두 단계와 합성 교재들을 만듭니다. (앱 primary 엔진)"""
+    SessionFactory = sessionmaker(bind=database.engine, autoflush=False)
+    with SessionFactory() as db:
+        category_t = models.Category.__table__
+        category_idx = db.execute(category_t.insert().values(cate_name="explain", cate_lvl=1)).inserted_primary_key[0]
+        db.execute(category_t.insert().values(cate_name="explain-child", cate_lvl=2, cate_pidx=category_idx))
+        book_ids = [
+            benchmark.generate_book(db, benchmark.SIZES["small"], title=f"explain-{i}") for i in range(books)
+        ]
+        db.execute(
+            models.Book.__table__.update()
+            .where(models.Book.idx.in_(book_ids))
+            .values(cate_lvl1_idx=category_idx)
+        )
+        tree = loader.load_book_tree(db, book_ids[0])
+        db.commit()
+    if database.engine.dialect.name == "mysql":
+        with database.engine.connect() as conn:
+            for table in TABLES:
+                conn.execute(text(f"ANALYZE TABLE {table}")).all()
+    return _Fixture(
+        book_ids[0], book_ids[1], book_ids[2], tree.units[0].idx, tree.vocas[0].vt_idx, category_idx,
+    )
+
+
+def _scenarios(client, f: _Fixture) -> Dict[str, Callable[[], None]]:
+    def _call(method: str, path: str, **kwargs) -> dict:
+        r = client.request(method, path, **kwargs)
+        if r.status_code >= 400:
+            raise RuntimeError(f"{method} {path} -> {r.status_code}: {r.text[:300]}")
+        return r.json() if r.status_code != 304 and r.content else {}
+
+    def _pages(path: str, **params):
+        def _run():
+            page = _call("GET", path, params={"limit": 10, **params})
+            if page["next_cursor"]:
+                _call("GET", path, params={"limit": 10, "cursor": page["next_cursor"], **params})
+        return _run
+
+    def _read_tree():
+        cache.invalidate_book(f.book_idx)
+        _call("GET", f"/books/{f.book_idx}/tree")
+
+    ingest_body = "\n".join(
+        json.dumps({
+            "vc_word": f"explain{i}", "vt_idx": f.vt_idx, "vc_type": 1,
+            "derivatives": [{"dr_word": f"explained{i}", "dr_meaning": "파생"}],
+            "meanings": [{"mi_meaning": "설명", "examples": [{"ex_sentence": "ex", "ex_translation": "예문"}], "snyants": []}],
+        })
+        for i in range(3)
+    )
+
+    return {
+        "read_tree": _read_tree,
+        "copy_book": lambda: _call("POST", f"/books/{f.book_idx}/copy"),
+        "copy_partial": lambda: _call(
+            "POST", f"/books/{f.book_idx}/copy", json={"unit_idxs": [f.unit_idx], "vt_idxs": [f.vt_idx]},
+        ),
+        "copy_chunked": lambda: _call("POST", f"/books/{f.book_idx}/copy-chunked", params={"chunk_size": 20}),
+        "list_unit_vocas": _pages(f"/units/{f.unit_idx}/vocas"),
+        "list_book_vocas": _pages(f"/books/{f.book_idx}/vocas"),
+        "list_books": _pages("/books/", cate_lvl1_idx=f.category_idx),
+        "category_subtree": lambda: _call("GET", f"/categories/{f.category_idx}/subtree"),
+        "search_book": lambda: _call("GET", "/search", params={"q": "word1", "book_idx": f.book_idx}),
+        "search_category": lambda: _call("GET", "/search", params={"q": "derived", "category_idx": f.category_idx}),
+        "diff": lambda: _call("GET", f"/books/{f.book_idx}/diff/{f.other_book_idx}"),
+        "ingest": lambda: _call(
+            "POST", f"/units/{f.unit_idx}/vocas:bulk", content=ingest_body.encode(),
+            headers={"Content-Type": "application/x-ndjson"},
+        ),
+        "purge_dry_run": lambda: _call("DELETE", f"/books/{f.purge_book_idx}", params={"dry_run": "true"}),
+        "purge": lambda: _call("DELETE", f"/books/{f.purge_book_idx}", params={"batch_size": 20}),
+    }
+
+
+def collect(books: int = 4) -> List[Statement]:
+    """합성 교재를 만들고, 시나리오(엔드포인트 호출)마다 앱 엔진에서 실행된 문장을 모읍니다."""
+    from fastapi.testclient import TestClient
+
+    import main as app_main
+
+    fixture = _setup(max(books, 3))
+    client = TestClient(app_main.app)
+    statements: List[Statement] = []
+    for name, run in _scenarios(client, fixture).items():
+        with ExitStack() as stack:
+            counters = [stack.enter_context(database.count_queries(e)) for e in benchmark.app_engines()]
+            run()
+        for counter in counters:
+            for sql, parameters in zip(counter.statements, counter.parameters):
+                verb = sql.lstrip().split(None, 1)[0].upper()
+                # executemany(다중 행) 실행은 EXPLAIN 할 수 없으므로 제외
+                if verb in _EXPLAINED_VERBS and not isinstance(parameters, list):
+                    statements.append(Statement(name, sql, parameters))
+    return statements
+
+
+def _full_scans(conn, statement: Statement):
+    """(전체 스캔한 테이블 목록, 실행 계획 줄 목록)"""
+    if conn.dialect.name == "mysql":
+        rows = conn.exec_driver_sql("EXPLAIN " + statement.sql, statement.parameters).mappings().all()
+        plan = [f"{r['table']}: type={r['type']} key={r['key']} rows={r['rows']}" for r in rows]
+        return [r["table"] for r in rows if r["type"] == "ALL" and r["table"] in TABLES], plan
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement.sql, statement.parameters).all()
+    plan = [r[-1] for r in rows]
+    scans = [m.group(1) for m in (_SQLITE_SCAN.match(line) for line in plan) if m and m.group(1) in TABLES]
+    return scans, plan
+
+
+def check(engine, statements: List[Statement], verbose: bool = False) -> List[Finding]:
+    findings: List[Finding] = []
+    seen = set()
+    with engine.connect() as conn:
+        for statement in statements:
+            key = (statement.scenario, statement.sql)
+            if key in seen:
+                continue
+            seen.add(key)
+            tables, plan = _full_scans(conn, statement)
+            if verbose:
+                print(f"[{statement.scenario}] {' '.join(statement.sql.split())}")
+                for line in plan:
+                    print(f"    {line}")
+            findings += [Finding(statement, table, plan) for table in tables]
+    return findings
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="엔드포인트 실행 계획 확인 (앱 설정의 DB 사용)")
+    parser.add_argument("--books", type=int, default=4, help="만들 합성 교재 수 (최소 3)")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    engine = database.engine
+    migrations.upgrade(engine)
+    statements = collect(args.books)
+    findings = check(engine, statements, args.verbose)
+
+    print(f"{len(statements)} statements checked ({engine.dialect.name})")
+    for f in findings:
+        print(f"FULL SCAN on {f.table} [{f.statement.scenario}]: {' '.join(f.statement.sql.split())}")
+        for line in f.plan:
+            print(f"    {line}")
+    return 1 if findings else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+# idempotency.py
+"""
+중복 복사 요청 합치기 (Idempotency-Key / 진행 중인 같은 복사)
+
+복사가 느리면 클라이언트가 재시도하고, 재시도마다 전체 복사가 새로 실행되어 DB 부하와 "(개정)" 교재가 늘어납니다.
+- 같은 요청(fingerprint, 예: 원본 교재 + 선택 조건)이 진행 중이면 새로 실행하지 않고 그 작업의 결과를 기다립니다.
+- Idempotency-Key 가 있으면 성공한 결과를 IDEMPOTENCY_TTL 초 동안 보관하고, 같은 키의 재시도에 바로 돌려줍니다.
+  같은 키를 다른 요청에 쓰면 IdempotencyKeyConflictError. 실패한 결과는 보관하지 않습니다. (재시도 시 다시 실행)
+
+cache.py 와 마찬가지로 프로세스(uvicorn 워커) 단위입니다.
+"""
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+import cache
+
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "600"))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+# 진행 중인 작업에 합류한 요청이 결과를 기다리는 최대 시간(초)
+IDEMPOTENCY_WAIT_TIMEOUT = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", "300"))
+
+
+class IdempotencyKeyConflictError(Exception):
+    """같은 Idempotency-Key 가 다른 요청에 사용되었을 때"""
+
+
+class _Flight:
+    """진행 중인 작업 하나 (먼저 온 요청이 실행하고, 나머지는 event 를 기다림)"""
+
+    def __init__(self, fingerprint: Hashable):
+        self.fingerprint = fingerprint
+        self.keys: Set[str] = set()
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class Coalescer:
+    def __init__(self, ttl: float = IDEMPOTENCY_TTL, maxsize: int = IDEMPOTENCY_MAX_KEYS):
+        self._done = cache.TTLCache(maxsize, ttl)  # key -> (fingerprint, result)
+        self._flights: Dict[tuple, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def run(
+        self, fingerprint: Hashable, fn: Callable[[], Any], key: Optional[str] = None,
+        timeout: float = IDEMPOTENCY_WAIT_TIMEOUT,
+    ) -> Tuple[Any, bool]:
+        """
+        fn() 을 같은 fingerprint / key 에 대해 한 번만 실행합니다.
+        (결과, 다른 요청의 결과를 공유했는지) 를 반환합니다. 기다리다 timeout 이 지나면 TimeoutError
+        """
+        with self._lock:
+            flight = None
+            if key is not None:
+                done = self._done.get(("key", key))
+                if done is not None:
+                    if done[0] != fingerprint:
+                        raise IdempotencyKeyConflictError(key)
+                    return done[1], True
+                flight = self._flights.get(("key", key))
+                if flight is not None and flight.fingerprint != fingerprint:
+                    raise IdempotencyKeyConflictError(key)
+            if flight is None:
+                flight = self._flights.get(("op", fingerprint))
+            leader = flight is None
+            if leader:
+                flight = _Flight(fingerprint)
+                self._flights[("op", fingerprint)] = flight
+            if key is not None:
+                flight.keys.add(key)
+                self._flights[("key", key)] = flight
+
+        if not leader:
+            if not flight.event.wait(timeout):
+                raise TimeoutError("operation is still in progress")
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(("op", fingerprint), None)
+                for k in flight.keys:
+                    self._flights.pop(("key", k), None)
+                    if flight.error is None:
+                        self._done.set(("key", k), (fingerprint, flight.result))
+            flight.event.set()
+        return flight.result, False
+
+    def forget(self, key: str) -> None:
+        """보관 중인 key 의 결과를 버립니다. (예: 결과 교재가 삭제된 경우)"""
+        self._done.invalidate(("key", key))
+
+
+book_copies = Coalescer()
@@ -0,0 +1,209 @@
+# ingest.py
+"""
+단어 일괄 등록 (POST /units/{idx}/vocas:bulk)
+
+요청 본문은 NDJSON(한 줄에 단어 하나, 파생어/뜻/예문/유의어·반의어 중첩) 또는 JSON 배열입니다.
+NDJSON 은 본문을 스트리밍으로 읽으면서 INGEST_BATCH_SIZE 줄씩 미리 만든 TypeAdapter 로 한 번에 검증하고,
+배치마다 copier 와 같은 방식(테이블당 다중 행 INSERT + 새 idx 재조회)으로 씁니다.
+쓰기 전에 배치의 vt_idx 를 IN 조회 한 번으로 확인해, 없는 단어 유형은 FK 오류(500) 대신 줄 번호와 함께 IngestError 로 알립니다.
+배치 하나의 문장 수는 단어 수와 관계없이 9개이며, 전체는 하나의 트랜잭션입니다. (커밋은 호출자)
+"""
+import json
+import os
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+import models
+import schemas
+import serialization
+from copier import build_id_map, bulk_insert, new_ids_in_order
+from loader import dr_t, example_t, meaning_t, snyant_t, unit_t, voca_t
+
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "1000"))
+
+_batch_adapter = serialization.adapter(List[schemas.VocaIngest])
+vt_t = models.VocaType.__table__
+
+
+class IngestError(ValueError):
+    """입력 형식/검증 오류. line 은 NDJSON 줄 번호 또는 JSON 배열 위치(1부터)"""
+
+    def __init__(self, line: int, detail):
+        super().__init__(f"line {line}: {detail}")
+        self.line = line
+        self.detail = detail
+
+
+class Batch(NamedTuple):
+    """검증된 단어 배치와 각 단어의 줄 번호 (같은 순서)"""
+    lines: List[int]
+    vocas: List[schemas.VocaIngest]
+
+
+# =============================================
+#  본문 읽기 / 검증
+# =============================================
+def _validate(numbered: List[Tuple[int, bytes]]) -> Batch:
+    """(줄 번호, JSON 객체) 묶음을 한 번에 검증합니다."""
+    try:
+        vocas = _batch_adapter.validate_json(b"[" + b",".join(raw for _, raw in numbered) + b"]")
+        return Batch([line for line, _ in numbered], vocas)
+    except ValidationError as e:
+        error = e.errors(include_url=False)[0]
+        loc = error["loc"]
+        line = numbered[loc[0]][0] if loc and isinstance(loc[0], int) and loc[0] < len(numbered) else numbered[0][0]
+        if error["type"] == "json_invalid":
+            line = _first_invalid_line(numbered)
+        detail = [
+            {"loc": list(err["loc"][1:]), "msg": err["msg"], "type": err["type"]}
+            for err in e.errors(include_url=False)[:10]
+        ]
+        raise IngestError(line, detail)
+
+
+def _first_invalid_line(numbered: List[Tuple[int, bytes]]) -> int:
+    for line, raw in numbered:
+        try:
+            json.loads(raw)
+        except ValueError:
+            return line
+    return numbered[0][0]
+
+
+async def read_batches(
+    chunks: AsyncIterator[bytes], content_type: Optional[str] = None, batch_size: int = INGEST_BATCH_SIZE,
+) -> AsyncIterator[Batch]:
+    """요청 본문 조각을 검증된 단어 배치로 바꿔 내보냅니다."""
+    if content_type and content_type.split(";")[0].strip() == "application/json":
+        # JSON 배열은 전체를 받은 뒤 검증 (줄 번호 대신 배열 위치)
+        body = b"".join([chunk async for chunk in chunks])
+        try:
+            items = [json.dumps(item).encode() for item in json.loads(body or b"[]")]
+        except (ValueError, TypeError) as e:
+            raise IngestError(1, f"invalid JSON array: {e}")
+        for start in range(0, len(items), batch_size):
+            yield _validate([(start + i + 1, raw) for i, raw in enumerate(items[start:start + batch_size])])
+        return
+
+    pending: List[Tuple[int, bytes]] = []
+    buffer = b""
+    line_no = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for raw in lines:
+            line_no += 1
+            if raw.strip():
+                pending.append((line_no, raw))
+            if len(pending) >= batch_size:
+                yield _validate(pending)
+                pending = []
+    if buffer.strip():
+        pending.append((line_no + 1, buffer))
+    if pending:
+        yield _validate(pending)
+
+
+# =============================================
+#  쓰기
+# =============================================
+def unit_target(db: Session, unit_idx: int) -> Optional[Tuple[int, int]]:
+    """
+    (유닛의 교재 idx, 다음 vc_order). 유닛이 없으면 None
+    유닛 행을 SELECT ... FOR UPDATE 로 잠가, 트랜잭션이 끝날 때까지 같은 유닛에 대한 다른 일괄 등록을 기다리게 합니다.
+    insert_batch 는 "유닛 안에서 직전 최대 idx 보다 큰 단어 = 이번 배치" 로 새 idx 를 짝지으므로 이 잠금이 필요합니다.
+    (SQLite 는 FOR UPDATE 가 없지만 쓰기 트랜잭션이 DB 전체를 직렬화합니다)
+    """
+    book_idx = db.execute(select(unit_t.c.book_idx).where(unit_t.c.idx == unit_idx).with_for_update()).scalar()
+    if book_idx is None:
+        return None
+    last_order = db.execute(select(func.max(voca_t.c.vc_order)).where(voca_t.c.un_idx == unit_idx)).scalar()
+    return book_idx, (last_order or 0) + 1
+
+
+def check_voca_types(db: Session, vocas: List[schemas.VocaIngest], lines: Optional[List[int]] = None) -> None:
+    """배치의 vt_idx 가 모두 있는지 IN 조회 한 번으로 확인합니다. 없으면 첫 단어의 줄 번호로 IngestError"""
+    wanted = {v.vt_idx for v in vocas}
+    found = set(db.execute(select(vt_t.c.idx).where(vt_t.c.idx.in_(wanted))).scalars())
+    for n, v in enumerate(vocas):
+        if v.vt_idx not in found:
+            raise IngestError(lines[n] if lines else n + 1, [
+                {"loc": ["vt_idx"], "msg": f"Voca type {v.vt_idx} does not exist", "type": "foreign_key_violation"},
+            ])
+
+
+def insert_batch(
+    db: Session, unit_idx: int, book_idx: int, vocas: List[schemas.VocaIngest],
+    next_order: int, rows: Dict[str, int], lines: Optional[List[int]] = None,
+) -> int:
+    """
+    검증된 단어 배치를 테이블마다 한 번의 다중 행 INSERT 로 씁니다.
+    rows 에 테이블별 삽입 행 수를 더하고, 다음 배치의 기본 vc_order 를 반환합니다.
+    lines 는 vocas 각각의 줄 번호입니다. (참조 오류 보고용, 없으면 배치 안 위치)
+    """
+    if not vocas:
+        return next_order
+    check_voca_types(db, vocas, lines)
+    floor = db.execute(select(func.max(voca_t.c.idx)).where(voca_t.c.un_idx == unit_idx)).scalar() or 0
+    new_voca_scope = (voca_t.c.un_idx == unit_idx, voca_t.c.idx > floor)
+
+    # 1. 단어
+    voca_rows = []
+    for v in vocas:
+        if v.vc_order is None:
+            order, next_order = next_order, next_order + 1
+        else:
+            order, next_order = v.vc_order, max(next_order, v.vc_order + 1)
+        voca_rows.append({
+            "vc_word": v.vc_word, "vt_idx": v.vt_idx, "vc_type": v.vc_type, "vc_order": order,
+            "vc_root": v.vc_root, "vc_unikey": v.vc_unikey, "vc_mp3_link": v.vc_mp3_link,
+            "un_idx": unit_idx, "book_idx": book_idx, "created_by": v.created_by,
+        })
+    bulk_insert(db, voca_t, voca_rows)
+    voca_ids = build_id_map(range(len(vocas)), new_ids_in_order(db, voca_t, *new_voca_scope), voca_t.name)
+
+    # 2. 파생어
+    dr_rows = [
+        {"dr_word": d.dr_word, "dr_meaning": d.dr_meaning, "voca_idx": voca_ids[i], "created_by": v.created_by}
+        for i, v in enumerate(vocas) for d in v.derivatives
+    ]
+    bulk_insert(db, dr_t, dr_rows)
+
+    # 3. 뜻 - (단어 위치, 뜻) 을 삽입 순서대로 기억해 두었다가 새 idx 와 짝지음
+    meanings = [(i, m) for i, v in enumerate(vocas) for m in v.meanings]
+    meaning_rows = []
+    for i, v in enumerate(vocas):
+        for order, m in enumerate(v.meanings, start=1):
+            meaning_rows.append({
+                "mi_meaning": m.mi_meaning, "mi_engmeaning": m.mi_engmeaning,
+                "mi_order": m.mi_order if m.mi_order is not None else order,
+                "voca_idx": voca_ids[i], "created_by": v.created_by,
+            })
+    bulk_insert(db, meaning_t, meaning_rows)
+    meaning_ids = build_id_map(
+        range(len(meanings)),
+        new_ids_in_order(db, meaning_t, meaning_t.c.voca_idx.in_(select(voca_t.c.idx).where(*new_voca_scope))),
+        meaning_t.name,
+    )
+
+    # 4. 예문, 유의어/반의어
+    example_rows, snyant_rows = [], []
+    for n, (i, m) in enumerate(meanings):
+        parent = {"meaning_idx": meaning_ids[n], "voca_idx": voca_ids[i], "created_by": vocas[i].created_by}
+        example_rows += [{"ex_sentence": e.ex_sentence, "ex_translation": e.ex_translation, **parent} for e in m.examples]
+        snyant_rows += [
+            {"snyant_type": s.snyant_type, "snyant_word": s.snyant_word, "snyant_meaning": s.snyant_meaning, **parent}
+            for s in m.snyants
+        ]
+    bulk_insert(db, example_t, example_rows)
+    bulk_insert(db, snyant_t, snyant_rows)
+
+    for phase, written in (
+        ("vocas", voca_rows), ("derivatives", dr_rows), ("meanings", meaning_rows),
+        ("examples", example_rows), ("snyants", snyant_rows),
+    ):
+        rows[phase] = rows.get(phase, 0) + len(written)
+    return next_order
@@ -0,0 +1,195 @@
+# jobs.py
+"""
+비동기 교재 복사 작업(Job)
+
+HTTP 요청이 복사가 끝날 때까지 커넥션과 스레드를 붙잡지 않도록,
+복사를 전용 워커 풀에서 실행하고 job id 로 진행 상황을 조회합니다.
+워커 수(COPY_WORKERS, 커넥션 풀 용량 이하)와 대기열 길이(COPY_QUEUE_LIMIT)는 일반 API 트래픽과 별도로 제한됩니다.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import cache
+import copier
+import database
+import loader
+import metrics
+from progress import CopyObserver, ObserverGroup
+
+logger = logging.getLogger(__name__)
+
+COPY_WORKERS = int(os.getenv("COPY_WORKERS", "2"))
+COPY_QUEUE_LIMIT = int(os.getenv("COPY_QUEUE_LIMIT", "20"))
+# 조회를 위해 보관하는 완료된 작업 수 (오래된 것부터 삭제)
+COPY_JOB_HISTORY = int(os.getenv("COPY_JOB_HISTORY", "1000"))
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """대기 중인 복사 작업이 COPY_QUEUE_LIMIT 를 넘었을 때"""
+
+
+@dataclass
+class CopyJob(CopyObserver):
+    id: str
+    source_book_idx: int
+    state: str = PENDING
+    rows: Dict[str, int] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    new_book_idx: Optional[int] = None
+    error: Optional[str] = None
+    # 일괄 복사(batch.CopyBatch)에 속한 작업이면 그 id. 이 작업들은 일괄 복사의 워커가 실행합니다.
+    batch_id: Optional[str] = None
+    # 진행 이벤트를 함께 전달받을 관찰자 (예: 스트리밍 응답)
+    listener: Optional[CopyObserver] = field(default=None, repr=False)
+    # 워커 스레드의 갱신과 조회(snapshot)가 같은 상태를 보도록 보호
+    _state_lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def mark_running(self) -> None:
+        with self._state_lock:
+            self.state = RUNNING
+            self.started_at = time.time()
+
+    def on_start(self, rows_total: int) -> None:
+        if self.listener is not None:
+            self.listener.on_start(rows_total)
+
+    def on_phase(self, phase: str, rows: int) -> None:
+        with self._state_lock:
+            self.rows[phase] = self.rows.get(phase, 0) + rows
+        if self.listener is not None:
+            self.listener.on_phase(phase, rows)
+
+    def on_finish(self, new_book_idx: int) -> None:
+        with self._state_lock:
+            self.new_book_idx = new_book_idx
+            self.state = SUCCEEDED
+            self.finished_at = time.time()
+        if self.listener is not None:
+            self.listener.on_finish(new_book_idx)
+
+    def on_error(self, error: str) -> None:
+        with self._state_lock:
+            self.error = error
+            self.state = FAILED
+            self.finished_at = time.time()
+        if self.listener is not None:
+            self.listener.on_error(error)
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def snapshot(self) -> dict:
+        with self._state_lock:
+            return {
+                "id": self.id,
+                "source_book_idx": self.source_book_idx,
+                "state": self.state,
+                "rows": dict(self.rows),
+                "elapsed": round(self.elapsed, 3),
+                "new_book_idx": self.new_book_idx,
+                "error": self.error,
+                "batch_id": self.batch_id,
+            }
+
+
+def pool_capacity(engine=None) -> int:
+    """엔진 커넥션 풀에서 동시에 꺼낼 수 있는 최대 커넥션 수 (pool_size + DB_MAX_OVERFLOW)"""
+    pool = (engine if engine is not None else database.engine).pool
+    if not hasattr(pool, "size"):
+        return 1
+    return max(1, pool.size() + database.DB_MAX_OVERFLOW)
+
+
+_executor = ThreadPoolExecutor(max_workers=max(1, min(COPY_WORKERS, pool_capacity())), thread_name_prefix="copy-job")
+_jobs: "OrderedDict[str, CopyJob]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def run_copy(job: CopyJob) -> None:
+    """작업 하나를 현재 스레드에서 실행합니다 (자체 DB 세션 사용)."""
+    job.mark_running()
+    db = database.SessionLocal()
+    try:
+        # 원본 트리는 읽기 복제본에서 읽고 (없으면 복제 지연일 수 있으므로 primary 에서 다시), 쓰기는 primary
+        with database.read_session() as read_db:
+            tree = loader.load_book_tree(read_db, job.source_book_idx)
+        if tree is None and database.replica_engines:
+            tree = loader.load_book_tree(db, job.source_book_idx)
+        if tree is None:
+            raise LookupError("Original book not found")
+        new_book_idx = copier.copy_book(db, tree, observer=ObserverGroup(job, metrics.CopyPhaseTimer()))
+        db.commit()
+        cache.invalidate_book(new_book_idx)
+        job.on_finish(new_book_idx)
+    except LookupError as e:
+        # 원본 교재가 없음 - 예상된 실패이므로 traceback 없이 작업 오류로만 기록
+        db.rollback()
+        job.on_error(str(e))
+    except Exception as e:
+        db.rollback()
+        logger.exception("copy job %s failed (book %s)", job.id, job.source_book_idx)
+        job.on_error(str(e))
+    finally:
+        db.close()
+
+
+def _trim_history() -> None:
+    """완료된 작업이 COPY_JOB_HISTORY 를 넘으면 오래된 것부터 삭제 (_lock 보유 상태에서 호출)"""
+    finished = [j for j in _jobs.values() if j.state in (SUCCEEDED, FAILED)]
+    for job in finished[:max(0, len(finished) - COPY_JOB_HISTORY)]:
+        del _jobs[job.id]
+
+
+def submit_copy(source_book_idx: int, listener: Optional[CopyObserver] = None) -> CopyJob:
+    """복사 작업을 워커 풀에 등록하고 즉시 반환합니다."""
+    return submit_copies([source_book_idx], listener)[0]
+
+
+def submit_copies(source_book_idxs: List[int], listener: Optional[CopyObserver] = None) -> List[CopyJob]:
+    """
+    여러 복사 작업을 한 번에 등록합니다.
+    대기열(COPY_QUEUE_LIMIT)에 모두 들어갈 자리가 없으면 하나도 등록하지 않고 QueueFullError
+    """
+    with _lock:
+        pending = sum(1 for j in _jobs.values() if j.state == PENDING and j.batch_id is None)
+        if pending + len(source_book_idxs) > COPY_QUEUE_LIMIT:
+            raise QueueFullError(f"{pending} copy jobs are already queued (limit {COPY_QUEUE_LIMIT})")
+        _trim_history()
+        new_jobs = [
+            CopyJob(id=uuid.uuid4().hex, source_book_idx=book_idx, listener=listener) for book_idx in source_book_idxs
+        ]
+        for job in new_jobs:
+            _jobs[job.id] = job
+    for job in new_jobs:
+        _executor.submit(run_copy, job)
+    return new_jobs
+
+
+def register(new_jobs: List[CopyJob]) -> None:
+    """다른 곳(일괄 복사)에서 실행할 작업을 조회용으로만 등록합니다. (대기열 제한에 포함되지 않음)"""
+    with _lock:
+        _trim_history()
+        for job in new_jobs:
+            _jobs[job.id] = job
+
+
+def get_job(job_id: str) -> Optional[CopyJob]:
+    with _lock:
+        return _jobs.get(job_id)
@@ -0,0 +1,203 @@
+# loader.py
+"""
+교재 트리(Book → Chapter/Unit → Voca → Meaning → Example/Snyant) 로더
+
+lazy relationship 을 따라가며 단어마다 SELECT 가 추가로 나가는(N+1) 대신,
+계층(level)마다 부모 범위를 `IN (SELECT ...)` 로 묶어 한 번씩만 조회합니다.
+교재 크기와 관계없이 쿼리 수는 TREE_QUERY_COUNT 로 고정됩니다.
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+import models
+
+book_t = models.Book.__table__
+chapter_t = models.Chapter.__table__
+unit_t = models.Unit.__table__
+mapping_t = models.ChapterUnitMapping.__table__
+voca_t = models.Voca.__table__
+dr_t = models.VocaDr.__table__
+meaning_t = models.VocaMeaning.__table__
+example_t = models.MeaningExample.__table__
+snyant_t = models.MeaningSnyant.__table__
+hash_t = models.VocaHash.__table__
+
+# load_book_tree 가 실행하는 SELECT 수 (교재 1 + 하위 테이블 8)
+TREE_QUERY_COUNT = 9
+
+
+@dataclass
+class TreeFilter:
+    """
+    교재 일부만 읽기 위한 조건. None 인 항목은 거르지 않습니다.
+    - **chapter_idxs**: 선택한 챕터와 그 챕터에 매핑된 유닛
+    - **unit_idxs**: 선택한 유닛과 그 유닛이 매핑된 챕터 (chapter_idxs 와 함께 주면 합집합)
+    - **vt_idxs**: 선택한 유닛 안에서도 이 단어 유형(vt_idx)의 단어만
+    """
+    chapter_idxs: Optional[List[int]] = None
+    unit_idxs: Optional[List[int]] = None
+    vt_idxs: Optional[List[int]] = None
+
+    @property
+    def selects_structure(self) -> bool:
+        return self.chapter_idxs is not None or self.unit_idxs is not None
+
+
+@dataclass
+class BookTree:
+    """계층별 행(Row) 목록. 각 목록은 idx 오름차순입니다."""
+    book: Any
+    chapters: List[Any] = field(default_factory=list)
+    units: List[Any] = field(default_factory=list)
+    mappings: List[Any] = field(default_factory=list)
+    vocas: List[Any] = field(default_factory=list)
+    derivatives: List[Any] = field(default_factory=list)
+    meanings: List[Any] = field(default_factory=list)
+    examples: List[Any] = field(default_factory=list)
+    snyants: List[Any] = field(default_factory=list)
+
+
+def _rows(db: Session, table, *where) -> List[Any]:
+    return db.execute(select(table).where(*where).order_by(table.c.idx)).all()
+
+
+def _structure_where(book_idx: int, selection: Optional[TreeFilter]):
+    """선택 조건을 챕터/유닛 WHERE 절로 바꿉니다. 매핑 테이블은 서브쿼리로만 참조합니다."""
+    chapter_where = [chapter_t.c.book_idx == book_idx]
+    unit_where = [unit_t.c.book_idx == book_idx]
+    if selection is None or not selection.selects_structure:
+        return chapter_where, unit_where
+
+    chapter_idxs = selection.chapter_idxs or []
+    unit_idxs = selection.unit_idxs or []
+    # 유닛: 직접 선택한 유닛 + 선택한 챕터에 매핑된 유닛
+    unit_where.append(or_(
+        unit_t.c.idx.in_(unit_idxs),
+        unit_t.c.idx.in_(select(mapping_t.c.un_idx).where(mapping_t.c.ch_idx.in_(chapter_idxs))),
+    ))
+    # 챕터: 직접 선택한 챕터 + 선택한 유닛이 매핑된 챕터
+    chapter_where.append(or_(
+        chapter_t.c.idx.in_(chapter_idxs),
+        chapter_t.c.idx.in_(select(mapping_t.c.ch_idx).where(mapping_t.c.un_idx.in_(unit_idxs))),
+    ))
+    return chapter_where, unit_where
+
+
+def load_book_structure(db: Session, book_idx: int, selection: Optional[TreeFilter] = None) -> Optional[BookTree]:
+    """교재와 챕터/유닛/매핑만 읽어옵니다(단어 이하 제외). 교재가 없으면 None"""
+    book = db.execute(select(book_t).where(book_t.c.idx == book_idx)).first()
+    if book is None:
+        return None
+    chapter_where, unit_where = _structure_where(book_idx, selection)
+    chapter_scope = select(chapter_t.c.idx).where(*chapter_where)
+    mapping_where = [mapping_t.c.ch_idx.in_(chapter_scope)]
+    if selection is not None and selection.selects_structure:
+        mapping_where.append(mapping_t.c.un_idx.in_(select(unit_t.c.idx).where(*unit_where)))
+    return BookTree(
+        book=book,
+        chapters=_rows(db, chapter_t, *chapter_where),
+        units=_rows(db, unit_t, *unit_where),
+        mappings=_rows(db, mapping_t, *mapping_where),
+    )
+
+
+def _load_voca_levels(db: Session, tree: BookTree, *voca_where) -> BookTree:
+    """voca_where 조건에 맞는 단어와 그 하위 계층을 tree 에 채웁니다."""
+    voca_scope = select(voca_t.c.idx).where(*voca_where)
+    meaning_scope = select(meaning_t.c.idx).where(meaning_t.c.voca_idx.in_(voca_scope))
+
+    tree.vocas = _rows(db, voca_t, *voca_where)
+    tree.derivatives = _rows(db, dr_t, dr_t.c.voca_idx.in_(voca_scope))
+    tree.meanings = _rows(db, meaning_t, meaning_t.c.voca_idx.in_(voca_scope))
+    tree.examples = _rows(db, example_t, example_t.c.meaning_idx.in_(meaning_scope))
+    tree.snyants = _rows(db, snyant_t, snyant_t.c.meaning_idx.in_(meaning_scope))
+    return tree
+
+
+def load_book_tree(db: Session, book_idx: int, selection: Optional[TreeFilter] = None) -> Optional[BookTree]:
+    """
+    교재 트리를 고정된 수의 쿼리로 읽어옵니다. 교재가 없으면 None
+    - **selection**: 주어지면 선택한 챕터/유닛/단어 유형에 해당하는 부분만 읽습니다.
+      (조건은 모두 SQL 로 걸리므로 읽는 양은 선택한 부분에 비례합니다.)
+    """
+    tree = load_book_structure(db, book_idx, selection)
+    if tree is None:
+        return None
+    voca_where = [voca_t.c.book_idx == book_idx]
+    if selection is not None and selection.selects_structure:
+        _, unit_where = _structure_where(book_idx, selection)
+        voca_where.append(voca_t.c.un_idx.in_(select(unit_t.c.idx).where(*unit_where)))
+    if selection is not None and selection.vt_idxs is not None:
+        voca_where.append(voca_t.c.vt_idx.in_(selection.vt_idxs))
+    return _load_voca_levels(db, tree, *voca_where)
+
+
+def load_voca_subtrees(db: Session, *voca_where) -> BookTree:
+    """voca_where 조건에 맞는 단어와 하위 계층만 읽어옵니다. (book/chapters/units/mappings 는 비어 있음)"""
+    return _load_voca_levels(db, BookTree(book=None), *voca_where)
+
+
+def load_voca_chunk(db: Session, book_idx: int, after_idx: int, limit: int) -> BookTree:
+    """
+    idx 가 after_idx 보다 큰 단어를 limit 개까지, 하위 계층과 함께 읽어옵니다.
+    (book/chapters/units/mappings 는 비어 있습니다. 쿼리 수: 1 + 5)
+    """
+    last_idx = db.execute(
+        select(voca_t.c.idx)
+        .where(voca_t.c.book_idx == book_idx, voca_t.c.idx > after_idx)
+        .order_by(voca_t.c.idx)
+        .offset(limit - 1)
+        .limit(1)
+    ).scalar()
+    voca_where = [voca_t.c.book_idx == book_idx, voca_t.c.idx > after_idx]
+    if last_idx is not None:
+        voca_where.append(voca_t.c.idx <= last_idx)
+    return load_voca_subtrees(db, *voca_where)
+
+
+def _group(rows: List[Any], key: str) -> Dict[int, List[dict]]:
+    groups: Dict[int, List[dict]] = defaultdict(list)
+    for row in rows:
+        groups[getattr(row, key)].append(dict(row._mapping))
+    return groups
+
+
+def nest_book_tree(tree: BookTree) -> dict:
+    """
+    계층별 행 목록을 Book → chapters(unit_idxs) / units → vocas → meanings 형태로 중첩합니다.
+    유닛은 여러 챕터에 매핑될 수 있으므로 챕터 아래에는 유닛 idx 목록만 둡니다.
+    """
+    examples = _group(tree.examples, "meaning_idx")
+    snyants = _group(tree.snyants, "meaning_idx")
+    meanings = _group(tree.meanings, "voca_idx")
+    derivatives = _group(tree.derivatives, "voca_idx")
+    vocas = _group(tree.vocas, "un_idx")
+    unit_idxs = defaultdict(list)
+    for m in tree.mappings:
+        unit_idxs[m.ch_idx].append(m.un_idx)
+
+    for meaning_list in meanings.values():
+        meaning_list.sort(key=lambda m: (m["mi_order"], m["idx"]))
+        for m in meaning_list:
+            m["examples"] = examples.get(m["idx"], [])
+            m["snyants"] = snyants.get(m["idx"], [])
+    for voca_list in vocas.values():
+        voca_list.sort(key=lambda v: (v["vc_order"], v["idx"]))
+        for v in voca_list:
+            v["derivatives"] = derivatives.get(v["idx"], [])
+            v["meanings"] = meanings.get(v["idx"], [])
+
+    book = dict(tree.book._mapping)
+    book["chapters"] = [
+        {**ch._mapping, "unit_idxs": unit_idxs.get(ch.idx, [])}
+        for ch in sorted(tree.chapters, key=lambda ch: (ch.ch_order, ch.idx))
+    ]
+    book["units"] = [
+        {**un._mapping, "vocas": vocas.get(un.idx, [])}
+        for un in sorted(tree.units, key=lambda un: (un.un_order, un.idx))
+    ]
+    return book
@@ -1,21 +1,80 @@
-from fastapi import FastAPI, Depends, HTTPException
+import asyncio
+import functools
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import BackgroundTasks, FastAPI, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import uuid # Import the uuid module
 
 # from . import models, schemas, database
 import models
 import schemas
 import database
+import copier
+import loader
+import jobs
+import progress
+import chunked
+import batch
+import metrics
+import cache
+import categories
+import pagination
+import bookdiff
+import vocahash
+import search
+import serialization
+import ingest
+import purge
+import idempotency
+import admission
+import snapshot
+
+logger = logging.getLogger(__name__)
 
-# 데이터베이스 테이블 생성
-models.Base.metadata.create_all(bind=database.engine)
+# 테이블 생성/변경은 배포 시 `python migrations.py` 로 한 번만 실행합니다. (워커 시작 시 실행하지 않음)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 커넥션 풀 예열 - DB 가 느리거나 닿지 않아도 워커는 뜨고, 첫 요청에서 다시 연결을 시도합니다.
+    try:
+        await asyncio.gather(
+            *(asyncio.to_thread(database.prewarm, e) for e in [database.engine, *database.replica_engines]),
+            *(database.prewarm_async(e) for e in [database.async_engine, *database.async_replica_engines]),
+        )
+    except Exception as e:
+        logger.warning("connection pool prewarm failed: %s", e)
+    yield
+    for async_engine in [database.async_engine, *database.async_replica_engines]:
+        await async_engine.dispose()
+    for sync_engine in [database.engine, *database.replica_engines]:
+        sync_engine.dispose()
 
 app = FastAPI(
     title="계층 구조 레코드 복사 API",
-    description="FastAPI와 MySQL을 이용한 RESTful API 서버"
+    description="FastAPI와 MySQL을 이용한 RESTful API 서버",
+    lifespan=lifespan,
+    default_response_class=serialization.FastJSONResponse,
 )
 
+# 요청별 SQL 계측 (문장 수, DB 시간, 행 수) 및 /metrics
+metrics.instrument_engine(database.engine, "sync")
+metrics.instrument_engine(database.async_engine, "async")
+for i, replica in enumerate(database.replica_engines):
+    metrics.instrument_engine(replica, f"replica{i}")
+for i, replica in enumerate(database.async_replica_engines):
+    metrics.instrument_engine(replica, f"async_replica{i}")
+app.middleware("http")(metrics.metrics_middleware)
+
+# --- 모니터링 엔드포인트 ---
+@app.get("/metrics", response_class=PlainTextResponse, summary="Prometheus 지표")
+async def read_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # --- Hello World 엔드포인트 ---
 @app.get("/hello", summary="Hello World")
 async def read_hello():
@@ -31,14 +90,19 @@ def create_category(category: schemas.CategoryCreate, db: Session = Depends(data
     db.refresh(db_category)
     return db_category
 
-@app.get("/categories/", response_model=List[schemas.Category], summary="모든 카테고리 조회")
-def read_categories(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db)):
-    categories = db.query(models.Category).offset(skip).limit(limit).all()
-    return categories
+@app.get("/categories/", response_model=schemas.Page[schemas.Category], summary="모든 카테고리 조회", dependencies=[admission.LIGHT])
+async def read_categories(
+    cursor: Optional[str] = None,
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(database.get_async_read_db),
+):
+    """idx 순 키셋 페이지네이션. 다음 페이지는 응답의 `next_cursor` 를 `cursor` 로 넘깁니다."""
+    stmt = serialization.schema_select(schemas.Category, models.Category.__table__)
+    return await _fetch_page(db, stmt, [models.Category.idx], cursor, limit)
 
-@app.get("/categories/{category_id}", response_model=schemas.Category, summary="특정 카테고리 조회")
-def read_category(category_id: int, db: Session = Depends(database.get_db)):
-    db_category = db.query(models.Category).filter(models.Category.id == category_id).first()
+@app.get("/categories/{category_id}", response_model=schemas.Category, summary="특정 카테고리 조회", dependencies=[admission.LIGHT])
+async def read_category(category_id: int, db: AsyncSession = Depends(database.get_async_read_db)):
+    db_category = await db.get(models.Category, category_id)
     if db_category is None:
         raise HTTPException(status_code=404, detail="Category not found")
     return db_category
@@ -51,20 +115,22 @@ def copy_category(source_category_id: int, db: Session = Depends(database.get_db
     """
     지정된 ID의 카테고리 레코드를 복사하여 새로운 레코드를 생성합니다.
     - **source_category_id**: 복사할 원본 카테고리의 ID
-    - 복사된 카테고리는 원본과 동일한 `parent_id`를 가집니다.
+    - 복사된 카테고리는 원본과 동일한 `cate_pidx`(부모)를 가집니다.
     - 이름은 "Copy of [원본 이름]" 형식으로 생성됩니다.
+    - 하위 카테고리까지 복사하려면 `POST /categories/{idx}/copy-subtree` 를 사용합니다.
     """
     # 1. 원본 레코드 조회
-    original_category = db.query(models.Category).filter(models.Category.id == source_category_id).first()
+    original_category = db.query(models.Category).filter(models.Category.idx == source_category_id).first()
     
     if not original_category:
         raise HTTPException(status_code=404, detail="Source category not found")
 
     # 2. 복사할 새로운 데이터 생성
     new_category_data = {
-        "name": f"Copy of {original_category.name}",
-        "description": original_category.description,
-        "parent_id": original_category.parent_id  # 원본과 동일한 부모를 가짐
+        "cate_name": f"Copy of {original_category.cate_name}",
+        "cate_lvl": original_category.cate_lvl,
+        "cate_pidx": original_category.cate_pidx,  # 원본과 동일한 부모를 가짐
+        "created_by": original_category.created_by,
     }
 
     # 3. 새로운 레코드 객체 생성 및 DB에 추가
@@ -75,123 +141,534 @@ def copy_category(source_category_id: int, db: Session = Depends(database.get_db
 
     return copied_category
 
+@app.get("/categories/{category_id}/subtree", response_model=List[schemas.CategoryNode], summary="카테고리 하위 트리 조회", dependencies=[admission.LIGHT])
+async def read_category_subtree(category_id: int, db: AsyncSession = Depends(database.get_async_read_db)):
+    """
+    카테고리와 모든 하위 카테고리를 재귀 CTE 한 번으로 조회합니다.
+    루트의 `depth` 는 0 이며, (depth, idx) 순으로 정렬됩니다.
+    """
+    rows = (await db.execute(categories.subtree_select(category_id))).all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="Category not found")
+    return [row._mapping for row in rows]
+
+@app.post("/categories/{source_category_id}/copy-subtree", response_model=schemas.CategorySubtreeCopy, summary="카테고리 하위 트리 복사", dependencies=[admission.HEAVY])
+def copy_category_subtree(
+    source_category_id: int,
+    include_books: bool = False,
+    db: Session = Depends(database.get_db),
+):
+    """
+    카테고리와 모든 하위 카테고리를 깊이별 일괄 INSERT 로 복사합니다.
+    - 루트 복사본은 원본과 같은 부모를 가지며 이름은 "Copy of [원본 이름]" 입니다.
+    - **include_books**: 하위 트리에 연결된(cate_lvl1_idx/cate_lvl2_idx) 교재도 새 카테고리로 연결해 복사
+    """
+    try:
+        result = categories.copy_subtree(db, source_category_id, include_books)
+        if result is None:
+            raise HTTPException(status_code=404, detail="Source category not found")
+        db.commit()
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.exception("category subtree copy failed (category %s)", source_category_id)
+        raise HTTPException(status_code=500, detail=f"An internal error occurred: {e}")
+
+    category_map, book_map = result
+    return {
+        "root_idx": category_map[source_category_id],
+        "category_map": category_map,
+        "book_map": book_map,
+    }
+
+
+# =============================================
+#  목록 조회 API (키셋 페이지네이션)
+# =============================================
+async def _fetch_page(db: AsyncSession, stmt, columns, cursor: Optional[str], limit: int) -> Response:
+    # 행은 스키마 모양의 컬럼으로 읽으므로 response_model 검증 없이 바로 인코딩
+    try:
+        return serialization.json_response(await pagination.fetch_page(db, stmt, columns, cursor, limit))
+    except pagination.InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@app.get("/books/", response_model=schemas.Page[schemas.Book], summary="교재 목록 조회", dependencies=[admission.LIGHT])
+async def read_books(
+    cate_lvl1_idx: Optional[int] = None,
+    cate_lvl2_idx: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(database.get_async_read_db),
+):
+    """idx 순 키셋 페이지네이션. 카테고리(cate_lvl1_idx/cate_lvl2_idx)로 거를 수 있습니다."""
+    stmt = serialization.schema_select(schemas.Book, loader.book_t)
+    if cate_lvl1_idx is not None:
+        stmt = stmt.where(loader.book_t.c.cate_lvl1_idx == cate_lvl1_idx)
+    if cate_lvl2_idx is not None:
+        stmt = stmt.where(loader.book_t.c.cate_lvl2_idx == cate_lvl2_idx)
+    return await _fetch_page(db, stmt, [models.Book.idx], cursor, limit)
+
+@app.get("/books/{book_id}/vocas", response_model=schemas.Page[schemas.Voca], summary="교재의 단어 목록 조회", dependencies=[admission.LIGHT])
+async def read_book_vocas(
+    book_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(database.get_async_read_db),
+):
+    """교재의 모든 단어를 idx 순으로 페이지 단위 조회합니다."""
+    stmt = serialization.schema_select(schemas.Voca, loader.voca_t).where(loader.voca_t.c.book_idx == book_id)
+    return await _fetch_page(db, stmt, [loader.voca_t.c.idx], cursor, limit)
+
+@app.get("/books/{book_id}/vocas/stream", response_model=List[schemas.Voca], summary="교재의 단어 전체 스트리밍", dependencies=[admission.HEAVY])
+async def stream_book_vocas(book_id: int, db: AsyncSession = Depends(database.get_async_read_db)):
+    """
+    교재의 모든 단어를 idx 순 JSON 배열 하나로 스트리밍합니다.
+    서버 측 커서로 나눠 읽으므로 단어 수가 많아도 서버 메모리 사용량이 늘지 않습니다.
+    """
+    if await db.get(models.Book, book_id) is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    stmt = (
+        serialization.schema_select(schemas.Voca, loader.voca_t)
+        .where(loader.voca_t.c.book_idx == book_id)
+        .order_by(loader.voca_t.c.idx)
+    )
+    # 응답을 스트리밍하는 세션도 요청 세션과 같은 엔진(복제본/primary)에서 엽니다.
+    return serialization.stream_json_array(functools.partial(database.AsyncSessionLocal, bind=db.bind), stmt)
+
+@app.get("/units/{unit_id}/vocas", response_model=schemas.Page[schemas.Voca], summary="유닛의 단어 목록 조회", dependencies=[admission.LIGHT])
+async def read_unit_vocas(
+    unit_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(database.get_async_read_db),
+):
+    """유닛의 단어를 (vc_order, idx) 순으로 페이지 단위 조회합니다."""
+    stmt = serialization.schema_select(schemas.Voca, loader.voca_t).where(loader.voca_t.c.un_idx == unit_id)
+    return await _fetch_page(db, stmt, [loader.voca_t.c.vc_order, loader.voca_t.c.idx], cursor, limit)
+
+@app.post("/units/{unit_id}/vocas:bulk", response_model=schemas.BulkIngestResult, summary="유닛에 단어 일괄 등록", dependencies=[admission.HEAVY])
+async def bulk_ingest_vocas(unit_id: int, request: Request, db: AsyncSession = Depends(database.get_async_db)):
+    """
+    파생어/뜻/예문/유의어·반의어가 중첩된 단어 여러 개를 한 요청으로 등록합니다.
+    - 본문: NDJSON (`application/x-ndjson`, 한 줄에 `VocaIngest` 하나) 또는 JSON 배열 (`application/json`)
+    - NDJSON 은 스트리밍으로 읽으며 `INGEST_BATCH_SIZE` 줄씩 검증하고, 테이블마다 다중 행 INSERT 로 씁니다.
+    - 전체가 하나의 트랜잭션입니다. 검증에 실패하거나 없는 `vt_idx` 를 가리키면 아무것도 저장하지 않고
+      422 (줄 번호 포함)를 반환합니다.
+    - `vc_order` / `mi_order` 를 생략하면 유닛의 마지막 순서 뒤 / 뜻의 입력 순서로 채웁니다.
+    """
+    # 1. 대상 유닛 확인
+    target = await db.run_sync(lambda session: ingest.unit_target(session, unit_id))
+    if target is None:
+        raise HTTPException(status_code=404, detail="Unit not found")
+    book_idx, next_order = target
+
+    started = time.perf_counter()
+    rows = {}
+    try:
+        # 2. 배치마다 검증 → 테이블 단위 INSERT
+        async for voca_batch in ingest.read_batches(request.stream(), request.headers.get("content-type")):
+            next_order = await db.run_sync(functools.partial(
+                ingest.insert_batch, unit_idx=unit_id, book_idx=book_idx, vocas=voca_batch.vocas,
+                next_order=next_order, rows=rows, lines=voca_batch.lines,
+            ))
+        # 3. 모든 배치를 한 번에 커밋
+        await db.commit()
+    except ingest.IngestError as e:
+        await db.rollback()
+        raise HTTPException(status_code=422, detail={"line": e.line, "errors": e.detail})
+    except Exception as e:
+        await db.rollback()
+        logger.exception("bulk ingest failed (unit %s)", unit_id)
+        raise HTTPException(status_code=500, detail=f"An internal error occurred: {e}")
+    # 새 단어의 내용 해시는 다음 비교 때 채워지고, 검색 색인은 무효화 알림으로 다시 만들어짐
+    cache.invalidate_book(book_idx)
+
+    return schemas.BulkIngestResult(
+        unit_idx=unit_id, book_idx=book_idx, vocas=rows.get("vocas", 0), rows=rows,
+        elapsed=round(time.perf_counter() - started, 3),
+    )
+
+
+@app.get("/search", response_model=schemas.SearchResult, summary="단어/파생어/뜻 검색", dependencies=[admission.LIGHT])
+def search_vocas(
+    q: str = Query(..., min_length=1, max_length=100),
+    mode: str = Query("substring", pattern="^(prefix|substring)$"),
+    book_idx: Optional[int] = None,
+    category_idx: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    db: Session = Depends(database.get_read_db),
+):
+    """
+    단어(vc_word), 파생어(dr_word), 뜻(mi_meaning, mi_engmeaning)을 접두어 또는 부분 문자열로 검색합니다.
+    - 범위: `book_idx` 또는 `category_idx`(하위 카테고리 포함) 중 하나는 필수
+    - 정렬: 정확히 일치 → 접두어 → 부분 문자열, 단어 > 파생어 > 뜻, 짧은 문자열 순
+    """
+    if (book_idx is None) == (category_idx is None):
+        raise HTTPException(status_code=422, detail="Specify exactly one of book_idx or category_idx")
+    try:
+        return serialization.json_response(search.search(db, q, mode, book_idx, category_idx, cursor, limit))
+    except pagination.InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# =============================================
+#  교재 트리 조회 API
+# =============================================
+@app.get("/books/{book_id}/tree", response_model=schemas.BookTree, summary="교재 전체 트리 조회", dependencies=[admission.LIGHT])
+async def read_book_tree(
+    book_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(database.get_async_read_db),
+):
+    """
+    교재와 챕터(매핑된 유닛 idx), 유닛 → 단어 → 파생어/뜻 → 예문/유의어를 한 번에 중첩해 반환합니다.
+    - 응답은 교재 idx 기준으로 프로세스 내 LRU/TTL 캐시에 저장됩니다.
+    - `If-None-Match` 가 캐시된 `ETag` 와 같으면 DB 조회 없이 304 를 반환합니다.
+    """
+    cached = cache.book_tree_cache.get(book_id)
+    if cached is None:
+        tree = await db.run_sync(lambda session: loader.load_book_tree(session, book_id))
+        if tree is None:
+            raise HTTPException(status_code=404, detail="Book not found")
+        # nest_book_tree 의 행은 스키마와 같은 컬럼이므로 검증 없이 바로 인코딩
+        body = serialization.dumps(loader.nest_book_tree(tree))
+        cached = cache.CachedBody(body=body, etag=cache.make_etag(body))
+        cache.book_tree_cache.set(book_id, cached)
+
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if cache.etag_matches(if_none_match, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
 
 # =============================================
 #  교재 및 모든 하위 데이터 복사 API
 # =============================================
-@app.post("/books/{source_book_id}/copy", response_model=schemas.Book, summary="교재 및 모든 하위 데이터 복사")
-def copy_book_and_dependents(source_book_id: int, db: Session = Depends(database.get_db)):
+@app.post("/books/{source_book_id}/copy", response_model=schemas.Book, summary="교재 및 모든 하위 데이터 복사", dependencies=[admission.HEAVY])
+def copy_book_and_dependents(
+    source_book_id: int,
+    response: Response,
+    selection: Optional[schemas.CopyFilter] = None,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    db: Session = Depends(database.get_db),
+    read_db: Session = Depends(database.get_read_db),
+):
     """
     지정한 교재(Book)와 그에 속한 모든 하위 데이터(챕터, 유닛, 단어 등)를 
     새로운 레코드로 복사합니다.
     - **source_book_id**: 복사할 원본 교재의 ID
+    - **selection** (본문, 선택): `chapter_idxs` / `unit_idxs` / `vt_idxs` 를 주면 해당 부분만 읽고 복사합니다.
+      선택한 챕터의 유닛, 선택한 유닛의 챕터, 둘 사이의 매핑, 그리고 그 유닛의 단어 하위 트리가 복사됩니다.
+    - 테이블 단위 일괄 INSERT 로 복사하므로 교재 크기와 관계없이 쿼리 수가 일정합니다.
+    - 원본 트리는 읽기 복제본에서 읽고 (`X-Read-Your-Writes: true` 이면 primary), 새 교재는 primary 에 씁니다.
+    - 같은 원본/선택 조건의 복사가 진행 중이면 새로 복사하지 않고 그 결과를 함께 받습니다.
+    - `Idempotency-Key` 헤더를 주면 성공한 결과를 `IDEMPOTENCY_TTL` 초 동안 보관해, 같은 키의 재시도에
+      기존 새 교재를 바로 반환합니다. (`Idempotent-Replayed: true`) 같은 키를 다른 요청에 쓰면 422
     """
-    try:
-        # 1. 원본 교재 조회
-        original_book = db.query(models.Book).filter(models.Book.idx == source_book_id).first()
-        if not original_book:
+    fingerprint = ("copy", source_book_id, selection.model_dump_json() if selection is not None else None)
+
+    def _copy() -> int:
+        # 1. 원본 교재 트리 조회 (계층별 고정 쿼리, 선택 조건은 SQL 로 적용)
+        tree_filter = loader.TreeFilter(**selection.model_dump()) if selection is not None else None
+        source_tree = loader.load_book_tree(read_db, source_book_id, tree_filter)
+        read_db.rollback()
+        if source_tree is None and read_db.bind is not db.bind:
+            # 복제 지연으로 아직 복제본에 없는 교재일 수 있으므로 primary 에서 다시 확인
+            source_tree = loader.load_book_tree(db, source_book_id, tree_filter)
+        if source_tree is None:
             raise HTTPException(status_code=404, detail="Original book not found")
+        if tree_filter is not None and tree_filter.selects_structure and not source_tree.units:
+            raise HTTPException(status_code=422, detail="Selection matched no units of this book")
 
-        # 2. 교재(Book) 레코드 복사
-        new_book = models.Book(
-            book_title=f"{original_book.book_title} (개정)",
-            book_isbn=original_book.book_isbn,
-            book_imagelink=original_book.book_imagelink,
-            cate_lvl1_idx=original_book.cate_lvl1_idx,
-            cate_lvl2_idx=original_book.cate_lvl2_idx,
-            created_by=original_book.created_by  # 필요시 현재 사용자 ID로 변경
-        )
-        db.add(new_book)
-        db.flush()  # DB에 임시 저장하여 새 book의 idx를 할당받음
-        print("new_book created")
-
-        # --- 매핑용 딕셔너리 ---
-        old_to_new_chapter_map = {}
-        old_to_new_unit_map = {}
-        old_to_new_voca_map = {}
-        old_to_new_meaning_map = {}
-
-        # 3. 챕터(Chapters) 복사
-        for ch in original_book.chapters:
-            new_chapter = models.Chapter(ch_title=ch.ch_title, ch_order=ch.ch_order, book_idx=new_book.idx, created_by=ch.created_by)
-            db.add(new_chapter)
-            db.flush()
-            old_to_new_chapter_map[ch.idx] = new_chapter.idx
-        print("chapters copied")
-        # 4. 유닛(Units) 복사
-        for un in original_book.units:
-            new_unit = models.Unit(un_title=un.un_title, un_order=un.un_order, book_idx=new_book.idx, created_by=un.created_by)
-            db.add(new_unit)
-            db.flush()
-            old_to_new_unit_map[un.idx] = new_unit.idx
-        print("units")
-        # 5. 챕터-유닛 매핑(Chapter-Unit Mappings) 복사
-        original_chapters_ids = old_to_new_chapter_map.keys()
-        if original_chapters_ids:
-            mappings = db.query(models.ChapterUnitMapping).filter(models.ChapterUnitMapping.ch_idx.in_(original_chapters_ids)).all()
-            for m in mappings:
-                new_ch_idx = old_to_new_chapter_map.get(m.ch_idx)
-                new_un_idx = old_to_new_unit_map.get(m.un_idx)
-                if new_ch_idx and new_un_idx:
-                    db.add(models.ChapterUnitMapping(ch_idx=new_ch_idx, un_idx=new_un_idx, created_by=m.created_by))
-
-        print("mappings")
-        # 6. 단어(Voca) 및 하위 데이터 복사
-        for i, voca in enumerate(original_book.vocas):
-            print(f"voca {i+1}") # 일련번호 추가
-            new_un_idx = old_to_new_unit_map.get(voca.un_idx)
-            if not new_un_idx: continue # 매핑되는 유닛이 없으면 건너뜀
-
-            new_voca = models.Voca(
-                vc_word=voca.vc_word, vt_idx=voca.vt_idx, vc_type=voca.vc_type, vc_root=voca.vc_root,
-                vc_unikey=voca.vc_unikey,
-                un_idx=new_un_idx, book_idx=new_book.idx, vc_order=voca.vc_order,
-                created_by=voca.created_by
-            )
-            db.add(new_voca)
-            db.flush()
-            old_to_new_voca_map[voca.idx] = new_voca.idx
-
-            # 6-1. 파생어(Derivatives) 복사
-            for dr in voca.derivatives:
-                db.add(models.VocaDr(dr_word=dr.dr_word, dr_meaning=dr.dr_meaning, voca_idx=new_voca.idx, created_by=dr.created_by))
-            
-            # 6-2. 단어 뜻(Meanings) 및 하위 데이터 복사
-            for meaning in voca.meanings:
-                print("meaning")
-                new_meaning = models.VocaMeaning(
-                    mi_meaning=meaning.mi_meaning, mi_engmeaning=meaning.mi_engmeaning,
-                    mi_order=meaning.mi_order, voca_idx=new_voca.idx, created_by=meaning.created_by
-                )
-                db.add(new_meaning)
-                db.flush()
-                old_to_new_meaning_map[meaning.idx] = new_meaning.idx
-
-                # 6-2-1. 예문(Examples) 복사
-                for ex in meaning.examples:
-                    db.add(models.MeaningExample(
-                        ex_sentence=ex.ex_sentence, ex_translation=ex.ex_translation,
-                        meaning_idx=new_meaning.idx, voca_idx=new_voca.idx, created_by=ex.created_by
-                    ))
-
-                # 6-2-2. 유의어/반의어(Synonyms/Antonyms) 복사
-                for sa in meaning.snyants:
-                    db.add(models.MeaningSnyant(
-                        snyant_type=sa.snyant_type, snyant_word=sa.snyant_word, snyant_meaning=sa.snyant_meaning,
-                        meaning_idx=new_meaning.idx, voca_idx=new_voca.idx, created_by=sa.created_by
-                    ))
-        
-        # 7. 모든 변경사항을 DB에 최종 커밋
-        db.commit()
-        
-        # 8. 생성된 새 교재 정보를 반환
-        db.refresh(new_book)
+        try:
+            # 2. 교재 및 모든 하위 데이터를 테이블 단위로 복사
+            new_book_idx = copier.copy_book(db, source_tree, observer=metrics.CopyPhaseTimer())
+
+            # 3. 모든 변경사항을 DB에 최종 커밋
+            db.commit()
+            cache.invalidate_book(new_book_idx)
+            return new_book_idx
+
+        except Exception as e:
+            # 오류 발생 시 모든 작업을 롤백하여 데이터 일관성 유지
+            db.rollback()
+            # 서버 로그에 에러 기록 (디버깅용)
+            logger.exception("book copy failed (book %s)", source_book_id)
+            raise HTTPException(status_code=500, detail=f"An internal error occurred: {e}")
+
+    for _ in range(2):
+        try:
+            new_book_idx, shared = idempotency.book_copies.run(fingerprint, _copy, key=idempotency_key)
+        except idempotency.IdempotencyKeyConflictError:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+        except TimeoutError:
+            raise HTTPException(status_code=409, detail="The same copy is still in progress; retry later")
+
+        # 4. 생성된 새 교재 정보를 반환
+        new_book = db.query(models.Book).filter(models.Book.idx == new_book_idx).first()
+        if new_book is None and shared and idempotency_key is not None:
+            # 보관된 결과의 교재가 그 사이 삭제됨 - 결과를 버리고 다시 복사
+            idempotency.book_copies.forget(idempotency_key)
+            continue
+        if shared:
+            response.headers["Idempotent-Replayed"] = "true"
         return new_book
+    raise HTTPException(status_code=409, detail="The copied book was deleted concurrently; retry")
+
 
+@app.get("/books/{source_book_id}/diff/{target_book_id}", response_model=schemas.BookDiff, summary="두 교재 비교", dependencies=[admission.HEAVY])
+def diff_books(
+    source_book_id: int, target_book_id: int, background_tasks: BackgroundTasks,
+    db: Session = Depends(database.get_read_db),
+):
+    """
+    원본 교재(source)와 대상 교재(target, 예: 복사 후 수정한 "(개정)" 교재)의 단어 트리를 비교합니다.
+    - 단어는 vc_unikey(없으면 vc_word)로, 뜻/예문 등은 순서로 짝지어 added / removed / modified 를 반환합니다.
+    - 단어 하위 트리의 내용 해시가 같으면 비교를 건너뛰므로, 바뀐 단어 수에 비례한 비용만 듭니다.
+    - 해시가 없는 단어는 이번 요청에서 계산만 하고(`hashes_computed`), 저장은 응답 뒤 백그라운드에서 주 DB 에 합니다.
+    """
+    result = bookdiff.diff_books(db, source_book_id, target_book_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    if result["hashes_computed"]:
+        background_tasks.add_task(vocahash.backfill_book_hashes, source_book_id, target_book_id)
+    return serialization.json_response(result)
+
+
+# =============================================
+#  교재 삭제 API
+# =============================================
+@app.delete("/books/{book_id}", response_model=schemas.PurgeResult, summary="교재 및 모든 하위 데이터 삭제", dependencies=[admission.HEAVY])
+def delete_book(
+    book_id: int,
+    dry_run: bool = False,
+    batch_size: int = Query(purge.PURGE_BATCH_SIZE, ge=1, le=10000),
+    db: Session = Depends(database.get_db),
+):
+    """
+    교재와 모든 하위 데이터를 말단 테이블부터 집합 단위 DELETE 로 삭제합니다.
+    - 단어를 `batch_size` 개씩 하위 데이터와 함께 지우고 batch 마다 커밋하므로 잠금 시간이 짧습니다.
+    - 중간에 실패하면 일부 단어만 지워진 상태로 남으며, 같은 요청을 다시 보내면 이어서 삭제합니다.
+    - `dry_run=true` 이면 삭제하지 않고 테이블별 삭제 예정 행 수만 반환합니다.
+    """
+    try:
+        result = purge.purge_book(db, book_id, batch_size, dry_run)
     except Exception as e:
-        # 오류 발생 시 모든 작업을 롤백하여 데이터 일관성 유지
-        db.rollback()
-        # 서버 로그에 에러 기록 (디버깅용)
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"An internal error occurred: {e}")
\ No newline at end of file
+        logger.exception("book purge failed (book %s)", book_id)
+        raise HTTPException(status_code=500, detail=f"An internal error occurred: {e}")
+    if result is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    return result
+
+
+# =============================================
+#  교재 스냅샷 내보내기/가져오기 API
+# =============================================
+@app.get("/books/{book_id}/export", summary="교재 스냅샷 내보내기", dependencies=[admission.HEAVY])
+async def export_book(
+    book_id: int,
+    format: str = Query("ndjson", pattern="^(ndjson|msgpack)$"),
+    db: AsyncSession = Depends(database.get_async_read_db),
+):
+    """
+    교재 전체 트리(챕터, 유닛, 매핑, 단어, 파생어, 뜻, 예문, 유의어/반의어)를 레코드 단위 스냅샷으로 스트리밍합니다.
+    - 형식: gzip 으로 압축한 NDJSON(`format=ndjson`) 또는 msgpack(`format=msgpack`, 서버에 msgpack 이 설치된 경우)
+    - 테이블마다 서버 측 커서로 나눠 읽으므로 교재 크기와 관계없이 서버 메모리 사용량이 일정합니다.
+    - 받은 파일은 `POST /books/import` 로 다른 환경에 가져올 수 있습니다.
+    """
+    if await db.get(models.Book, book_id) is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    if not snapshot.available(format):
+        raise HTTPException(status_code=400, detail=f"{format} is not available on this server")
+    body = snapshot.stream_export(functools.partial(database.AsyncSessionLocal, bind=db.bind), book_id, format)
+    headers = {"Content-Disposition": f'attachment; filename="book-{book_id}.{format}.gz"'}
+    return StreamingResponse(body, media_type="application/gzip", headers=headers)
+
+@app.post("/books/import", response_model=schemas.SnapshotImportResult, summary="교재 스냅샷 가져오기", dependencies=[admission.HEAVY])
+async def import_book(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|msgpack)$"),
+    book_title: Optional[str] = Query(None, max_length=50),
+    cate_lvl1_idx: Optional[int] = None,
+    cate_lvl2_idx: Optional[int] = None,
+    db: AsyncSession = Depends(database.get_async_db),
+):
+    """
+    `GET /books/{idx}/export` 로 받은 스냅샷(gzip 또는 압축 안 한 본문)을 새 교재로 가져옵니다.
+    - 본문을 스트리밍으로 풀면서 종류별로 모아 테이블마다 다중 행 INSERT 하고, 원본 idx 를 새 idx 로 바꿉니다.
+    - 단어 유형은 제목으로 매칭하고 (없으면 생성), 카테고리는 지정하지 않으면 이 환경에 있을 때만 유지합니다.
+    - 전체가 하나의 트랜잭션입니다. 스냅샷 형식이 잘못되면 아무것도 저장하지 않고 422 를 반환합니다.
+    """
+    if not snapshot.available(format):
+        raise HTTPException(status_code=400, detail=f"{format} is not available on this server")
+    overrides = {"book_title": book_title, "cate_lvl1_idx": cate_lvl1_idx, "cate_lvl2_idx": cate_lvl2_idx}
+    importer = snapshot.SnapshotImporter(overrides={k: v for k, v in overrides.items() if v is not None})
+
+    started = time.perf_counter()
+    try:
+        # 1. 본문 조각마다 레코드를 풀어 종류별 batch 로 INSERT
+        async for records in snapshot.read_records(request.stream(), format):
+            await db.run_sync(importer.add, records)
+        new_book_idx = await db.run_sync(importer.finish)
+        # 2. 모든 레코드를 한 번에 커밋
+        await db.commit()
+    except snapshot.SnapshotError as e:
+        await db.rollback()
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        await db.rollback()
+        logger.exception("snapshot import failed")
+        raise HTTPException(status_code=500, detail=f"An internal error occurred: {e}")
+    cache.invalidate_book(new_book_idx)
+
+    return schemas.SnapshotImportResult(
+        book_idx=new_book_idx, rows=importer.rows, elapsed=round(time.perf_counter() - started, 3),
+    )
+
+
+# =============================================
+#  비동기 복사 작업(Job) API
+# =============================================
+@app.post("/books/{source_book_id}/copy/stream", summary="교재 복사 (진행 상황 스트리밍)", dependencies=[admission.HEAVY])
+def copy_book_streaming(
+    source_book_id: int,
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$"),
+    db: Session = Depends(database.get_db),
+):
+    """
+    교재 복사를 워커 풀에서 실행하면서 진행 이벤트(단계, 누적/전체 행 수, 처리량)를
+    NDJSON(`format=ndjson`) 또는 Server-Sent Events(`format=sse`)로 스트리밍합니다.
+    마지막 이벤트는 `done`(new_book_idx 포함) 또는 `error` 입니다.
+    - 진행 이벤트가 `COPY_STREAM_HEARTBEAT` 초 동안 없으면 `heartbeat` 이벤트를 보냅니다.
+    - 클라이언트가 연결을 끊으면 스트리밍만 멈추고, 복사는 계속되어 `GET /copy-jobs/{job_id}` 로 결과를 확인할 수 있습니다.
+    """
+    if db.query(models.Book.idx).filter(models.Book.idx == source_book_id).first() is None:
+        raise HTTPException(status_code=404, detail="Original book not found")
+
+    events = progress.EventQueueObserver()
+    try:
+        job = jobs.submit_copy(source_book_id, listener=events)
+    except jobs.QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    if format == "sse":
+        formatter, media_type = progress.format_sse, "text/event-stream"
+    else:
+        formatter, media_type = progress.format_ndjson, "application/x-ndjson"
+
+    async def _stream():
+        async for event in events.iter_events(progress.COPY_STREAM_HEARTBEAT):
+            if await request.is_disconnected():
+                return
+            yield formatter({"job_id": job.id, **event})
+
+    return StreamingResponse(_stream(), media_type=media_type)
+
+@app.post("/books/{source_book_id}/copy-jobs", response_model=schemas.CopyJob, status_code=202, summary="교재 복사 작업 등록")
+def create_copy_job(source_book_id: int, db: Session = Depends(database.get_db)):
+    """
+    교재 복사를 워커 풀에 등록하고 job id 를 즉시 반환합니다.
+    진행 상황은 `GET /copy-jobs/{job_id}` 로 조회합니다.
+    """
+    if db.query(models.Book.idx).filter(models.Book.idx == source_book_id).first() is None:
+        raise HTTPException(status_code=404, detail="Original book not found")
+    try:
+        job = jobs.submit_copy(source_book_id)
+    except jobs.QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return job.snapshot()
+
+@app.get("/copy-jobs/{job_id}", response_model=schemas.CopyJob, summary="교재 복사 작업 상태 조회", dependencies=[admission.LIGHT])
+async def read_copy_job(job_id: str):
+    job = jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Copy job not found")
+    return job.snapshot()
+
+
+# =============================================
+#  나눠서(chunk) 커밋하는 이어받기 가능한 복사 API
+# =============================================
+@app.post("/books/{source_book_id}/copy-chunked", response_model=schemas.CopyJournal, summary="교재 복사 (chunk 단위 커밋)", dependencies=[admission.HEAVY])
+def copy_book_chunked(
+    source_book_id: int,
+    chunk_size: Optional[int] = Query(None, ge=1, le=10000),
+    db: Session = Depends(database.get_db),
+):
+    """
+    교재/챕터/유닛을 먼저 복사한 뒤, 단어를 **chunk_size** 개씩 하위 데이터와 함께 복사하고
+    chunk 마다 커밋합니다. 진행 상황은 복사 기록(pt_copy_journal)에 남습니다.
+    - 중간에 실패하면 `POST /copy-journals/{journal_id}/resume` 으로 이어서 복사합니다.
+    - 포기하려면 `DELETE /copy-journals/{journal_id}` 로 만들다 만 교재를 삭제합니다.
+    """
+    journal = chunked.start_copy(db, source_book_id, chunk_size, observer=metrics.CopyPhaseTimer())
+    if journal is None:
+        raise HTTPException(status_code=404, detail="Original book not found")
+    return _run_copy_chunks(db, journal.idx)
+
+@app.get("/copy-journals/{journal_id}", response_model=schemas.CopyJournal, summary="chunk 복사 기록 조회", dependencies=[admission.LIGHT])
+async def read_copy_journal(journal_id: int, db: AsyncSession = Depends(database.get_async_db)):
+    journal = await db.get(models.CopyJournal, journal_id)
+    if journal is None:
+        raise HTTPException(status_code=404, detail="Copy journal not found")
+    return journal
+
+@app.post("/copy-journals/{journal_id}/resume", response_model=schemas.CopyJournal, summary="중단된 chunk 복사 이어받기", dependencies=[admission.HEAVY])
+def resume_copy_journal(journal_id: int, db: Session = Depends(database.get_db)):
+    return _run_copy_chunks(db, journal_id)
+
+@app.delete("/copy-journals/{journal_id}", response_model=schemas.CopyJournal, summary="chunk 복사 포기 및 정리", dependencies=[admission.HEAVY])
+def abandon_copy_journal(journal_id: int, db: Session = Depends(database.get_db)):
+    """완료되지 않은 복사를 포기하고 만들다 만 새 교재와 하위 데이터를 삭제합니다."""
+    try:
+        journal = chunked.abandon(db, journal_id)
+    except chunked.JournalStateError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if journal is None:
+        raise HTTPException(status_code=404, detail="Copy journal not found")
+    return journal
+
+def _run_copy_chunks(db: Session, journal_id: int):
+    try:
+        return chunked.run_chunks(db, journal_id, observer=metrics.CopyPhaseTimer())
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Copy journal not found")
+    except chunked.JournalStateError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.exception("chunked copy interrupted (journal %s)", journal_id)
+        raise HTTPException(status_code=500, detail=f"Copy interrupted (journal {journal_id}): {e}")
+
+
+# =============================================
+#  여러 교재 일괄 복사 API
+# =============================================
+@app.post("/books/copy-batch", response_model=schemas.BatchCopy, status_code=202, summary="여러 교재 일괄 복사 등록")
+def copy_books_batch(request: schemas.BatchCopyRequest, db: Session = Depends(database.get_db)):
+    """
+    **book_ids** 목록 또는 카테고리(**cate_lvl1_idx**/**cate_lvl2_idx**)에 속한 교재를 일괄 복사로 등록하고 즉시 반환합니다.
+    진행 상황(교재별 결과/소요 시간, 전체 rows/sec)은 `GET /copy-batches/{batch_id}` 로 조회합니다.
+    - **workers**: 동시에 복사할 교재 수 (기본 `BATCH_COPY_WORKERS`, 최대 `BATCH_COPY_MAX_WORKERS` 와 커넥션 풀 용량)
+    - 교재마다 독립된 트랜잭션으로 복사하며, 각 교재는 `GET /copy-jobs/{job_id}` 로도 조회할 수 있습니다.
+    - 교재가 `BATCH_COPY_MAX_BOOKS` 를 넘으면 400, 진행 중인 일괄 복사가 `BATCH_COPY_QUEUE_LIMIT` 개이면 503 을 반환합니다.
+    """
+    book_ids = batch.resolve_book_ids(db, request.book_ids or [], request.cate_lvl1_idx, request.cate_lvl2_idx)
+    if not book_ids:
+        raise HTTPException(status_code=400, detail="No books to copy")
+    try:
+        copy_batch = batch.submit_books(book_ids, request.workers)
+    except batch.BatchTooLargeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except jobs.QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return copy_batch.snapshot()
+
+@app.get("/copy-batches/{batch_id}", response_model=schemas.BatchCopy, summary="일괄 복사 상태 조회", dependencies=[admission.LIGHT])
+async def read_copy_batch(batch_id: str):
+    copy_batch = batch.get_batch(batch_id)
+    if copy_batch is None:
+        raise HTTPException(status_code=404, detail="Copy batch not found")
+    return copy_batch.snapshot()
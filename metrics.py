@@ -0,0 +1,247 @@
+# metrics.py
+"""
+요청 단위 SQL 계측과 Prometheus 형식 /metrics
+
+- SQLAlchemy 이벤트 훅으로 요청마다 실행된 SQL 문장 수, DB 시간, 행 수를 집계합니다.
+  (DEBUG 모드에서는 X-DB-Statements / X-DB-Time-Ms / X-DB-Rows 응답 헤더로 노출)
+- 요청 지연 시간, 복사 단계별 소요 시간, 엔진별 풀 커넥션 checkout 대기 시간을 히스토그램으로,
+  엔진별 사용 중인 풀 커넥션 수를 게이지로 모읍니다.
+- 입장 제어(admission)의 처리 중/대기 요청 수와 대기 시간, 거절 수를 모읍니다.
+"""
+import functools
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+from progress import CopyObserver
+
+DEBUG = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {value}")
+        return "\n".join(lines)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # 레이블 값 → (버킷별 누적 개수, 합계, 개수)
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                for bound, n in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{_labels(names, key + (repr(float(bound)),))} {n}")
+                lines.append(f"{self.name}_bucket{_labels(names, key + ('+Inf',))} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return "\n".join(lines)
+
+
+class Gauge:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {value}")
+        return "\n".join(lines)
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{v}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route", "status"))
+REQUEST_STATEMENTS = Histogram("http_request_db_statements", "SQL statements per HTTP request", ("route",), COUNT_BUCKETS)
+DB_STATEMENTS = Counter("db_statements_total", "SQL statements executed")
+DB_TIME = Counter("db_statement_seconds_total", "Time spent executing SQL statements")
+DB_ROWS = Counter("db_rows_total", "Rows returned or affected by SQL statements")
+COPY_PHASE_LATENCY = Histogram("copy_phase_duration_seconds", "Book copy time per phase", ("phase",))
+COPY_PHASE_ROWS = Counter("copy_phase_rows_total", "Rows written per book copy phase", ("phase",))
+POOL_CHECKOUT_WAIT = Histogram("db_pool_checkout_wait_seconds", "Time to check out a pooled connection", ("engine",))
+POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Pooled connections currently checked out", ("engine",))
+ADMISSION_IN_FLIGHT = Gauge("admission_in_flight", "Requests holding an admission slot", ("gate",))
+ADMISSION_QUEUE_DEPTH = Gauge("admission_queue_depth", "Requests waiting for an admission slot", ("gate",))
+ADMISSION_WAIT = Histogram("admission_wait_seconds", "Time waiting for an admission slot", ("gate",))
+ADMISSION_REJECTED = Counter("admission_rejected_total", "Requests rejected by admission control", ("gate", "reason"))
+
+REGISTRY = [
+    REQUEST_LATENCY, REQUEST_STATEMENTS, DB_STATEMENTS, DB_TIME, DB_ROWS,
+    COPY_PHASE_LATENCY, COPY_PHASE_ROWS, POOL_CHECKOUT_WAIT, POOL_CHECKED_OUT,
+    ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_WAIT, ADMISSION_REJECTED,
+]
+
+
+def render() -> str:
+    """등록된 모든 지표를 Prometheus text exposition 형식으로 반환"""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+# =============================================
+#  요청 단위 SQL 집계
+# =============================================
+class RequestStats:
+    __slots__ = ("statements", "db_time", "rows")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+        self.rows = 0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    rows = max(cursor.rowcount or 0, 0)
+    DB_STATEMENTS.inc()
+    DB_TIME.inc(elapsed)
+    DB_ROWS.inc(rows)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_time += elapsed
+        stats.rows += rows
+
+
+def _handle_error(exception_context):
+    # 실패한 문장은 after_cursor_execute 가 호출되지 않으므로 시작 시각만 정리
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def instrument_engine(engine, name: str = "default") -> None:
+    """엔진에 SQL 집계 훅, 풀 checkout 대기 시간 히스토그램, 사용 중인 풀 커넥션 수 게이지를 붙입니다."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+    # checkout 대기 시간: Connection 은 engine.raw_connection() 으로 풀에서 커넥션을 꺼내므로 이 호출을 잽니다.
+    # (풀이 가득 차 기다린 시간과 새 커넥션을 여는 시간 포함, DB_POOL_TIMEOUT 으로 실패한 경우도 기록)
+    # 엔진 인스턴스에 씌우므로 dispose() 로 풀을 새로 만들어도 유지됩니다.
+    raw_connection = sync_engine.raw_connection
+
+    @functools.wraps(raw_connection)
+    def _timed_raw_connection():
+        started = time.perf_counter()
+        try:
+            return raw_connection()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started, engine=name)
+
+    sync_engine.raw_connection = _timed_raw_connection
+
+    # 공개 풀 이벤트(checkout/checkin)로 사용 중인 커넥션 수를 셉니다.
+    checked_out = {"count": 0}
+    lock = threading.Lock()
+
+    def _track(delta: int) -> None:
+        with lock:
+            checked_out["count"] += delta
+            POOL_CHECKED_OUT.set(checked_out["count"], engine=name)
+
+    event.listen(sync_engine, "checkout", lambda dbapi_conn, record, proxy: _track(1))
+    event.listen(sync_engine, "checkin", lambda dbapi_conn, record: _track(-1))
+    _track(0)
+
+
+async def metrics_middleware(request, call_next):
+    """요청 지연 시간과 요청별 SQL 집계를 기록하는 HTTP 미들웨어"""
+    stats = RequestStats()
+    token = _request_stats.set(stats)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        _request_stats.reset(token)
+    elapsed = time.perf_counter() - started
+
+    route = request.scope.get("route")
+    route_path = getattr(route, "path", "unmatched")
+    REQUEST_LATENCY.observe(elapsed, method=request.method, route=route_path, status=response.status_code)
+    REQUEST_STATEMENTS.observe(stats.statements, route=route_path)
+    if DEBUG:
+        response.headers["X-DB-Statements"] = str(stats.statements)
+        response.headers["X-DB-Time-Ms"] = f"{stats.db_time * 1000:.1f}"
+        response.headers["X-DB-Rows"] = str(stats.rows)
+    return response
+
+
+# =============================================
+#  복사 단계별 소요 시간
+# =============================================
+class CopyPhaseTimer(CopyObserver):
+    """직전 이벤트부터 각 단계(on_phase)까지 걸린 시간을 copy_phase_duration_seconds 에 기록"""
+
+    def __init__(self):
+        self._last = time.perf_counter()
+
+    def on_start(self, rows_total: int) -> None:
+        self._last = time.perf_counter()
+
+    def on_phase(self, phase: str, rows: int) -> None:
+        now = time.perf_counter()
+        COPY_PHASE_LATENCY.observe(now - self._last, phase=phase)
+        COPY_PHASE_ROWS.inc(rows, phase=phase)
+        self._last = now
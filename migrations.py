@@ -0,0 +1,327 @@
+# migrations.py
+"""
+버전별 스키마 마이그레이션
+
+요청을 처리하는 워커가 import 시점에 create_all 을 실행하지 않도록,
+스키마 변경은 배포 시 한 번만 실행하는 이 단계로 옮겼습니다.
+
+    python migrations.py              # 밀린 단계를 모두 적용 (upgrade)
+    python migrations.py status       # 현재 버전과 밀린 단계 출력
+    python migrations.py --url sqlite:///test.db
+
+적용된 버전은 pt_schema_version 에 기록됩니다. 새 단계는 STEPS 끝에 추가하고,
+이미 배포된 단계는 고치지 않습니다. (MySQL 에서는 GET_LOCK 으로 동시에 한 프로세스만 적용)
+
+각 단계의 DDL 은 그 버전 당시의 정의를 이 파일에 그대로 적어 둡니다. models.py 를 고쳐도 이미 있는 단계의
+결과는 바뀌지 않으므로, 어느 버전에서 올려도 같은 스키마가 됩니다. 모델을 바꾸면 그 차이를 새 단계로 추가하세요.
+(tests/test_migrations.py 가 마이그레이션 결과와 models.py 가 같은지 확인)
+"""
+import argparse
+import sys
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Optional
+
+from sqlalchemy import (
+    Column, DateTime, ForeignKey, Index, Integer, MetaData, String, Table, Text, create_engine, insert, inspect, select, text,
+)
+from sqlalchemy.engine import Connection, Engine
+
+import database
+
+LOCK_NAME = "pt_schema_migrations"
+LOCK_TIMEOUT = 60
+
+# 마이그레이션 기록 테이블은 앱 모델(Base.metadata)과 분리
+_metadata = MetaData()
+version_t = Table(
+    "pt_schema_version", _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+class Step(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[Connection], None]
+
+
+# =============================================
+#  1단계: 처음 스키마 (버전 1 당시의 models.py)
+# =============================================
+def _v1_metadata() -> MetaData:
+    metadata = MetaData()
+
+    def created(*columns):
+        return (*columns, Column("created_at", DateTime), Column("created_by", Integer, nullable=True))
+
+    Table(
+        "pt_category", metadata,
+        *created(
+            Column("idx", Integer, primary_key=True, index=True),
+            Column("cate_name", String(50), nullable=False),
+            Column("cate_lvl", Integer, nullable=False),
+            Column("cate_pidx", Integer, ForeignKey("pt_category.idx"), nullable=True),
+        ),
+    )
+    Table(
+        "pt_voca_type", metadata,
+        *created(
+            Column("idx", Integer, primary_key=True, index=True),
+            Column("vt_title", String(50), nullable=False),
+        ),
+    )
+    Table(
+        "pt_book", metadata,
+        *created(
+            Column("idx", Integer, primary_key=True, index=True),
+            Column("book_title", String(50), nullable=False),
+            Column("book_isbn", String(50), nullable=True),
+            Column("book_imagelink", String(500), nullable=True),
+            Column("cate_lvl1_idx", Integer, ForeignKey("pt_category.idx"), nullable=True),
+            Column("cate_lvl2_idx", Integer, ForeignKey("pt_category.idx"), nullable=True),
+        ),
+    )
+    Table(
+        "pt_chapter", metadata,
+        *created(
+            Column("idx", Integer, primary_key=True, index=True),
+            Column("ch_title", String(50), nullable=False),
+            Column("ch_order", Integer, nullable=False),
+            Column("book_idx", Integer, ForeignKey("pt_book.idx"), nullable=False),
+        ),
+    )
+    Table(
+        "pt_unit", metadata,
+        *created(
+            Column("idx", Integer, primary_key=True, index=True),
+            Column("un_title", String(50), nullable=False),
+            Column("un_order", Integer, nullable=False),
+            Column("book_idx", Integer, ForeignKey("pt_book.idx"), nullable=False),
+        ),
+    )
+    Table(
+        "pt_ch_un_mapping", metadata,
+        *created(
+            Column("idx", Integer, primary_key=True, index=True),
+            Column("ch_idx", Integer, ForeignKey("pt_chapter.idx"), nullable=False),
+            Column("un_idx", Integer, ForeignKey("pt_unit.idx"), nullable=False),
+        ),
+    )
+    Table(
+        "pt_voca", metadata,
+        Column("idx", Integer, primary_key=True, index=True),
+        Column("vc_word", String(50), nullable=False),
+        Column("vt_idx", Integer, ForeignKey("pt_voca_type.idx"), nullable=False),
+        Column("vc_type", Integer, nullable=False),
+        Column("vc_order", Integer, nullable=False),
+        Column("vc_root", String(4000), nullable=True),
+        Column("vc_unikey", String(4000), nullable=True),
+        Column("vc_mp3_link", String(500), nullable=True),
+        Column("un_idx", Integer, ForeignKey("pt_unit.idx"), nullable=False),
+        Column("book_idx", Integer, ForeignKey("pt_book.idx"), nullable=False),
+        Column("created_at", DateTime),
+        Column("created_by", Integer, nullable=True),
+    )
+    Table(
+        "pt_voca_dr", metadata,
+        *created(
+            Column("idx", Integer, primary_key=True, index=True),
+            Column("dr_word", String(50), nullable=False),
+            Column("dr_meaning", String(50), nullable=False),
+            Column("voca_idx", Integer, ForeignKey("pt_voca.idx"), nullable=False),
+        ),
+    )
+    Table(
+        "pt_voca_meaning", metadata,
+        *created(
+            Column("idx", Integer, primary_key=True, index=True),
+            Column("mi_meaning", String(50), nullable=False),
+            Column("mi_engmeaning", String(200), nullable=True),
+            Column("mi_order", Integer, nullable=False),
+            Column("voca_idx", Integer, ForeignKey("pt_voca.idx"), nullable=False),
+        ),
+    )
+    Table(
+        "pt_meaning_example", metadata,
+        *created(
+            Column("idx", Integer, primary_key=True, index=True),
+            Column("ex_sentence", String(200), nullable=False),
+            Column("ex_translation", String(200), nullable=False),
+            Column("meaning_idx", Integer, ForeignKey("pt_voca_meaning.idx"), nullable=False),
+            Column("voca_idx", Integer, ForeignKey("pt_voca.idx"), nullable=False),
+        ),
+    )
+    Table(
+        "pt_meaning_snyant", metadata,
+        Column("idx", Integer, primary_key=True, index=True),
+        Column("snyant_type", Integer, nullable=False),
+        Column("snyant_word", String(500), nullable=False),
+        Column("meaning_idx", Integer, ForeignKey("pt_voca_meaning.idx"), nullable=False),
+        Column("voca_idx", Integer, ForeignKey("pt_voca.idx"), nullable=False),
+        Column("created_at", DateTime),
+        Column("created_by", Integer, nullable=True),
+        Column("snyant_meaning", String(500), nullable=False),
+    )
+    Table(
+        "pt_voca_hash", metadata,
+        Column("voca_idx", Integer, ForeignKey("pt_voca.idx"), primary_key=True),
+        Column("vh_hash", String(40), nullable=False),
+        Column("updated_at", DateTime),
+    )
+    Table(
+        "pt_copy_journal", metadata,
+        Column("idx", Integer, primary_key=True, index=True),
+        Column("src_book_idx", Integer, ForeignKey("pt_book.idx"), nullable=False),
+        Column("new_book_idx", Integer, nullable=True),
+        Column("cj_state", String(20), nullable=False),
+        Column("cj_chunk_size", Integer, nullable=False),
+        Column("cj_chapter_map", Text, nullable=True),
+        Column("cj_unit_map", Text, nullable=True),
+        Column("cj_src_hwm", Integer, nullable=False),
+        Column("cj_new_hwm", Integer, nullable=False),
+        Column("cj_vocas_done", Integer, nullable=False),
+        Column("cj_vocas_total", Integer, nullable=False),
+        Column("cj_error", String(500), nullable=True),
+        Column("created_at", DateTime),
+        Column("updated_at", DateTime),
+        Column("created_by", Integer, nullable=True),
+    )
+    return metadata
+
+
+def _initial_schema(conn: Connection) -> None:
+    # 이미 있는 테이블은 건너뜀 (기존 운영 DB 에도 그대로 적용 가능)
+    _v1_metadata().create_all(bind=conn, checkfirst=True)
+
+
+# =============================================
+#  2단계: 검색용 ngram FULLTEXT 색인 (MySQL)
+# =============================================
+_V2_FULLTEXT_INDEXES = (
+    ("ft_voca_word", "pt_voca", "vc_word"),
+    ("ft_voca_dr_word", "pt_voca_dr", "dr_word"),
+    ("ft_voca_meaning", "pt_voca_meaning", "mi_meaning"),
+    ("ft_voca_engmeaning", "pt_voca_meaning", "mi_engmeaning"),
+)
+
+
+def _fulltext_indexes(conn: Connection) -> None:
+    # 검색용 ngram FULLTEXT 색인은 MySQL 에서만 만듭니다. (그 밖에는 search 의 메모리 색인 사용)
+    if conn.dialect.name != "mysql":
+        return
+    for name, table, column in _V2_FULLTEXT_INDEXES:
+        conn.execute(text(f"CREATE FULLTEXT INDEX {name} ON {table} ({column}) WITH PARSER ngram"))
+
+
+# =============================================
+#  3, 4단계: 조회 경로용 인덱스
+# =============================================
+_V3_INDEXES = (
+    ("ix_pt_category_pidx_idx", "pt_category", ("cate_pidx", "idx")),
+    ("ix_pt_book_cate1_idx", "pt_book", ("cate_lvl1_idx", "idx")),
+    ("ix_pt_book_cate2_idx", "pt_book", ("cate_lvl2_idx", "idx")),
+    ("ix_pt_chapter_book_idx", "pt_chapter", ("book_idx", "idx")),
+    ("ix_pt_unit_book_idx", "pt_unit", ("book_idx", "idx")),
+    ("ix_pt_ch_un_mapping_ch_un", "pt_ch_un_mapping", ("ch_idx", "un_idx")),
+    ("ix_pt_ch_un_mapping_un", "pt_ch_un_mapping", ("un_idx",)),
+    ("ix_pt_voca_book_idx", "pt_voca", ("book_idx", "idx")),
+    ("ix_pt_voca_unit_order", "pt_voca", ("un_idx", "vc_order", "idx")),
+    ("ix_pt_voca_dr_voca", "pt_voca_dr", ("voca_idx", "idx")),
+    ("ix_pt_voca_meaning_voca_order", "pt_voca_meaning", ("voca_idx", "mi_order")),
+    ("ix_pt_meaning_example_meaning", "pt_meaning_example", ("meaning_idx", "idx")),
+    ("ix_pt_meaning_example_voca", "pt_meaning_example", ("voca_idx",)),
+    ("ix_pt_meaning_snyant_meaning", "pt_meaning_snyant", ("meaning_idx", "idx")),
+    ("ix_pt_meaning_snyant_voca", "pt_meaning_snyant", ("voca_idx",)),
+    ("ix_pt_copy_journal_src", "pt_copy_journal", ("src_book_idx",)),
+)
+_V4_INDEXES = (
+    ("ix_pt_copy_journal_new", "pt_copy_journal", ("new_book_idx",)),
+)
+
+
+def _create_indexes(indexes):
+    def _apply(conn: Connection) -> None:
+        # 없는 것만 추가 (이전 버전의 1단계가 모델의 인덱스까지 만든 DB 가 있음)
+        inspector = inspect(conn)
+        for name, table_name, columns in indexes:
+            if name in {ix["name"] for ix in inspector.get_indexes(table_name)}:
+                continue
+            table = Table(table_name, MetaData(), *(Column(c) for c in columns))
+            Index(name, *(table.c[c] for c in columns)).create(bind=conn)
+    return _apply
+
+
+STEPS: List[Step] = [
+    Step(1, "initial schema", _initial_schema),
+    Step(2, "ngram FULLTEXT indexes for search", _fulltext_indexes),
+    Step(3, "composite indexes for foreign key access paths", _create_indexes(_V3_INDEXES)),
+    Step(4, "copy journal index on new_book_idx", _create_indexes(_V4_INDEXES)),
+]
+
+
+def current_version(conn: Connection) -> int:
+    version_t.create(bind=conn, checkfirst=True)
+    return conn.execute(select(version_t.c.version).order_by(version_t.c.version.desc()).limit(1)).scalar() or 0
+
+
+def pending_steps(conn: Connection) -> List[Step]:
+    version = current_version(conn)
+    return [step for step in STEPS if step.version > version]
+
+
+def upgrade(engine: Optional[Engine] = None, target: Optional[int] = None) -> List[int]:
+    """밀린 단계를 순서대로 적용하고 적용한 버전 목록을 반환합니다."""
+    engine = engine if engine is not None else database.engine
+    applied = []
+    with engine.connect() as conn:
+        locked = conn.dialect.name == "mysql"
+        if locked and not conn.execute(text("SELECT GET_LOCK(:name, :timeout)"), {"name": LOCK_NAME, "timeout": LOCK_TIMEOUT}).scalar():
+            raise RuntimeError(f"could not acquire migration lock {LOCK_NAME!r}")
+        try:
+            steps = pending_steps(conn)
+            conn.commit()
+            for step in steps:
+                if target is not None and step.version > target:
+                    break
+                # 단계마다 따로 커밋 (MySQL 의 DDL 은 어차피 암묵적으로 커밋됨)
+                try:
+                    step.apply(conn)
+                    conn.execute(insert(version_t).values(
+                        version=step.version, description=step.description, applied_at=datetime.utcnow(),
+                    ))
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                applied.append(step.version)
+        finally:
+            if locked:
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": LOCK_NAME})
+                conn.commit()
+    return applied
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="스키마 마이그레이션")
+    parser.add_argument("command", nargs="?", default="upgrade", choices=("upgrade", "status"))
+    parser.add_argument("--url", help="DB URL (기본값: database.SQLALCHEMY_DATABASE_URL)")
+    parser.add_argument("--target", type=int, help="이 버전까지만 적용")
+    args = parser.parse_args(argv)
+
+    engine = create_engine(args.url, **database.engine_options(args.url)) if args.url else database.engine
+    if args.command == "status":
+        with engine.begin() as conn:
+            print(f"current version: {current_version(conn)}")
+            for step in pending_steps(conn):
+                print(f"pending: {step.version} {step.description}")
+        return 0
+
+    applied = upgrade(engine, args.target)
+    print(f"applied: {', '.join(map(str, applied))}" if applied else "up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,19 @@
 # models.py
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from database import Base
 
+# 외래 키 컬럼의 인덱스는 DB 가 알아서 만들도록 두지 않고, 실제 조회 패턴에 맞춘 복합 인덱스로 명시합니다.
+# (교재 범위 조회 후 idx 순 정렬: (book_idx, idx) / 유닛 단어 목록: (un_idx, vc_order, idx) / 뜻: (voca_idx, mi_order))
+# 기존 DB 에는 migrations.py 의 단계로 추가됩니다. 인덱스를 바꾸면 explain_check.py 로 실행 계획을 확인하세요.
+
 class Category(Base):
     __tablename__ = "pt_category"
+    __table_args__ = (
+        Index("ix_pt_category_pidx_idx", "cate_pidx", "idx"),
+    )
     idx = Column(Integer, primary_key=True, index=True)
     cate_name = Column(String(50), nullable=False)
     cate_lvl = Column(Integer, nullable=False)
@@ -26,6 +33,10 @@ class VocaType(Base):
 
 class Book(Base):
     __tablename__ = "pt_book"
+    __table_args__ = (
+        Index("ix_pt_book_cate1_idx", "cate_lvl1_idx", "idx"),
+        Index("ix_pt_book_cate2_idx", "cate_lvl2_idx", "idx"),
+    )
     idx = Column(Integer, primary_key=True, index=True)
     book_title = Column(String(50), nullable=False)
     book_isbn = Column(String(50), nullable=True)
@@ -41,6 +52,9 @@ class Book(Base):
 
 class Chapter(Base):
     __tablename__ = "pt_chapter"
+    __table_args__ = (
+        Index("ix_pt_chapter_book_idx", "book_idx", "idx"),
+    )
     idx = Column(Integer, primary_key=True, index=True)
     ch_title = Column(String(50), nullable=False)
     ch_order = Column(Integer, nullable=False)
@@ -53,6 +67,9 @@ class Chapter(Base):
 
 class Unit(Base):
     __tablename__ = "pt_unit"
+    __table_args__ = (
+        Index("ix_pt_unit_book_idx", "book_idx", "idx"),
+    )
     idx = Column(Integer, primary_key=True, index=True)
     un_title = Column(String(50), nullable=False)
     un_order = Column(Integer, nullable=False)
@@ -66,6 +83,10 @@ class Unit(Base):
 
 class ChapterUnitMapping(Base):
     __tablename__ = "pt_ch_un_mapping"
+    __table_args__ = (
+        Index("ix_pt_ch_un_mapping_ch_un", "ch_idx", "un_idx"),
+        Index("ix_pt_ch_un_mapping_un", "un_idx"),
+    )
     idx = Column(Integer, primary_key=True, index=True)
     ch_idx = Column(Integer, ForeignKey("pt_chapter.idx"), nullable=False)
     un_idx = Column(Integer, ForeignKey("pt_unit.idx"), nullable=False)
@@ -77,6 +98,10 @@ class ChapterUnitMapping(Base):
 
 class Voca(Base):
     __tablename__ = "pt_voca"
+    __table_args__ = (
+        Index("ix_pt_voca_book_idx", "book_idx", "idx"),
+        Index("ix_pt_voca_unit_order", "un_idx", "vc_order", "idx"),
+    )
     idx = Column(Integer, primary_key=True, index=True)
     vc_word = Column(String(50), nullable=False)
     vt_idx = Column(Integer, ForeignKey("pt_voca_type.idx"), nullable=False)
@@ -98,6 +123,9 @@ class Voca(Base):
 
 class VocaDr(Base):
     __tablename__ = "pt_voca_dr"
+    __table_args__ = (
+        Index("ix_pt_voca_dr_voca", "voca_idx", "idx"),
+    )
     idx = Column(Integer, primary_key=True, index=True)
     dr_word = Column(String(50), nullable=False)
     dr_meaning = Column(String(50), nullable=False)
@@ -109,6 +137,9 @@ class VocaDr(Base):
 
 class VocaMeaning(Base):
     __tablename__ = "pt_voca_meaning"
+    __table_args__ = (
+        Index("ix_pt_voca_meaning_voca_order", "voca_idx", "mi_order"),
+    )
     idx = Column(Integer, primary_key=True, index=True)
     mi_meaning = Column(String(50), nullable=False)
     mi_engmeaning = Column(String(200), nullable=True)
@@ -123,6 +154,10 @@ class VocaMeaning(Base):
 
 class MeaningExample(Base):
     __tablename__ = "pt_meaning_example"
+    __table_args__ = (
+        Index("ix_pt_meaning_example_meaning", "meaning_idx", "idx"),
+        Index("ix_pt_meaning_example_voca", "voca_idx"),
+    )
     idx = Column(Integer, primary_key=True, index=True)
     ex_sentence = Column(String(200), nullable=False)
     ex_translation = Column(String(200), nullable=False)
@@ -135,6 +170,10 @@ class MeaningExample(Base):
 
 class MeaningSnyant(Base):
     __tablename__ = "pt_meaning_snyant"
+    __table_args__ = (
+        Index("ix_pt_meaning_snyant_meaning", "meaning_idx", "idx"),
+        Index("ix_pt_meaning_snyant_voca", "voca_idx"),
+    )
     idx = Column(Integer, primary_key=True, index=True)
     snyant_type = Column(Integer, nullable=False)
     snyant_word = Column(String(500), nullable=False)
@@ -145,3 +184,33 @@ class MeaningSnyant(Base):
     snyant_meaning = Column(String(500), nullable=False)
     
     meaning = relationship("VocaMeaning", back_populates="snyants")
+
+class VocaHash(Base):
+    """단어 하위 트리(단어, 파생어, 뜻, 예문, 유의어/반의어) 내용의 해시 - 교재 비교(diff)용"""
+    __tablename__ = "pt_voca_hash"
+    voca_idx = Column(Integer, ForeignKey("pt_voca.idx"), primary_key=True)
+    vh_hash = Column(String(40), nullable=False)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+class CopyJournal(Base):
+    """나눠서(chunk) 복사하는 교재 복사 작업의 진행 기록 - 중단 시 이어서 복사하기 위함"""
+    __tablename__ = "pt_copy_journal"
+    __table_args__ = (
+        Index("ix_pt_copy_journal_src", "src_book_idx"),
+        Index("ix_pt_copy_journal_new", "new_book_idx"),  # 교재 삭제 시 그 교재로 복사 중이던 기록 포기
+    )
+    idx = Column(Integer, primary_key=True, index=True)
+    src_book_idx = Column(Integer, ForeignKey("pt_book.idx"), nullable=False)
+    new_book_idx = Column(Integer, nullable=True)  # 정리(cleanup) 후에도 기록을 남기기 위해 FK 없음
+    cj_state = Column(String(20), nullable=False)
+    cj_chunk_size = Column(Integer, nullable=False)
+    cj_chapter_map = Column(Text, nullable=True)  # {원본 챕터 idx: 새 챕터 idx} JSON
+    cj_unit_map = Column(Text, nullable=True)  # {원본 유닛 idx: 새 유닛 idx} JSON
+    cj_src_hwm = Column(Integer, nullable=False, default=0)  # 복사가 끝난 원본 단어 idx 의 최댓값
+    cj_new_hwm = Column(Integer, nullable=False, default=0)  # 새 교재에 삽입된 단어 idx 의 최댓값
+    cj_vocas_done = Column(Integer, nullable=False, default=0)
+    cj_vocas_total = Column(Integer, nullable=False, default=0)
+    cj_error = Column(String(500), nullable=True)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    created_by = Column(Integer, nullable=True)
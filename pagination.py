@@ -0,0 +1,85 @@
+# pagination.py
+"""
+키셋(커서) 페이지네이션
+
+OFFSET 은 건너뛴 행을 DB 가 모두 읽고 버리므로 뒤쪽 페이지일수록 느려집니다.
+대신 마지막 행의 정렬 키 값을 불투명한 커서(base64)로 돌려주고, 다음 페이지는
+"정렬 키 > 커서 값" 조건으로 인덱스에서 바로 이어 읽습니다. (페이지 깊이와 무관하게 일정한 비용)
+
+정렬 키는 항상 유일해야 하므로 마지막 열은 idx 로 둡니다. 예) (vc_order, idx)
+"""
+import base64
+import json
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, width: int) -> Tuple[Any, ...]:
+    """커서를 정렬 키 값 튜플로 되돌립니다. 형식이 맞지 않으면 InvalidCursorError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("invalid cursor") from e
+    if not isinstance(values, list) or len(values) != width:
+        raise InvalidCursorError("invalid cursor")
+    return tuple(values)
+
+
+def after(columns: Sequence, values: Sequence[Any]):
+    """
+    (c1, c2, ...) > (v1, v2, ...) 를 OR/AND 로 풀어 쓴 조건
+
+    MySQL 은 행 생성자 비교 (a, b) > (x, y) 에 인덱스 범위 스캔을 잘 쓰지 못하므로
+    c1 > v1 OR (c1 = v1 AND c2 > v2) ... 형태로 만듭니다.
+    """
+    clauses = []
+    for i, column in enumerate(columns):
+        equals = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equals, column > values[i]))
+    return or_(*clauses)
+
+
+def paginate(stmt, columns: Sequence, cursor: Optional[str], limit: int):
+    """
+    stmt 에 키셋 조건, 정렬, LIMIT 을 붙입니다.
+    다음 페이지가 있는지 알기 위해 limit + 1 행을 읽습니다. (page_of 와 함께 사용)
+    """
+    if cursor:
+        stmt = stmt.where(after(columns, decode_cursor(cursor, len(columns))))
+    return stmt.order_by(*columns).limit(limit + 1)
+
+
+def page_of(rows: List[Any], keys: Sequence[str], limit: int) -> dict:
+    """paginate 로 읽은 행들로 {items, next_cursor} 응답을 만듭니다."""
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, key) for key in keys])
+    return {"items": items, "next_cursor": next_cursor}
+
+
+async def fetch_page(db: AsyncSession, stmt, columns: Sequence, cursor: Optional[str], limit: int) -> dict:
+    """
+    컬럼을 select 하는 Core stmt 를 한 페이지 읽습니다. items 는 dict 목록입니다.
+    (정렬 키 컬럼이 stmt 의 결과 컬럼에 포함되어 있어야 합니다.)
+    """
+    rows = (await db.execute(paginate(stmt, columns, cursor, limit))).all()
+    page = page_of(rows, [column.key for column in columns], limit)
+    page["items"] = [row._asdict() for row in page["items"]]
+    return page
@@ -0,0 +1,123 @@
+# progress.py
+"""
+복사 진행 상황 관찰자(observer)
+
+copier 는 테이블 하나를 쓸 때마다 관찰자에게 알리기만 하고,
+관찰자가 없으면(None) 아무 비용도 들지 않습니다.
+"""
+import asyncio
+import json
+import os
+import queue
+import time
+from typing import AsyncIterator
+
+# 진행 이벤트 스트리밍에서 이 시간(초) 동안 이벤트가 없으면 heartbeat 를 보냄 (프록시 유휴 타임아웃 방지, 연결 종료 확인)
+COPY_STREAM_HEARTBEAT = float(os.getenv("COPY_STREAM_HEARTBEAT", "15"))
+
+
+class CopyObserver:
+    """복사 진행 이벤트를 받는 기본 관찰자. 필요한 메서드만 재정의합니다."""
+
+    def on_start(self, rows_total: int) -> None:
+        pass
+
+    def on_phase(self, phase: str, rows: int) -> None:
+        pass
+
+    def on_finish(self, new_book_idx: int) -> None:
+        pass
+
+    def on_error(self, error: str) -> None:
+        pass
+
+
+class EventQueueObserver(CopyObserver):
+    """진행 이벤트(단계, 누적 행 수, 전체 행 수, 처리량)를 큐에 쌓는 관찰자"""
+
+    def __init__(self):
+        self.events: "queue.Queue[dict]" = queue.Queue()
+        self.rows_total = 0
+        self.rows_done = 0
+        self.started_at = time.perf_counter()
+
+    def _elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def _throughput(self) -> float:
+        elapsed = self._elapsed()
+        return round(self.rows_done / elapsed, 1) if elapsed > 0 else 0.0
+
+    def on_start(self, rows_total: int) -> None:
+        self.rows_total = rows_total
+        self.started_at = time.perf_counter()
+        self.events.put({"event": "start", "rows_total": rows_total})
+
+    def on_phase(self, phase: str, rows: int) -> None:
+        self.rows_done += rows
+        self.events.put({
+            "event": "progress", "phase": phase, "rows": rows,
+            "rows_done": self.rows_done, "rows_total": self.rows_total,
+            "rows_per_sec": self._throughput(),
+        })
+
+    def on_finish(self, new_book_idx: int) -> None:
+        self.events.put({
+            "event": "done", "new_book_idx": new_book_idx, "rows_done": self.rows_done,
+            "elapsed": round(self._elapsed(), 3), "rows_per_sec": self._throughput(),
+        })
+
+    def on_error(self, error: str) -> None:
+        self.events.put({"event": "error", "detail": error})
+
+    def _heartbeat(self) -> dict:
+        return {
+            "event": "heartbeat", "rows_done": self.rows_done, "rows_total": self.rows_total,
+            "elapsed": round(self._elapsed(), 3),
+        }
+
+    async def iter_events(self, timeout: float = COPY_STREAM_HEARTBEAT) -> AsyncIterator[dict]:
+        """
+        done/error 이벤트가 나올 때까지 이벤트를 차례로 꺼냅니다.
+        큐는 스레드에서 기다리므로 이벤트 루프를 막지 않으며, timeout 초 동안 이벤트가 없으면 heartbeat 를 내보냅니다.
+        """
+        while True:
+            try:
+                event = await asyncio.to_thread(self.events.get, timeout=timeout)
+            except queue.Empty:
+                yield self._heartbeat()
+                continue
+            yield event
+            if event["event"] in ("done", "error"):
+                return
+
+
+def format_ndjson(event: dict) -> str:
+    return json.dumps(event, ensure_ascii=False) + "\n"
+
+
+def format_sse(event: dict) -> str:
+    return f"event: {event['event']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+class ObserverGroup(CopyObserver):
+    """여러 관찰자에게 같은 이벤트를 전달"""
+
+    def __init__(self, *observers: CopyObserver):
+        self.observers = [o for o in observers if o is not None]
+
+    def on_start(self, rows_total: int) -> None:
+        for o in self.observers:
+            o.on_start(rows_total)
+
+    def on_phase(self, phase: str, rows: int) -> None:
+        for o in self.observers:
+            o.on_phase(phase, rows)
+
+    def on_finish(self, new_book_idx: int) -> None:
+        for o in self.observers:
+            o.on_finish(new_book_idx)
+
+    def on_error(self, error: str) -> None:
+        for o in self.observers:
+            o.on_error(error)
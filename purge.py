@@ -0,0 +1,175 @@
+# purge.py
+"""
+교재 및 하위 데이터 삭제
+
+ORM cascade 는 하위 행을 모두 메모리에 올린 뒤 한 건씩 DELETE 하므로,
+말단(leaf) 테이블부터 루트 방향으로 테이블마다 한 번씩 집합 단위 DELETE 를 실행합니다.
+
+- delete_book : 호출자의 트랜잭션 안에서 한 번에 삭제 (chunk 복사 포기 등 작은 교재용)
+- purge_book  : 단어를 batch_size 개씩 (idx 순) 하위 데이터와 함께 지우고 batch 마다 커밋한 뒤,
+                마지막에 챕터/유닛/매핑/교재를 지웁니다. 트랜잭션이 짧아 단어 테이블을 오래 잠그지 않습니다.
+                중간에 실패해도 다시 실행하면 남은 단어부터 이어서 지웁니다.
+- count_book  : 지울 행 수만 세는 dry-run
+
+    python purge.py 12 13 --dry-run
+    python purge.py --title-like "%(개정)%" --batch-size 500
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, delete, func, or_, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+import cache
+import chunked
+import database
+from loader import (
+    book_t, chapter_t, unit_t, mapping_t, voca_t, dr_t, meaning_t, example_t, snyant_t, hash_t,
+)
+import models
+
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", "1000"))
+
+journal_t = models.CopyJournal.__table__
+
+
+def _voca_steps(voca_scope) -> list:
+    """voca_scope(단어 idx 서브쿼리 또는 목록)에 속한 단어 하위 데이터, 말단 → 단어 순서"""
+    meaning_scope = select(meaning_t.c.idx).where(meaning_t.c.voca_idx.in_(voca_scope))
+    return [
+        ("snyants", snyant_t, snyant_t.c.meaning_idx.in_(meaning_scope)),
+        ("examples", example_t, example_t.c.meaning_idx.in_(meaning_scope)),
+        ("meanings", meaning_t, meaning_t.c.voca_idx.in_(voca_scope)),
+        ("derivatives", dr_t, dr_t.c.voca_idx.in_(voca_scope)),
+        ("hashes", hash_t, hash_t.c.voca_idx.in_(voca_scope)),
+        ("vocas", voca_t, voca_t.c.idx.in_(voca_scope)),
+    ]
+
+
+def _structure_steps(book_idx: int) -> list:
+    """단어를 지운 뒤 남는 교재 구조, 말단 → 루트 순서"""
+    chapter_scope = select(chapter_t.c.idx).where(chapter_t.c.book_idx == book_idx)
+    unit_scope = select(unit_t.c.idx).where(unit_t.c.book_idx == book_idx)
+    return [
+        ("mappings", mapping_t, or_(mapping_t.c.ch_idx.in_(chapter_scope), mapping_t.c.un_idx.in_(unit_scope))),
+        ("units", unit_t, unit_t.c.book_idx == book_idx),
+        ("chapters", chapter_t, chapter_t.c.book_idx == book_idx),
+        # 이 교재를 원본으로 하는 chunk 복사 기록 (원본 교재 FK)
+        ("journals", journal_t, journal_t.c.src_book_idx == book_idx),
+        ("book", book_t, book_t.c.idx == book_idx),
+    ]
+
+
+def _book_steps(book_idx: int) -> list:
+    voca_scope = select(voca_t.c.idx).where(voca_t.c.book_idx == book_idx)
+    return _voca_steps(voca_scope) + _structure_steps(book_idx)
+
+
+def delete_book(db: Session, book_idx: int) -> Dict[str, int]:
+    """
+    교재와 모든 하위 데이터를 삭제하고 테이블별 삭제 행 수를 반환합니다.
+    커밋/롤백은 호출자가 담당합니다.
+    """
+    return {phase: db.execute(delete(table).where(where)).rowcount for phase, table, where in _book_steps(book_idx)}
+
+
+def count_book(db: Session, book_idx: int) -> Dict[str, int]:
+    """delete_book / purge_book 이 지울 테이블별 행 수 (dry-run)"""
+    return {
+        phase: db.execute(select(func.count()).select_from(table).where(where)).scalar()
+        for phase, table, where in _book_steps(book_idx)
+    }
+
+
+def purge_book(
+    db: Session, book_idx: int, batch_size: int = PURGE_BATCH_SIZE, dry_run: bool = False,
+) -> Optional[dict]:
+    """
+    교재를 batch 단위의 짧은 트랜잭션들로 삭제합니다. (batch 마다 커밋)
+    교재가 없으면 None, 있으면 {book_idx, dry_run, rows, batches, elapsed} 를 반환합니다.
+    """
+    if db.execute(select(book_t.c.idx).where(book_t.c.idx == book_idx)).scalar() is None:
+        return None
+    started = time.perf_counter()
+    if dry_run:
+        rows = count_book(db, book_idx)
+        db.rollback()
+        batches = -(-rows["vocas"] // batch_size) + 1
+        return {"book_idx": book_idx, "dry_run": True, "rows": rows, "batches": batches,
+                "elapsed": round(time.perf_counter() - started, 3)}
+
+    rows = {phase: 0 for phase, _, _ in _book_steps(book_idx)}
+    batches = 0
+    try:
+        # 1. 이 교재로 복사 중이던(미완료) chunk 복사는 이어받지 못하도록 포기 처리
+        db.execute(
+            update(journal_t)
+            .where(journal_t.c.new_book_idx == book_idx, journal_t.c.cj_state.in_((chunked.RUNNING, chunked.FAILED)))
+            .values(cj_state=chunked.ABANDONED)
+        )
+        db.commit()
+
+        # 2. 단어를 idx 순으로 batch_size 개씩, 하위 데이터와 함께 삭제 후 커밋
+        while True:
+            voca_ids = db.execute(
+                select(voca_t.c.idx).where(voca_t.c.book_idx == book_idx).order_by(voca_t.c.idx).limit(batch_size)
+            ).scalars().all()
+            if not voca_ids:
+                break
+            for phase, table, where in _voca_steps(voca_ids):
+                rows[phase] += db.execute(delete(table).where(where)).rowcount
+            db.commit()
+            batches += 1
+
+        # 3. 남은 구조(매핑/유닛/챕터/복사 기록/교재)를 한 번에 삭제
+        for phase, table, where in _structure_steps(book_idx):
+            rows[phase] += db.execute(delete(table).where(where)).rowcount
+        db.commit()
+        batches += 1
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cache.invalidate_book(book_idx)
+    return {"book_idx": book_idx, "dry_run": False, "rows": rows, "batches": batches,
+            "elapsed": round(time.perf_counter() - started, 3)}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="교재 및 하위 데이터 일괄 삭제")
+    parser.add_argument("book_ids", nargs="*", type=int, help="삭제할 교재 idx")
+    parser.add_argument("--title-like", help="제목이 이 LIKE 패턴과 일치하는 교재 (예: '%%(개정)%%')")
+    parser.add_argument("--batch-size", type=int, default=PURGE_BATCH_SIZE, help="한 트랜잭션에서 지울 단어 수")
+    parser.add_argument("--dry-run", action="store_true", help="삭제하지 않고 테이블별 행 수만 출력")
+    parser.add_argument("--url", help="DB URL (기본값: database.SQLALCHEMY_DATABASE_URL)")
+    args = parser.parse_args(argv)
+    if not args.book_ids and not args.title_like:
+        parser.error("specify book ids or --title-like")
+
+    engine = create_engine(args.url, **database.engine_options(args.url)) if args.url else database.engine
+    SessionFactory = sessionmaker(bind=engine, autoflush=False)
+    with SessionFactory() as db:
+        book_ids = list(args.book_ids)
+        if args.title_like:
+            book_ids += db.execute(
+                select(book_t.c.idx).where(book_t.c.book_title.like(args.title_like)).order_by(book_t.c.idx)
+            ).scalars().all()
+            db.rollback()
+        missing = 0
+        for book_idx in dict.fromkeys(book_ids):
+            result = purge_book(db, book_idx, max(args.batch_size, 1), args.dry_run)
+            if result is None:
+                print(f"book {book_idx}: not found")
+                missing += 1
+                continue
+            counts = " ".join(f"{phase}={n}" for phase, n in result["rows"].items())
+            verb = "would delete" if args.dry_run else "deleted"
+            print(f"book {book_idx}: {verb} {counts} ({result['batches']} batches, {result['elapsed']}s)")
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 # schemas.py
 
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Generic, Optional, List, TypeVar
 from datetime import datetime
 
 # =============================================
@@ -13,6 +13,13 @@ class BaseConfig(BaseModel):
     class Config:
         from_attributes = True
 
+T = TypeVar("T")
+
+# 키셋 페이지네이션 응답 (pagination.py)
+class Page(BaseModel, Generic[T]):
+    items: List[T] = []
+    next_cursor: Optional[str] = None
+
 
 # =============================================
 #  pt_category
@@ -33,6 +40,14 @@ class Category(CategoryBase):
     class Config(BaseConfig.Config):
         pass
 
+class CategoryNode(Category):
+    depth: int
+
+class CategorySubtreeCopy(BaseModel):
+    root_idx: int
+    category_map: Dict[int, int] = {}
+    book_map: Dict[int, int] = {}
+
 # =============================================
 #  pt_voca_type
 # =============================================
@@ -231,3 +246,188 @@ class MeaningSnyant(MeaningSnyantBase):
 
     class Config(BaseConfig.Config):
         pass
+
+# =============================================
+#  단어 일괄 등록 (중첩 입력, 부모 idx 는 서버가 채움)
+#  문자열 길이는 models.py 컬럼 길이와 같게 제한
+# =============================================
+class DerivativeIngest(BaseModel):
+    dr_word: str = Field(max_length=50)
+    dr_meaning: str = Field(max_length=50)
+
+class ExampleIngest(BaseModel):
+    ex_sentence: str = Field(max_length=200)
+    ex_translation: str = Field(max_length=200)
+
+class SnyantIngest(BaseModel):
+    snyant_type: int
+    snyant_word: str = Field(max_length=500)
+    snyant_meaning: str = Field(max_length=500)
+
+class MeaningIngest(BaseModel):
+    mi_meaning: str = Field(max_length=50)
+    mi_engmeaning: Optional[str] = Field(None, max_length=200)
+    mi_order: Optional[int] = None  # 없으면 입력 순서 (1부터)
+    examples: List[ExampleIngest] = []
+    snyants: List[SnyantIngest] = []
+
+class VocaIngest(BaseModel):
+    vc_word: str = Field(max_length=50)
+    vt_idx: int
+    vc_type: int
+    vc_order: Optional[int] = None  # 없으면 유닛의 마지막 순서 뒤에 입력 순서대로
+    vc_root: Optional[str] = Field(None, max_length=4000)
+    vc_unikey: Optional[str] = Field(None, max_length=4000)
+    vc_mp3_link: Optional[str] = Field(None, max_length=500)
+    created_by: Optional[int] = None
+    derivatives: List[DerivativeIngest] = []
+    meanings: List[MeaningIngest] = []
+
+class BulkIngestResult(BaseModel):
+    unit_idx: int
+    book_idx: int
+    vocas: int
+    rows: Dict[str, int] = {}
+    elapsed: float
+
+# =============================================
+#  부분 복사 조건
+# =============================================
+class CopyFilter(BaseModel):
+    chapter_idxs: Optional[List[int]] = None
+    unit_idxs: Optional[List[int]] = None
+    vt_idxs: Optional[List[int]] = None
+
+# =============================================
+#  비동기 복사 작업 (Copy Job)
+# =============================================
+class CopyJob(BaseModel):
+    id: str
+    source_book_idx: int
+    state: str
+    rows: Dict[str, int] = {}
+    elapsed: float
+    new_book_idx: Optional[int] = None
+    error: Optional[str] = None
+    batch_id: Optional[str] = None  # 일괄 복사에 속한 작업이면 그 id
+
+# =============================================
+#  pt_copy_journal (나눠서 복사하는 작업의 진행 기록)
+# =============================================
+class CopyJournal(BaseModel):
+    idx: int
+    src_book_idx: int
+    new_book_idx: Optional[int] = None
+    cj_state: str
+    cj_chunk_size: int
+    cj_src_hwm: int
+    cj_new_hwm: int
+    cj_vocas_done: int
+    cj_vocas_total: int
+    cj_error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    created_by: Optional[int] = None
+
+    class Config(BaseConfig.Config):
+        pass
+
+# =============================================
+#  여러 교재 일괄 복사
+# =============================================
+class BatchCopyRequest(BaseModel):
+    book_ids: Optional[List[int]] = None
+    cate_lvl1_idx: Optional[int] = None
+    cate_lvl2_idx: Optional[int] = None
+    workers: Optional[int] = Field(None, ge=1)  # 동시에 복사할 교재 수 (없으면 BATCH_COPY_WORKERS)
+
+class BatchCopy(BaseModel):
+    id: str
+    state: str  # pending / running / succeeded / failed (하나라도 실패)
+    workers: int
+    books: int
+    succeeded: int
+    failed: int
+    rows: int  # 모든 교재에서 복사한 행 수
+    elapsed: float  # 첫 교재 시작부터 마지막 교재 끝까지 (진행 중이면 지금까지)
+    rows_per_sec: float
+    jobs: List[CopyJob] = []  # 교재별 결과와 소요 시간
+
+class SnapshotImportResult(BaseModel):
+    book_idx: int
+    rows: Dict[str, int] = {}  # 종류별 삽입 행 수 (voca_types 는 새로 만든 단어 유형 수)
+    elapsed: float
+
+class PurgeResult(BaseModel):
+    book_idx: int
+    dry_run: bool
+    rows: Dict[str, int]  # 테이블별 삭제(dry_run 이면 삭제 예정) 행 수
+    batches: int
+    elapsed: float
+
+# =============================================
+#  교재 트리 (중첩 조회용)
+# =============================================
+class MeaningNode(VocaMeaning):
+    examples: List[MeaningExample] = []
+    snyants: List[MeaningSnyant] = []
+
+class VocaNode(Voca):
+    derivatives: List[VocaDr] = []
+    meanings: List[MeaningNode] = []
+
+class UnitNode(Unit):
+    vocas: List[VocaNode] = []
+
+class ChapterNode(Chapter):
+    unit_idxs: List[int] = []
+
+class BookTree(Book):
+    chapters: List[ChapterNode] = []
+    units: List[UnitNode] = []
+
+# =============================================
+#  교재 비교 (diff)
+# =============================================
+class VocaRef(BaseModel):
+    key: str
+    idx: int
+    vc_word: str
+    un_idx: int
+
+class NodeChange(BaseModel):
+    path: str  # 예) "meanings[0].examples[1]"
+    change: str  # added / removed / modified
+    before: Optional[Dict[str, Any]] = None
+    after: Optional[Dict[str, Any]] = None
+
+class VocaChange(BaseModel):
+    key: str
+    vc_word: str
+    source_idx: int
+    target_idx: int
+    changes: List[NodeChange] = []
+
+class BookDiff(BaseModel):
+    source_book_idx: int
+    target_book_idx: int
+    unchanged: int
+    hashes_computed: int
+    added: List[VocaRef] = []
+    removed: List[VocaRef] = []
+    modified: List[VocaChange] = []
+
+# =============================================
+#  검색
+# =============================================
+class SearchHit(BaseModel):
+    field: str  # word / derivative / meaning / engmeaning
+    idx: int  # 해당 필드가 있는 행의 idx
+    voca_idx: int
+    book_idx: int
+    text: str
+
+class SearchResult(Page[SearchHit]):
+    total: int  # 순위를 매긴 결과 수 (SEARCH_MAX_RESULTS 까지)
+    truncated: bool = False  # 결과가 SEARCH_MAX_RESULTS 를 넘어 잘렸는지
+    backend: str  # memory / fulltext / like
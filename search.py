@@ -0,0 +1,413 @@
+# search.py
+"""
+단어 / 파생어 / 뜻 검색
+
+`LIKE '%x%'` 전체 스캔 대신 색인으로 후보를 좁힌 뒤 접두어(prefix) 또는 부분 문자열(substring)로 확인합니다.
+
+- fulltext: MySQL 에 ngram FULLTEXT 색인(FULLTEXT_INDEXES)이 모두 있으면 MATCH ... AGAINST 로 후보를 찾습니다.
+  ngram_token_size(기본 2)보다 짧은 한 글자 검색어는 교재 범위 안에서 LIKE 로 찾습니다.
+- like: 카테고리 범위의 교재가 SEARCH_CATEGORY_INDEX_BOOKS 개를 넘으면 교재별 색인을 만들지 않고
+  필드마다 여러 교재를 한 번에 LIKE 로 찾습니다. (교재 색인 LRU 를 카테고리 검색 하나가 모두 밀어내지 않도록)
+- memory: 그 밖의 경우 교재별로 1·2-gram 역색인을 프로세스 안에 만들어 씁니다.
+  색인은 처음 검색할 때 교재 단위로 만들고(교재당 SELECT 3번),
+  ORM 으로 단어/파생어/뜻을 고치면 커밋 시점에 해당 문서만 갱신하며,
+  일괄 쓰기 경로(copy, chunked, purge 등)가 cache.invalidate_book 을 부르면 그 교재 색인을 버립니다.
+  색인을 만드는 동안 무효화/갱신이 있었으면 만든 색인은 저장하지 않고, 저장한 색인도 SEARCH_INDEX_TTL 이 지나면 다시 만듭니다.
+
+검색 범위는 교재(book_idx) 또는 카테고리 하위 트리(category_idx)이고,
+결과는 정확히 일치 → 접두어 → 부분 문자열, 필드 가중치(단어 > 파생어 > 뜻), 짧은 문자열 순으로 정렬됩니다.
+SQL 로 찾는 경우(fulltext, like)에도 같은 순서로 SQL 에서 정렬한 뒤 필드마다 SEARCH_MAX_RESULTS 건을 자르므로
+잘리는 것은 항상 순위가 낮은 결과이며, 잘렸으면 truncated 가 참입니다.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import case, event, func, select, text
+from sqlalchemy.orm import Session
+
+import cache
+import categories
+import models
+import pagination
+from loader import dr_t, meaning_t, voca_t
+
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto")  # auto | memory | fulltext
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "1000"))
+SEARCH_INDEX_BOOKS = int(os.getenv("SEARCH_INDEX_BOOKS", "256"))  # 메모리에 유지할 교재 색인 수 (LRU)
+# 교재 색인을 다시 만드는 주기(초). 읽기 복제본에서 만든 색인이나 다른 워커의 쓰기가 이 시간 안에 반영됩니다.
+SEARCH_INDEX_TTL = float(os.getenv("SEARCH_INDEX_TTL", "300"))
+# 카테고리 검색에서 교재별 메모리 색인을 쓸 최대 교재 수 (넘으면 한 번의 다중 교재 LIKE 조회)
+SEARCH_CATEGORY_INDEX_BOOKS = int(os.getenv("SEARCH_CATEGORY_INDEX_BOOKS", "32"))
+
+# 필드 이름 → (컬럼, 가중치)
+FIELDS = {
+    "word": (voca_t.c.vc_word, 3),
+    "derivative": (dr_t.c.dr_word, 2),
+    "meaning": (meaning_t.c.mi_meaning, 1),
+    "engmeaning": (meaning_t.c.mi_engmeaning, 1),
+}
+
+# MySQL ngram FULLTEXT 색인 (색인 이름, 테이블, 컬럼) - migrations.py 2단계가 만듦
+FULLTEXT_INDEXES = (
+    ("ft_voca_word", voca_t.name, "vc_word"),
+    ("ft_voca_dr_word", dr_t.name, "dr_word"),
+    ("ft_voca_meaning", meaning_t.name, "mi_meaning"),
+    ("ft_voca_engmeaning", meaning_t.name, "mi_engmeaning"),
+)
+
+
+class Hit(NamedTuple):
+    field: str
+    idx: int
+    voca_idx: int
+    book_idx: int
+    text: str
+
+
+def normalize(value: str) -> str:
+    return value.casefold()
+
+
+def grams(value: str) -> Set[str]:
+    """1-gram 과 2-gram. 한 글자 검색어는 1-gram, 그보다 긴 검색어는 2-gram 으로 후보를 찾습니다."""
+    value = normalize(value)
+    return set(value) | {value[i:i + 2] for i in range(len(value) - 1)}
+
+
+def _query_grams(query: str) -> Set[str]:
+    query = normalize(query)
+    if len(query) == 1:
+        return {query}
+    return {query[i:i + 2] for i in range(len(query) - 1)}
+
+
+def _matches(hit: Hit, query: str, mode: str) -> bool:
+    value = normalize(hit.text)
+    return value.startswith(query) if mode == "prefix" else query in value
+
+
+def _rank(hit: Hit, query: str) -> Tuple:
+    value = normalize(hit.text)
+    kind = 0 if value == query else 1 if value.startswith(query) else 2
+    return (kind, -FIELDS[hit.field][1], len(value), hit.book_idx, hit.voca_idx, hit.idx)
+
+
+# =============================================
+#  프로세스 내 n-gram 색인
+# =============================================
+class BookIndex:
+    """교재 하나의 문서(Hit)와 n-gram → 문서 키 역색인"""
+
+    def __init__(self, hits: Iterable[Hit] = ()):
+        self.docs: Dict[Tuple[str, int], Hit] = {}
+        self.postings: Dict[str, Set[Tuple[str, int]]] = defaultdict(set)
+        for hit in hits:
+            self.add(hit)
+
+    def add(self, hit: Hit) -> None:
+        key = (hit.field, hit.idx)
+        self.remove(key)
+        if not hit.text:
+            return
+        self.docs[key] = hit
+        for gram in grams(hit.text):
+            self.postings[gram].add(key)
+
+    def remove(self, key: Tuple[str, int]) -> None:
+        hit = self.docs.pop(key, None)
+        if hit is None:
+            return
+        for gram in grams(hit.text):
+            keys = self.postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.postings[gram]
+
+    def candidates(self, query: str) -> List[Hit]:
+        postings = sorted((self.postings.get(g, set()) for g in _query_grams(query)), key=len)
+        if not postings or not postings[0]:
+            return []
+        keys = set(postings[0]).intersection(*postings[1:])
+        return [self.docs[k] for k in keys]
+
+
+def _load_book_hits(db: Session, book_idx: int) -> List[Hit]:
+    hits = [
+        Hit("word", r.idx, r.idx, book_idx, r.vc_word)
+        for r in db.execute(select(voca_t.c.idx, voca_t.c.vc_word).where(voca_t.c.book_idx == book_idx))
+    ]
+    hits += [
+        Hit("derivative", r.idx, r.voca_idx, book_idx, r.dr_word)
+        for r in db.execute(
+            select(dr_t.c.idx, dr_t.c.voca_idx, dr_t.c.dr_word)
+            .join(voca_t, voca_t.c.idx == dr_t.c.voca_idx)
+            .where(voca_t.c.book_idx == book_idx)
+        )
+    ]
+    for r in db.execute(
+        select(meaning_t.c.idx, meaning_t.c.voca_idx, meaning_t.c.mi_meaning, meaning_t.c.mi_engmeaning)
+        .join(voca_t, voca_t.c.idx == meaning_t.c.voca_idx)
+        .where(voca_t.c.book_idx == book_idx)
+    ):
+        hits.append(Hit("meaning", r.idx, r.voca_idx, book_idx, r.mi_meaning))
+        if r.mi_engmeaning:
+            hits.append(Hit("engmeaning", r.idx, r.voca_idx, book_idx, r.mi_engmeaning))
+    return hits
+
+
+class SearchIndex:
+    """
+    교재 idx → BookIndex. 교재 색인은 처음 검색할 때 만들고, 최근에 쓴 maxbooks 개만 ttl 초 동안 유지합니다.
+
+    색인은 락 밖에서 만들므로, 그 사이의 invalidate_book / apply 를 놓치지 않도록 세대(generation)를 셉니다.
+    교재별 세대는 그 교재의 무효화/갱신마다, 전역 세대는 교재를 알 수 없는 갱신(아직 색인되지 않은 단어)마다 올라가며,
+    만드는 동안 세대가 바뀌었으면 만든 색인은 이번 검색에만 쓰고 저장하지 않습니다.
+    """
+
+    def __init__(self, maxbooks: int = SEARCH_INDEX_BOOKS, ttl: float = SEARCH_INDEX_TTL):
+        self.maxbooks = maxbooks
+        self.ttl = ttl
+        self._books: "OrderedDict[int, Tuple[BookIndex, float]]" = OrderedDict()  # (색인, 만료 시각)
+        self._voca_book: Dict[int, int] = {}  # 색인된 단어 idx → 교재 idx (ORM 갱신용)
+        self._generations: Dict[int, int] = defaultdict(int)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _get(self, book_idx: int) -> Optional[BookIndex]:
+        """저장된 색인 (만료되었으면 버리고 None). _lock 보유 상태에서 호출"""
+        entry = self._books.get(book_idx)
+        if entry is None:
+            return None
+        if entry[1] < time.monotonic():
+            self._drop(book_idx)
+            return None
+        return entry[0]
+
+    def _bump(self, book_idx: Optional[int]) -> None:
+        if book_idx is None:
+            self._generation += 1
+        else:
+            self._generations[book_idx] += 1
+
+    def book(self, db: Session, book_idx: int) -> BookIndex:
+        with self._lock:
+            index = self._get(book_idx)
+            if index is not None:
+                self._books.move_to_end(book_idx)
+                return index
+            started = (self._generation, self._generations[book_idx])
+        hits = _load_book_hits(db, book_idx)
+        index = BookIndex(hits)
+        with self._lock:
+            if (self._generation, self._generations[book_idx]) != started:
+                return index
+            self._drop(book_idx)
+            self._books[book_idx] = (index, time.monotonic() + self.ttl)
+            self._voca_book.update((h.voca_idx, book_idx) for h in hits if h.field == "word")
+            while len(self._books) > max(self.maxbooks, 1):
+                self._drop(next(iter(self._books)))
+        return index
+
+    def _drop(self, book_idx: int) -> None:
+        entry = self._books.pop(book_idx, None)
+        if entry is not None:
+            for field, idx in entry[0].docs:
+                if field == "word":
+                    self._voca_book.pop(idx, None)
+
+    def invalidate_book(self, book_idx: int) -> None:
+        with self._lock:
+            self._bump(book_idx)
+            self._drop(book_idx)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._books.clear()
+            self._voca_book.clear()
+
+    def apply(self, upserts: List[Hit], deletes: List[Tuple[str, int, int]]) -> None:
+        """커밋된 ORM 변경을 이미 만든 교재 색인에 반영하고, 만드는 중인 색인은 저장되지 않게 세대를 올립니다."""
+        with self._lock:
+            for field, idx, voca_idx in deletes:
+                book_idx = self._voca_book.get(voca_idx)
+                self._bump(book_idx)
+                if book_idx in self._books:
+                    self._books[book_idx][0].remove((field, idx))
+                if field == "word":
+                    self._voca_book.pop(voca_idx, None)
+            for hit in upserts:
+                book_idx = hit.book_idx if hit.book_idx is not None else self._voca_book.get(hit.voca_idx)
+                self._bump(book_idx)
+                entry = self._books.get(book_idx)
+                if entry is None:
+                    continue
+                index = entry[0]
+                index.add(hit._replace(book_idx=book_idx))
+                if hit.field == "word":
+                    self._voca_book[hit.voca_idx] = book_idx
+
+
+search_index = SearchIndex()
+cache.on_invalidate_book(search_index.invalidate_book)
+
+
+# =============================================
+#  ORM 변경 → 색인 갱신 (커밋 시점에 반영, 롤백 시 버림)
+# =============================================
+def _docs_of(obj) -> List[Hit]:
+    if isinstance(obj, models.Voca):
+        return [Hit("word", obj.idx, obj.idx, obj.book_idx, obj.vc_word)]
+    if isinstance(obj, models.VocaDr):
+        return [Hit("derivative", obj.idx, obj.voca_idx, None, obj.dr_word)]
+    if isinstance(obj, models.VocaMeaning):
+        return [
+            Hit("meaning", obj.idx, obj.voca_idx, None, obj.mi_meaning),
+            Hit("engmeaning", obj.idx, obj.voca_idx, None, obj.mi_engmeaning or ""),
+        ]
+    return []
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    pending = session.info.setdefault("search_changes", ([], []))
+    for obj in list(session.new) + list(session.dirty):
+        pending[0].extend(_docs_of(obj))
+    for obj in session.deleted:
+        pending[1].extend((h.field, h.idx, h.voca_idx) for h in _docs_of(obj))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session):
+    pending = session.info.pop("search_changes", None)
+    if pending:
+        search_index.apply(*pending)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_changes(session, previous_transaction):
+    session.info.pop("search_changes", None)
+
+
+# =============================================
+#  MySQL FULLTEXT
+# =============================================
+_fulltext_available: Optional[bool] = None
+
+
+def fulltext_available(db: Session) -> bool:
+    """MySQL 이고 FULLTEXT_INDEXES 가 모두 만들어져 있는지 (프로세스당 한 번 확인)"""
+    global _fulltext_available
+    if _fulltext_available is None:
+        if db.get_bind().dialect.name != "mysql":
+            _fulltext_available = False
+        else:
+            names = set(db.execute(text(
+                "SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND INDEX_TYPE = 'FULLTEXT'"
+            )).scalars())
+            _fulltext_available = all(name in names for name, _, _ in FULLTEXT_INDEXES)
+    return _fulltext_available
+
+
+def _like_pattern(query: str, mode: str) -> str:
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%" if mode == "prefix" else "%" + escaped + "%"
+
+
+def _sql_hits(db: Session, query: str, mode: str, book_ids: List[int], fulltext: bool) -> Tuple[List[Hit], bool]:
+    """
+    필드마다 후보를 _rank 와 같은 순서(정확히 일치 → 접두어 → 부분 문자열, 짧은 문자열)로 SQL 에서 정렬해
+    SEARCH_MAX_RESULTS 건까지 읽습니다. (후보 목록, 잘렸는지)
+    """
+    # ngram 파서에서 큰따옴표 구문 검색은 검색어의 n-gram 이 연속으로 나오는 문서를 찾습니다.
+    phrase = '"' + query.replace('"', " ") + '"'
+    length = func.char_length if db.get_bind().dialect.name == "mysql" else func.length
+    hits: List[Hit] = []
+    truncated = False
+    for field, (column, _) in FIELDS.items():
+        table = column.table
+        voca_idx = voca_t.c.idx if table is voca_t else table.c.voca_idx
+        stmt = select(table.c.idx, voca_idx.label("voca_idx"), voca_t.c.book_idx, column.label("text"))
+        if table is not voca_t:
+            stmt = stmt.join(voca_t, voca_t.c.idx == table.c.voca_idx)
+        predicate = column.match(phrase) if fulltext else column.like(_like_pattern(query, mode), escape="\\")
+        rank = case(
+            (func.lower(column) == query, 0),
+            (func.lower(column).like(_like_pattern(query, "prefix"), escape="\\"), 1),
+            else_=2,
+        )
+        rows = db.execute(
+            stmt.where(predicate, voca_t.c.book_idx.in_(book_ids))
+            .order_by(rank, length(column), voca_t.c.book_idx, voca_idx, table.c.idx)
+            .limit(SEARCH_MAX_RESULTS + 1)
+        ).all()
+        if len(rows) > SEARCH_MAX_RESULTS:
+            truncated = True
+            rows = rows[:SEARCH_MAX_RESULTS]
+        hits += [Hit(field, r.idx, r.voca_idx, r.book_idx, r.text) for r in rows]
+    return hits, truncated
+
+
+# =============================================
+#  검색
+# =============================================
+def scope_book_ids(db: Session, book_idx: Optional[int], category_idx: Optional[int]) -> List[int]:
+    if book_idx is not None:
+        return [book_idx]
+    return categories.subtree_book_ids(db, category_idx)
+
+
+def search(
+    db: Session,
+    query: str,
+    mode: str = "substring",
+    book_idx: Optional[int] = None,
+    category_idx: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = pagination.DEFAULT_PAGE_SIZE,
+) -> dict:
+    """
+    순위가 매겨진 검색 결과 한 페이지 {items, next_cursor, total, truncated, backend} 를 반환합니다.
+    결과는 SEARCH_MAX_RESULTS 건까지만 순위를 매기며 (넘으면 truncated), 커서는 그 순위 목록에서의 위치입니다.
+    """
+    offset = pagination.decode_cursor(cursor, 1)[0] if cursor else 0
+    if not isinstance(offset, int) or offset < 0:
+        raise pagination.InvalidCursorError("invalid cursor")
+
+    query = normalize(query.strip())
+    book_ids = scope_book_ids(db, book_idx, category_idx)
+    backend = SEARCH_BACKEND
+    if backend == "auto":
+        backend = "fulltext" if fulltext_available(db) else "memory"
+
+    if backend == "fulltext" and len(query) < 2:
+        backend = "like"
+    elif backend == "memory" and category_idx is not None and len(book_ids) > SEARCH_CATEGORY_INDEX_BOOKS:
+        backend = "like"
+
+    hits: List[Hit] = []
+    truncated = False
+    if not query or not book_ids:
+        pass
+    elif backend in ("fulltext", "like"):
+        hits, truncated = _sql_hits(db, query, mode, book_ids, fulltext=backend == "fulltext")
+    else:
+        hits = [hit for b in book_ids for hit in search_index.book(db, b).candidates(query)]
+
+    ranked = sorted((h for h in hits if _matches(h, query, mode)), key=lambda h: _rank(h, query))
+    truncated = truncated or len(ranked) > SEARCH_MAX_RESULTS
+    ranked = ranked[:SEARCH_MAX_RESULTS]
+    items = ranked[offset:offset + limit]
+    next_cursor = pagination.encode_cursor([offset + limit]) if offset + limit < len(ranked) else None
+    return {
+        "items": [h._asdict() for h in items],
+        "next_cursor": next_cursor,
+        "total": len(ranked),
+        "truncated": truncated,
+        "backend": backend,
+    }
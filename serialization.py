@@ -0,0 +1,89 @@
+# serialization.py
+"""
+대용량 응답 직렬화
+
+`response_model` 경로는 ORM 객체를 Pydantic 모델로 속성마다 다시 검증한 뒤 표준 json 으로 인코딩하므로,
+단어/뜻이 수천 건인 목록에서는 쿼리보다 직렬화가 더 오래 걸립니다. 여기서는
+- ORM 엔티티(identity map) 대신 스키마 필드와 같은 컬럼만 Core SELECT 로 읽어 행(dict)을 바로 만들고,
+- orjson 이 설치되어 있으면 orjson, 없으면 pydantic-core(Rust) 인코더로 한 번에 인코딩하며,
+- 아주 큰 결과는 서버 측 커서로 나눠 읽으며 JSON 배열을 스트리밍합니다. (메모리는 partition 크기만큼만 사용)
+
+행 모양이 스키마와 같다는 것은 schema_columns 로 보장되므로, 이 경로의 응답은 다시 검증하지 않습니다.
+(검증이 필요한 곳은 adapter(...) 의 미리 만든 TypeAdapter 를 사용)
+"""
+from functools import lru_cache
+from typing import Any, AsyncIterator, List, Optional
+
+import pydantic_core
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성 (pip install orjson)
+    orjson = None
+
+STREAM_PARTITION_SIZE = 1000
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return pydantic_core.to_json(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """orjson / pydantic-core 로 인코딩하는 JSONResponse (앱 기본 응답 클래스)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def json_response(content: Any, status_code: int = 200, headers: Optional[dict] = None) -> Response:
+    """이미 응답 모양인 dict/list 를 검증 없이 바로 인코딩한 응답"""
+    return Response(content=dumps(content), status_code=status_code, headers=headers, media_type="application/json")
+
+
+@lru_cache(maxsize=None)
+def adapter(tp: Any) -> TypeAdapter:
+    """타입별로 한 번만 만드는 TypeAdapter"""
+    return TypeAdapter(tp)
+
+
+def schema_columns(schema: type, table) -> List[Any]:
+    """schema 필드와 이름이 같은 table 컬럼 목록 (필드 순서대로)"""
+    return [table.c[name] for name in schema.model_fields if name in table.c]
+
+
+def schema_select(schema: type, table):
+    """schema 모양의 행을 Core 로 읽는 SELECT (ORM 엔티티를 만들지 않음)"""
+    return select(*schema_columns(schema, table))
+
+
+async def iter_json_array(db: AsyncSession, stmt, partition_size: int = STREAM_PARTITION_SIZE) -> AsyncIterator[bytes]:
+    """stmt 결과를 서버 측 커서로 partition_size 행씩 읽으며 JSON 배열 조각을 내보냅니다."""
+    yield b"["
+    first = True
+    result = await db.stream(stmt.execution_options(yield_per=partition_size))
+    async for partition in result.partitions():
+        chunk = b",".join(dumps(row._asdict()) for row in partition)
+        if not chunk:
+            continue
+        yield chunk if first else b"," + chunk
+        first = False
+    yield b"]"
+
+
+def stream_json_array(session_factory, stmt, partition_size: int = STREAM_PARTITION_SIZE) -> StreamingResponse:
+    """
+    stmt 결과 전체를 JSON 배열로 스트리밍합니다.
+    응답을 다 보낼 때까지 세션이 열려 있어야 하므로 요청 의존성 대신 session_factory 로 세션을 직접 엽니다.
+    """
+    async def _body():
+        async with session_factory() as db:
+            async for chunk in iter_json_array(db, stmt, partition_size):
+                yield chunk
+
+    return StreamingResponse(_body(), media_type="application/json")
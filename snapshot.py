@@ -0,0 +1,344 @@
+# snapshot.py
+"""
+교재 스냅샷 내보내기/가져오기 (환경 간 이동, 보관용)
+
+스냅샷은 레코드를 한 줄(또는 msgpack 객체)씩 이어 쓴 gzip 스트림입니다. 레코드의 "t" 는 종류이고 나머지는 행의 컬럼입니다.
+
+    {"t": "snapshot", "version": 1, "book_idx": 12}
+    {"t": "voca_types", "idx": 3, "vt_title": "..."}       # 교재가 쓰는 단어 유형 (가져올 때 제목으로 매칭)
+    {"t": "book", ...} → chapters → units → mappings → vocas → derivatives → meanings → examples → snyants
+
+- 내보내기는 테이블마다 서버 측 커서로 EXPORT_PARTITION_SIZE 행씩 읽어 압축하며 보내므로 메모리 사용량이 일정합니다.
+- 가져오기는 본문을 스트리밍으로 풀면서 같은 종류의 레코드를 IMPORT_BATCH_SIZE 개씩 모아 copier 와 같은 방식
+  (테이블당 다중 행 INSERT + 새 idx 재조회)으로 쓰고, 원본 idx 를 새 idx 로 바꿉니다. 전체가 한 트랜잭션입니다.
+  batch 는 쓰기 전에 종류별 스키마(schemas.Voca 등)의 TypeAdapter 로 한 번에 검증하며, 실패하면 SnapshotError 입니다.
+- 내용 해시(pt_voca_hash)는 담지 않습니다. (가져온 교재는 다음 비교 때 다시 계산)
+"""
+import json
+import os
+import zlib
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import schemas
+import serialization
+from copier import build_id_map, bulk_insert, new_ids_in_order
+from loader import book_t, chapter_t, unit_t, mapping_t, voca_t, dr_t, meaning_t, example_t, snyant_t
+import models
+
+try:
+    import msgpack
+except ImportError:  # 선택 의존성 (pip install msgpack)
+    msgpack = None
+
+SNAPSHOT_VERSION = 1
+EXPORT_PARTITION_SIZE = int(os.getenv("EXPORT_PARTITION_SIZE", "1000"))
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "2000"))
+
+FORMATS = ("ndjson", "msgpack")
+vt_t = models.VocaType.__table__
+
+# 레코드 종류 → 테이블 (이 순서대로 내보내고, 가져올 때도 이 순서여야 함)
+KINDS = {
+    "voca_types": vt_t,
+    "book": book_t,
+    "chapters": chapter_t,
+    "units": unit_t,
+    "mappings": mapping_t,
+    "vocas": voca_t,
+    "derivatives": dr_t,
+    "meanings": meaning_t,
+    "examples": example_t,
+    "snyants": snyant_t,
+}
+_ORDER = ["snapshot", *KINDS]
+
+# 레코드 종류 → 검증 스키마 (내보낸 행과 같은 컬럼, created_at 제외)
+_adapters = {
+    kind: serialization.adapter(List[schema])
+    for kind, schema in (
+        ("voca_types", schemas.VocaType),
+        ("book", schemas.Book),
+        ("chapters", schemas.Chapter),
+        ("units", schemas.Unit),
+        ("mappings", schemas.ChapterUnitMapping),
+        ("vocas", schemas.Voca),
+        ("derivatives", schemas.VocaDr),
+        ("meanings", schemas.VocaMeaning),
+        ("examples", schemas.MeaningExample),
+        ("snyants", schemas.MeaningSnyant),
+    )
+}
+
+
+class SnapshotError(ValueError):
+    """스냅샷 형식 오류 (순서, 종류, 참조하는 원본 idx 누락 등)"""
+
+
+def _columns(table) -> list:
+    # created_at 은 가져오는 환경에서 새로 기록
+    return [column for column in table.c if column.key != "created_at"]
+
+
+def available(fmt: str) -> bool:
+    return fmt == "ndjson" or (fmt == "msgpack" and msgpack is not None)
+
+
+# =============================================
+#  내보내기
+# =============================================
+def _export_selects(book_idx: int) -> list:
+    voca_scope = select(voca_t.c.idx).where(voca_t.c.book_idx == book_idx)
+    meaning_scope = select(meaning_t.c.idx).where(meaning_t.c.voca_idx.in_(voca_scope))
+    chapter_scope = select(chapter_t.c.idx).where(chapter_t.c.book_idx == book_idx)
+    wheres = {
+        "voca_types": vt_t.c.idx.in_(select(voca_t.c.vt_idx).where(voca_t.c.book_idx == book_idx)),
+        "book": book_t.c.idx == book_idx,
+        "chapters": chapter_t.c.book_idx == book_idx,
+        "units": unit_t.c.book_idx == book_idx,
+        "mappings": mapping_t.c.ch_idx.in_(chapter_scope),
+        "vocas": voca_t.c.book_idx == book_idx,
+        "derivatives": dr_t.c.voca_idx.in_(voca_scope),
+        "meanings": meaning_t.c.voca_idx.in_(voca_scope),
+        "examples": example_t.c.meaning_idx.in_(meaning_scope),
+        "snyants": snyant_t.c.meaning_idx.in_(meaning_scope),
+    }
+    return [
+        (kind, select(*_columns(table)).where(wheres[kind]).order_by(table.c.idx))
+        for kind, table in KINDS.items()
+    ]
+
+
+def _encoder(fmt: str) -> Callable[[dict], bytes]:
+    if fmt == "msgpack":
+        return lambda record: msgpack.packb(record, use_bin_type=True)
+    return lambda record: serialization.dumps(record) + b"\n"
+
+
+async def iter_export(
+    db: AsyncSession, book_idx: int, fmt: str = "ndjson", partition_size: int = EXPORT_PARTITION_SIZE,
+) -> AsyncIterator[bytes]:
+    """교재 스냅샷을 gzip 으로 압축한 조각들로 내보냅니다."""
+    encode = _encoder(fmt)
+    compressor = zlib.compressobj(wbits=31)  # gzip 헤더
+    yield compressor.compress(encode({"t": "snapshot", "version": SNAPSHOT_VERSION, "book_idx": book_idx}))
+    for kind, stmt in _export_selects(book_idx):
+        result = await db.stream(stmt.execution_options(yield_per=partition_size))
+        async for partition in result.partitions():
+            chunk = compressor.compress(b"".join(encode({"t": kind, **row._asdict()}) for row in partition))
+            if chunk:
+                yield chunk
+    yield compressor.flush()
+
+
+def stream_export(session_factory, book_idx: int, fmt: str = "ndjson"):
+    """응답을 다 보낼 때까지 세션을 열어 두기 위해 session_factory 로 세션을 직접 엽니다."""
+    async def _body():
+        async with session_factory() as db:
+            async for chunk in iter_export(db, book_idx, fmt):
+                yield chunk
+    return _body()
+
+
+# =============================================
+#  가져오기
+# =============================================
+async def read_records(chunks: AsyncIterator[bytes], fmt: str = "ndjson") -> AsyncIterator[List[dict]]:
+    """본문 조각(gzip 또는 압축 안 됨)을 풀어 레코드 목록을 조각마다 내보냅니다."""
+    decompressor = None
+    buffer = b""
+    unpacker = msgpack.Unpacker(raw=False) if fmt == "msgpack" else None
+
+    def _records(data: bytes) -> List[dict]:
+        nonlocal buffer
+        if unpacker is not None:
+            unpacker.feed(data)
+            return list(unpacker)
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        try:
+            return [json.loads(line) for line in lines if line.strip()]
+        except ValueError as e:
+            raise SnapshotError(f"invalid NDJSON record: {e}")
+
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        if decompressor is None:
+            # 첫 조각의 gzip 매직 바이트로 압축 여부 판단
+            decompressor = zlib.decompressobj(wbits=31) if chunk[:2] == b"\x1f\x8b" else False
+        try:
+            data = decompressor.decompress(chunk) if decompressor else chunk
+        except zlib.error as e:
+            raise SnapshotError(f"invalid gzip stream: {e}")
+        records = _records(data)
+        if records:
+            yield records
+    if decompressor:
+        if not decompressor.eof:
+            raise SnapshotError("truncated gzip stream")
+    records = _records(b"\n") if unpacker is None else []
+    if records:
+        yield records
+
+
+class SnapshotImporter:
+    """
+    레코드를 종류별로 모아 일괄 INSERT 하고 원본 idx → 새 idx 매핑을 유지합니다.
+    add(db, records) 를 여러 번 호출한 뒤 finish(db). 커밋은 호출자가 담당합니다.
+    """
+
+    def __init__(self, batch_size: int = IMPORT_BATCH_SIZE, overrides: Optional[dict] = None):
+        self.batch_size = batch_size
+        self.overrides = overrides or {}
+        self.book_idx: Optional[int] = None
+        self.rows: Dict[str, int] = {}
+        self._kind: Optional[str] = None
+        self._stage = 0
+        self._pending: List[dict] = []
+        self._maps: Dict[str, Dict[int, int]] = {kind: {} for kind in ("voca_types", "chapters", "units", "vocas", "meanings")}
+        self._floors: Dict[str, int] = {"chapters": 0, "units": 0, "vocas": 0, "meanings": 0}
+
+    def add(self, db: Session, records: List[dict]) -> None:
+        for record in records:
+            if not isinstance(record, dict):
+                raise SnapshotError(f"record must be an object, got {type(record).__name__}")
+            kind = record.pop("t", None)
+            if kind not in _ORDER:
+                raise SnapshotError(f"unknown record type {kind!r}")
+            stage = _ORDER.index(kind)
+            if stage < self._stage:
+                raise SnapshotError(f"{kind} record after {self._kind} records")
+            if kind != self._kind:
+                self._flush(db)
+                self._kind, self._stage = kind, stage
+            self._pending.append(record)
+            if len(self._pending) >= self.batch_size:
+                self._flush(db)
+
+    def finish(self, db: Session) -> int:
+        self._flush(db)
+        if self.book_idx is None:
+            raise SnapshotError("snapshot has no book record")
+        return self.book_idx
+
+    # ---------------------------------------------
+    def _remap(self, kind: str, old_idx: Any) -> int:
+        try:
+            return self._maps[kind][old_idx]
+        except KeyError:
+            raise SnapshotError(f"{kind} {old_idx} is referenced but not in the snapshot")
+
+    def _values(self, table, record: dict, **remapped) -> dict:
+        values = {c.key: record.get(c.key) for c in _columns(table) if c.key != "idx"}
+        values.update(remapped)
+        return values
+
+    def _insert_mapped(self, db: Session, kind: str, table, records: List[dict], rows: List[dict], *scope) -> None:
+        """rows 를 넣고, 새 idx 를 (scope 안에서 직전 batch 이후) 순서대로 원본 records 의 idx 와 짝지어 매핑에 추가"""
+        bulk_insert(db, table, rows)
+        new_ids = new_ids_in_order(db, table, *scope, table.c.idx > self._floors[kind])
+        self._maps[kind].update(build_id_map([r["idx"] for r in records], new_ids, table.name))
+        self._floors[kind] = new_ids[-1]
+
+    @staticmethod
+    def _validate(kind: str, records: List[dict]) -> List[dict]:
+        """batch 를 종류별 스키마로 한 번에 검증하고 컬럼 값 dict 목록으로 돌려줍니다."""
+        try:
+            validated = _adapters[kind].validate_python(records)
+        except ValidationError as e:
+            error = e.errors(include_url=False)[0]
+            position, *field = error["loc"] or (0,)
+            record = records[position] if isinstance(position, int) and position < len(records) else {}
+            idx = record.get("idx") if isinstance(record, dict) else None
+            raise SnapshotError(
+                f"invalid {kind} record (idx {idx!r}): {'.'.join(map(str, field)) or 'record'}: {error['msg']}"
+            )
+        return [item.model_dump() for item in validated]
+
+    def _flush(self, db: Session) -> None:
+        records, kind = self._pending, self._kind
+        if not records:
+            return
+        if kind == "snapshot":
+            version = records[0].get("version")
+            if not isinstance(version, int) or version > SNAPSHOT_VERSION:
+                raise SnapshotError(f"unsupported snapshot version {version!r}")
+            self._pending = []
+            return
+        if kind != "voca_types" and kind != "book" and self.book_idx is None:
+            raise SnapshotError(f"{kind} records before the book record")
+        book_idx = self.book_idx
+        records = self._validate(kind, records)
+
+        if kind == "voca_types":
+            # 단어 유형은 환경마다 idx 가 다르므로 제목으로 매칭하고, 없으면 새로 만듦
+            titles = {r["vt_title"] for r in records}
+
+            def existing() -> Dict[str, int]:
+                return dict(db.execute(
+                    select(vt_t.c.vt_title, func.min(vt_t.c.idx))
+                    .where(vt_t.c.vt_title.in_(titles))
+                    .group_by(vt_t.c.vt_title)
+                ).all())
+
+            by_title = existing()
+            missing = [self._values(vt_t, r) for r in records if r["vt_title"] not in by_title]
+            if missing:
+                bulk_insert(db, vt_t, list({r["vt_title"]: r for r in missing}.values()))
+                by_title = existing()
+            self._maps[kind].update({r["idx"]: by_title[r["vt_title"]] for r in records})
+            rows = missing
+        elif kind == "book":
+            if book_idx is not None or len(records) != 1:
+                raise SnapshotError("snapshot must contain exactly one book record")
+            rows = [self._values(book_t, records[0], **self.overrides)]
+            # 카테고리는 내보낸 환경의 idx 이므로, 지정하지 않았고 이 환경에 없으면 비움
+            for key in ("cate_lvl1_idx", "cate_lvl2_idx"):
+                if key not in self.overrides and rows[0][key] is not None:
+                    if db.get(models.Category, rows[0][key]) is None:
+                        rows[0][key] = None
+            self.book_idx = db.execute(insert(book_t).values(**rows[0])).inserted_primary_key[0]
+        elif kind in ("chapters", "units"):
+            table = KINDS[kind]
+            rows = [self._values(table, r, book_idx=book_idx) for r in records]
+            self._insert_mapped(db, kind, table, records, rows, table.c.book_idx == book_idx)
+        elif kind == "mappings":
+            rows = [
+                self._values(mapping_t, r, ch_idx=self._remap("chapters", r["ch_idx"]), un_idx=self._remap("units", r["un_idx"]))
+                for r in records
+            ]
+            bulk_insert(db, mapping_t, rows)
+        elif kind == "vocas":
+            rows = [
+                self._values(
+                    voca_t, r, book_idx=book_idx,
+                    un_idx=self._remap("units", r["un_idx"]), vt_idx=self._remap("voca_types", r["vt_idx"]),
+                )
+                for r in records
+            ]
+            self._insert_mapped(db, kind, voca_t, records, rows, voca_t.c.book_idx == book_idx)
+        elif kind == "derivatives":
+            rows = [self._values(dr_t, r, voca_idx=self._remap("vocas", r["voca_idx"])) for r in records]
+            bulk_insert(db, dr_t, rows)
+        elif kind == "meanings":
+            rows = [self._values(meaning_t, r, voca_idx=self._remap("vocas", r["voca_idx"])) for r in records]
+            voca_scope = select(voca_t.c.idx).where(voca_t.c.book_idx == book_idx)
+            self._insert_mapped(db, kind, meaning_t, records, rows, meaning_t.c.voca_idx.in_(voca_scope))
+        else:  # examples, snyants
+            table = KINDS[kind]
+            rows = [
+                self._values(
+                    table, r,
+                    meaning_idx=self._remap("meanings", r["meaning_idx"]), voca_idx=self._remap("vocas", r["voca_idx"]),
+                )
+                for r in records
+            ]
+            bulk_insert(db, table, rows)
+
+        self.rows[kind] = self.rows.get(kind, 0) + len(rows)
+        self._pending = []
@@ -0,0 +1,71 @@
+# tests/conftest.py
+"""
+테스트 공통 설정
+
+database 를 import 하기 전에 임시 SQLite 파일(동기/비동기 엔진이 같은 파일)을 가리키도록 환경 변수를 바꾸고,
+마이그레이션을 한 번 적용합니다. 복제본 설정은 비워 두어 모든 조회가 같은 파일을 읽습니다.
+
+    pip install pytest httpx aiosqlite
+    python -m pytest -q
+"""
+import os
+import tempfile
+
+_tmpdir = tempfile.TemporaryDirectory(prefix="copybook-tests-")
+_db_path = os.path.join(_tmpdir.name, "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{_db_path}"
+for _name in ("DB_REPLICA_HOSTS", "DATABASE_REPLICA_URLS", "ASYNC_DATABASE_REPLICA_URLS"):
+    os.environ[_name] = ""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import benchmark
+import database
+import migrations
+
+
+@event.listens_for(database.engine, "connect")
+@event.listens_for(database.async_engine.sync_engine, "connect")
+def _foreign_keys(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+migrations.upgrade(database.engine)
+
+
+def pytest_unconfigure(config):
+    database.engine.dispose()
+    _tmpdir.cleanup()
+
+
+@pytest.fixture
+def db():
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+# 작은 합성 교재: 챕터 2, 유닛 4, 단어 20
+SMALL_BOOK = benchmark.BookShape(chapters=2, units_per_chapter=2, vocas_per_unit=5)
+
+
+@pytest.fixture(scope="session")
+def client():
+    import main
+
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def make_book(db):
+    """make_book(shape=SMALL_BOOK, title=...) → 새 합성 교재 idx"""
+    def _make(shape: benchmark.BookShape = SMALL_BOOK, title: str = "test") -> int:
+        return benchmark.generate_book(db, shape, title=title)
+    return _make
@@ -0,0 +1,70 @@
+# tests/test_admission.py
+"""입장 제어: 대기열이 가득 차면 429, 대기 시간이 지나면 503 (Retry-After 포함)"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import admission
+
+
+def test_queue_full_is_429():
+    gate = admission.AdmissionGate("test", limit=1, queue=0, timeout=1, retry_after=3)
+
+    async def scenario():
+        await gate.acquire()
+        try:
+            with pytest.raises(HTTPException) as rejected:
+                await gate.acquire()
+        finally:
+            gate.release()
+        return rejected.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 429
+    assert error.headers["Retry-After"] == "3"
+    assert gate.active == 0
+
+
+def test_wait_timeout_is_503():
+    gate = admission.AdmissionGate("test", limit=1, queue=1, timeout=0.05, retry_after=1)
+
+    async def scenario():
+        await gate.acquire()
+        try:
+            with pytest.raises(HTTPException) as rejected:
+                await gate.acquire()
+        finally:
+            gate.release()
+        return rejected.value
+
+    assert asyncio.run(scenario()).status_code == 503
+    assert gate.active == 0
+
+
+def test_release_hands_slot_to_waiter():
+    gate = admission.AdmissionGate("test", limit=1, queue=1, timeout=1, retry_after=1)
+
+    async def scenario():
+        await gate.acquire()
+        waiter = asyncio.ensure_future(gate.acquire())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        gate.release()
+        await waiter
+        assert gate.active == 1
+        gate.release()
+
+    asyncio.run(scenario())
+    assert gate.active == 0
+
+
+def test_endpoint_rejects_when_heavy_gate_is_full(client, make_book, monkeypatch):
+    book_idx = make_book(title="admission")
+    monkeypatch.setattr(admission.heavy, "active", admission.heavy.limit)
+    monkeypatch.setattr(admission.heavy, "queue", 0)
+    r = client.post(f"/books/{book_idx}/copy")
+    assert r.status_code == 429
+    assert r.headers["Retry-After"] == str(admission.heavy.retry_after)
+    # 가벼운 조회는 별도 gate 이므로 영향 없음
+    assert client.get(f"/books/{book_idx}/vocas").status_code == 200
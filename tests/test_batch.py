@@ -0,0 +1,98 @@
+# tests/test_batch.py
+"""여러 교재 일괄 복사 (POST /books/copy-batch, GET /copy-batches/{id})"""
+import time
+
+import pytest
+
+import batch
+import benchmark
+import jobs
+import models
+
+# 일괄 복사용 아주 작은 교재: 유닛 2, 단어 4
+TINY_BOOK = benchmark.BookShape(chapters=1, units_per_chapter=2, vocas_per_unit=2)
+
+
+def wait_batch(client, batch_id: str, timeout: float = 30) -> dict:
+    deadline = time.time() + timeout
+    while True:
+        result = client.get(f"/copy-batches/{batch_id}").json()
+        if result["state"] in (jobs.SUCCEEDED, jobs.FAILED) or time.time() > deadline:
+            return result
+        time.sleep(0.05)
+
+
+@pytest.fixture
+def category(db):
+    category_idx = db.execute(
+        models.Category.__table__.insert().values(cate_name="batch", cate_lvl=1)
+    ).inserted_primary_key[0]
+    db.commit()
+    return category_idx
+
+
+def test_category_larger_than_copy_queue(client, db, make_book, category, monkeypatch):
+    # 교재 수가 단일 복사 대기열보다 많아도 일괄 복사는 받아들여야 함
+    monkeypatch.setattr(jobs, "COPY_QUEUE_LIMIT", 5)
+    book_ids = [make_book(TINY_BOOK, title=f"batch-{i}") for i in range(12)]
+    db.execute(models.Book.__table__.update().where(models.Book.idx.in_(book_ids)).values(cate_lvl1_idx=category))
+    db.commit()
+
+    r = client.post("/books/copy-batch", json={"cate_lvl1_idx": category, "workers": 3})
+    assert r.status_code == 202
+    assert r.json()["books"] == 12
+    assert r.json()["workers"] == 3
+
+    result = wait_batch(client, r.json()["id"])
+    assert result["state"] == jobs.SUCCEEDED
+    assert result["succeeded"] == 12 and result["failed"] == 0
+    assert [job["source_book_idx"] for job in result["jobs"]] == book_ids
+    assert all(job["elapsed"] > 0 and job["rows"]["vocas"] == 4 for job in result["jobs"])
+    assert result["rows"] == sum(sum(job["rows"].values()) for job in result["jobs"])
+    assert result["rows_per_sec"] > 0
+
+    # 교재별 작업도 따로 조회 가능
+    job = client.get(f"/copy-jobs/{result['jobs'][0]['id']}").json()
+    assert job["batch_id"] == result["id"]
+    assert job["state"] == jobs.SUCCEEDED
+
+    # 단일 복사 대기열은 일괄 복사 작업으로 차지되지 않음
+    r = client.post(f"/books/{book_ids[0]}/copy-jobs")
+    assert r.status_code == 202
+    deadline = time.time() + 10
+    while client.get(f"/copy-jobs/{r.json()['id']}").json()["state"] != jobs.SUCCEEDED and time.time() < deadline:
+        time.sleep(0.02)
+
+
+def test_failed_book_does_not_stop_batch(client, make_book):
+    book_idx = make_book(TINY_BOOK, title="batch-ok")
+    r = client.post("/books/copy-batch", json={"book_ids": [999999, book_idx]})
+    result = wait_batch(client, r.json()["id"])
+    assert result["state"] == jobs.FAILED
+    assert result["succeeded"] == 1 and result["failed"] == 1
+    assert result["jobs"][0]["error"] == "Original book not found"
+    assert result["jobs"][1]["new_book_idx"] is not None
+
+
+def test_workers_are_capped(make_book, monkeypatch):
+    monkeypatch.setattr(batch, "BATCH_COPY_MAX_WORKERS", 2)
+    book_ids = [make_book(TINY_BOOK, title=f"batch-cap-{i}") for i in range(3)]
+    submitted = [batch.submit_books(book_ids, workers=16), batch.submit_books(book_ids[:1], workers=16)]
+    assert [b.workers for b in submitted] == [2, 1]
+    deadline = time.time() + 30
+    while not all(b.done for b in submitted) and time.time() < deadline:
+        time.sleep(0.05)
+    assert all(b.snapshot()["state"] == jobs.SUCCEEDED for b in submitted)
+
+
+def test_batch_limits(client, make_book, monkeypatch):
+    book_idx = make_book(TINY_BOOK, title="batch-limits")
+    assert client.post("/books/copy-batch", json={}).status_code == 400
+    assert client.post("/books/copy-batch", json={"book_ids": [book_idx], "workers": 0}).status_code == 422
+    assert client.get("/copy-batches/unknown").status_code == 404
+
+    monkeypatch.setattr(batch, "BATCH_COPY_MAX_BOOKS", 1)
+    assert client.post("/books/copy-batch", json={"book_ids": [book_idx, 999999]}).status_code == 400
+
+    monkeypatch.setattr(batch, "BATCH_COPY_QUEUE_LIMIT", 0)
+    assert client.post("/books/copy-batch", json={"book_ids": [book_idx]}).status_code == 503
@@ -0,0 +1,21 @@
+# tests/test_benchmark.py
+"""벤치마크 하네스가 모든 시나리오를 측정하는지 확인 (아주 작은 교재)"""
+import benchmark
+import database
+
+
+def test_run_reports_every_scenario(monkeypatch):
+    monkeypatch.setitem(benchmark.SIZES, "tiny", benchmark.BookShape(chapters=1, units_per_chapter=2, vocas_per_unit=3))
+    [result] = benchmark.run(database.engine, ["tiny"], repeat=1, http=True)
+    scenarios = [
+        "read_tree", "copy_book", "http_tree_cold", "http_tree_etag", "http_book_vocas_pages",
+        "http_unit_vocas_pages", "http_vocas_stream", "http_copy_book",
+    ]
+    for name in scenarios:
+        assert result[name]["seconds"] > 0, name
+        assert result[name]["peak_memory_kb"] > 0, name
+    for name in ("read_tree", "copy_book", "http_copy_book"):
+        assert result[name]["rows_per_sec"] > 0, name
+    assert result["http_tree_etag"]["status"] == 304
+    assert result["http_copy_book"]["statements"] > 0
+    assert result["http_book_vocas_pages"]["items"] == 6
@@ -0,0 +1,83 @@
+# tests/test_categories.py
+"""카테고리 하위 트리 조회와 복사 (재귀 CTE)"""
+from sqlalchemy import select, update
+
+import categories
+import database
+import loader
+
+
+def _category(client, name: str, lvl: int, parent=None) -> int:
+    r = client.post("/categories/", json={"cate_name": name, "cate_lvl": lvl, "cate_pidx": parent})
+    assert r.status_code == 200
+    return r.json()["idx"]
+
+
+def _tree(client, prefix: str, children: int = 2) -> dict:
+    """루트 - 자식 children 개 - 첫 자식 아래 손자 하나"""
+    root = _category(client, f"{prefix}-root", 1)
+    kids = [_category(client, f"{prefix}-child{i}", 2, root) for i in range(children)]
+    grandchild = _category(client, f"{prefix}-grandchild", 3, kids[0])
+    return {"root": root, "children": kids, "grandchild": grandchild}
+
+
+def _shape(nodes: list) -> list:
+    return [(n["depth"], n["cate_lvl"], n["cate_name"].replace("Copy of ", "")) for n in nodes]
+
+
+def test_read_subtree(client):
+    tree = _tree(client, "read")
+    nodes = client.get(f"/categories/{tree['root']}/subtree").json()
+    assert [(n["idx"], n["depth"]) for n in nodes] == [
+        (tree["root"], 0), (tree["children"][0], 1), (tree["children"][1], 1), (tree["grandchild"], 2),
+    ]
+    assert [n["idx"] for n in client.get(f"/categories/{tree['children'][0]}/subtree").json()] == [
+        tree["children"][0], tree["grandchild"],
+    ]
+    assert client.get("/categories/999999/subtree").status_code == 404
+
+
+def test_copy_subtree(client):
+    tree = _tree(client, "copy")
+    r = client.post(f"/categories/{tree['root']}/copy-subtree")
+    assert r.status_code == 200
+    result = r.json()
+    assert result["book_map"] == {}
+    assert len(result["category_map"]) == 4
+
+    source = client.get(f"/categories/{tree['root']}/subtree").json()
+    copied = client.get(f"/categories/{result['root_idx']}/subtree").json()
+    assert copied[0]["cate_name"] == "Copy of copy-root"
+    assert copied[0]["cate_pidx"] == source[0]["cate_pidx"]
+    assert _shape(copied) == _shape(source)
+    assert {result["category_map"][str(n["idx"])] for n in source} == {n["idx"] for n in copied}
+
+    assert client.post("/categories/999999/copy-subtree").status_code == 404
+
+
+def test_copy_subtree_with_books(client, db, make_book):
+    tree = _tree(client, "books")
+    book_idx = make_book(title="category-book")
+    db.execute(
+        update(loader.book_t).where(loader.book_t.c.idx == book_idx)
+        .values(cate_lvl1_idx=tree["root"], cate_lvl2_idx=tree["children"][1])
+    )
+    db.commit()
+
+    result = client.post(f"/categories/{tree['root']}/copy-subtree", params={"include_books": "true"}).json()
+    category_map = {int(k): v for k, v in result["category_map"].items()}
+    new_book_idx = result["book_map"][str(book_idx)]
+    book = db.execute(select(loader.book_t).where(loader.book_t.c.idx == new_book_idx)).one()
+    assert (book.cate_lvl1_idx, book.cate_lvl2_idx) == (category_map[tree["root"]], category_map[tree["children"][1]])
+    assert len(loader.load_book_tree(db, new_book_idx).vocas) == 20
+
+
+def test_copy_statements_depend_on_depth_not_width(client, db):
+    narrow, wide = _tree(client, "narrow", children=2), _tree(client, "wide", children=6)
+    counts = []
+    for tree in (narrow, wide):
+        with database.count_queries(database.engine) as counter:
+            categories.copy_subtree(db, tree["root"])
+        db.rollback()
+        counts.append(counter.count)
+    assert counts[0] == counts[1]
@@ -0,0 +1,28 @@
+# tests/test_chunked.py
+"""chunk 단위 복사와 복사 기록 상태 전이"""
+import chunked
+import loader
+
+
+def test_chunked_copy_completes(client, db, make_book):
+    book_idx = make_book(title="chunked")
+    r = client.post(f"/books/{book_idx}/copy-chunked", params={"chunk_size": 6})
+    assert r.status_code == 200
+    journal = r.json()
+    assert journal["cj_state"] == chunked.COMPLETED
+    assert journal["cj_vocas_done"] == journal["cj_vocas_total"] == 20
+    copied = loader.load_book_tree(db, journal["new_book_idx"])
+    assert len(copied.vocas) == 20
+    assert client.get(f"/copy-journals/{journal['idx']}").json()["cj_state"] == chunked.COMPLETED
+
+
+def test_completed_journal_cannot_resume_or_abandon(client, make_book):
+    book_idx = make_book(title="chunked-done")
+    journal_idx = client.post(f"/books/{book_idx}/copy-chunked").json()["idx"]
+    assert client.post(f"/copy-journals/{journal_idx}/resume").status_code == 409
+    assert client.delete(f"/copy-journals/{journal_idx}").status_code == 409
+
+
+def test_missing_journal(client):
+    assert client.post("/copy-journals/999999/resume").status_code == 404
+    assert client.get("/copy-journals/999999").status_code == 404
@@ -0,0 +1,33 @@
+# tests/test_copy.py
+"""교재 복사 API"""
+from sqlalchemy import select
+
+import loader
+
+
+def _voca_count(db, book_idx: int) -> int:
+    return len(db.execute(select(loader.voca_t.c.idx).where(loader.voca_t.c.book_idx == book_idx)).all())
+
+
+def test_copy_book(client, db, make_book):
+    book_idx = make_book(title="copy")
+    r = client.post(f"/books/{book_idx}/copy")
+    assert r.status_code == 200
+    new_book = r.json()
+    assert new_book["idx"] != book_idx
+    assert new_book["book_title"] == "copy (개정)"
+    assert _voca_count(db, new_book["idx"]) == _voca_count(db, book_idx) == 20
+
+
+def test_copy_missing_book(client):
+    assert client.post("/books/999999/copy").status_code == 404
+
+
+def test_copy_selected_units(client, db, make_book):
+    book_idx = make_book(title="partial")
+    unit_idx = loader.load_book_tree(db, book_idx).units[0].idx
+    r = client.post(f"/books/{book_idx}/copy", json={"unit_idxs": [unit_idx]})
+    assert r.status_code == 200
+    copied = loader.load_book_tree(db, r.json()["idx"])
+    assert len(copied.units) == 1
+    assert len(copied.vocas) == 5
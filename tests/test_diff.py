@@ -0,0 +1,66 @@
+# tests/test_diff.py
+"""교재 비교 (단어 내용 해시)"""
+from sqlalchemy import select, update
+
+import vocahash
+from loader import hash_t, voca_t
+
+
+def test_diff_copy_is_read_only_and_backfills_hashes(client, make_book):
+    book_idx = make_book(title="diff")
+    new_book_idx = client.post(f"/books/{book_idx}/copy").json()["idx"]
+
+    first = client.get(f"/books/{book_idx}/diff/{new_book_idx}").json()
+    assert first["unchanged"] == 20
+    assert first["added"] == first["removed"] == first["modified"] == []
+    assert first["hashes_computed"] == 40
+
+    # 해시는 응답 뒤 백그라운드 작업이 저장 (TestClient 는 응답 전에 실행)
+    assert client.get(f"/books/{book_idx}/diff/{new_book_idx}").json()["hashes_computed"] == 0
+
+
+def test_copy_keeps_mp3_links_and_hashes(client, db, make_book):
+    book_idx = make_book(title="diff-mp3")
+    db.execute(
+        update(voca_t).where(voca_t.c.book_idx == book_idx)
+        .values(vc_mp3_link="https://cdn.example.com/" + voca_t.c.vc_word + ".mp3")
+    )
+    vocahash.refresh_hashes(db, voca_t.c.book_idx == book_idx)
+    db.commit()
+
+    new_book_idx = client.post(f"/books/{book_idx}/copy").json()["idx"]
+    links = db.execute(select(voca_t.c.vc_mp3_link).where(voca_t.c.book_idx == new_book_idx)).scalars().all()
+    assert len(links) == 20 and all(link and link.endswith(".mp3") for link in links)
+
+    # 복사한 해시 행은 복사본 내용으로 다시 계산한 해시와 같아야 함
+    stored = dict(db.execute(
+        select(hash_t.c.voca_idx, hash_t.c.vh_hash)
+        .where(hash_t.c.voca_idx.in_(select(voca_t.c.idx).where(voca_t.c.book_idx == new_book_idx)))
+    ).all())
+    assert stored == vocahash.compute_hashes(db, voca_t.c.book_idx == new_book_idx)
+
+    diff = client.get(f"/books/{book_idx}/diff/{new_book_idx}").json()
+    assert diff["unchanged"] == 20
+    assert diff["hashes_computed"] == 0
+    assert diff["modified"] == []
+
+    # 링크만 바꿔도 비교에 나타남
+    changed_idx = min(stored)
+    db.execute(update(voca_t).where(voca_t.c.idx == changed_idx).values(vc_mp3_link=None))
+    vocahash.refresh_hashes(db, voca_t.c.idx == changed_idx)
+    db.commit()
+    diff = client.get(f"/books/{book_idx}/diff/{new_book_idx}").json()
+    assert diff["unchanged"] == 19
+    assert [m["target_idx"] for m in diff["modified"]] == [changed_idx]
+    assert diff["modified"][0]["changes"][0]["after"]["vc_mp3_link"] is None
+
+
+def test_save_hashes_without_dialect_upsert(db, make_book, monkeypatch):
+    book_idx = make_book(title="diff-fallback")
+    monkeypatch.setattr(vocahash, "_upsert_stmt", lambda db: None)
+    hashes = vocahash.refresh_hashes(db, voca_t.c.book_idx == book_idx)
+    voca_idx = min(hashes)
+    vocahash.save_hashes(db, {voca_idx: "0" * 40})
+    db.commit()
+    stored = dict(db.execute(select(hash_t.c.voca_idx, hash_t.c.vh_hash).where(hash_t.c.voca_idx.in_(list(hashes)))).all())
+    assert stored == {**hashes, voca_idx: "0" * 40}
@@ -0,0 +1,13 @@
+# tests/test_explain.py
+"""실행 계획 회귀: 엔드포인트가 실행한 문장에 모델 테이블 전체 스캔이 없어야 함"""
+import database
+import explain_check
+
+
+def test_no_full_table_scans():
+    statements = explain_check.collect(books=3)
+    assert statements
+    findings = explain_check.check(database.engine, statements)
+    assert not findings, "\n".join(
+        f"FULL SCAN on {f.table} [{f.statement.scenario}]: {' '.join(f.statement.sql.split())}" for f in findings
+    )
@@ -0,0 +1,17 @@
+# tests/test_idempotency.py
+"""교재 복사 Idempotency-Key: 같은 키의 재시도는 처음 결과를 재생"""
+
+
+def test_idempotent_replay(client, make_book):
+    book_idx = make_book(title="idempotent")
+    headers = {"Idempotency-Key": f"test-replay-{book_idx}"}
+    first = client.post(f"/books/{book_idx}/copy", headers=headers)
+    second = client.post(f"/books/{book_idx}/copy", headers=headers)
+    assert first.status_code == second.status_code == 200
+    assert "Idempotent-Replayed" not in first.headers
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert second.json()["idx"] == first.json()["idx"]
+
+    # 같은 키를 다른 요청에 쓰면 422
+    other = client.post(f"/books/{book_idx}/copy", headers=headers, json={"vt_idxs": [1]})
+    assert other.status_code == 422
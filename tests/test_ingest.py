@@ -0,0 +1,64 @@
+# tests/test_ingest.py
+"""단어 일괄 등록 (NDJSON)"""
+import json
+
+import loader
+
+
+def _line(word: str, vt_idx: int, **extra) -> str:
+    return json.dumps({
+        "vc_word": word, "vt_idx": vt_idx, "vc_type": 1,
+        "derivatives": [{"dr_word": f"{word}-d", "dr_meaning": "파생"}],
+        "meanings": [{
+            "mi_meaning": "뜻", "examples": [{"ex_sentence": "ex", "ex_translation": "예문"}],
+            "snyants": [{"snyant_type": 1, "snyant_word": "syn", "snyant_meaning": "유의어"}],
+        }],
+        **extra,
+    })
+
+
+def _ingest(client, unit_idx: int, lines):
+    return client.post(
+        f"/units/{unit_idx}/vocas:bulk", content="\n".join(lines).encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+
+def test_bulk_ingest(client, db, make_book):
+    book_idx = make_book(title="ingest")
+    tree = loader.load_book_tree(db, book_idx)
+    unit_idx, vt_idx = tree.units[0].idx, tree.vocas[0].vt_idx
+    r = _ingest(client, unit_idx, [_line(f"new{i}", vt_idx) for i in range(3)])
+    assert r.status_code == 200
+    assert r.json()["rows"] == {"vocas": 3, "derivatives": 3, "meanings": 3, "examples": 3, "snyants": 3}
+
+    vocas = client.get(f"/units/{unit_idx}/vocas").json()["items"]
+    assert [v["vc_word"] for v in vocas[-3:]] == ["new0", "new1", "new2"]
+    assert [v["vc_order"] for v in vocas[-3:]] == [6, 7, 8]
+
+
+def test_validation_error_reports_line(client, db, make_book):
+    book_idx = make_book(title="ingest-invalid")
+    tree = loader.load_book_tree(db, book_idx)
+    lines = [_line("ok", tree.vocas[0].vt_idx), json.dumps({"vt_idx": tree.vocas[0].vt_idx, "vc_type": 1})]
+    r = _ingest(client, tree.units[0].idx, lines)
+    assert r.status_code == 422
+    assert r.json()["detail"]["line"] == 2
+    assert r.json()["detail"]["errors"][0]["loc"] == ["vc_word"]
+
+
+def test_unknown_voca_type_reports_line(client, db, make_book):
+    book_idx = make_book(title="ingest-vt")
+    tree = loader.load_book_tree(db, book_idx)
+    vt_idx = tree.vocas[0].vt_idx
+    r = _ingest(client, tree.units[0].idx, [_line("a", vt_idx), _line("b", vt_idx), _line("c", 999999)])
+    assert r.status_code == 422
+    detail = r.json()["detail"]
+    assert detail["line"] == 3
+    assert detail["errors"][0]["loc"] == ["vt_idx"]
+    # 전체가 한 트랜잭션이므로 앞 줄도 저장되지 않음
+    assert len(client.get(f"/units/{tree.units[0].idx}/vocas").json()["items"]) == 5
+
+
+def test_missing_unit(client):
+    assert _ingest(client, 999999, [_line("x", 1)]).status_code == 404
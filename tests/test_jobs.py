@@ -0,0 +1,66 @@
+# tests/test_jobs.py
+"""비동기 복사 작업 (POST /books/{idx}/copy-jobs, GET /copy-jobs/{id})"""
+import threading
+import time
+
+import jobs
+
+
+def wait_job(client, job_id: str, timeout: float = 10) -> dict:
+    deadline = time.time() + timeout
+    while True:
+        job = client.get(f"/copy-jobs/{job_id}").json()
+        if job["state"] in (jobs.SUCCEEDED, jobs.FAILED) or time.time() > deadline:
+            return job
+        time.sleep(0.02)
+
+
+def test_copy_job(client, make_book):
+    book_idx = make_book(title="job")
+    r = client.post(f"/books/{book_idx}/copy-jobs")
+    assert r.status_code == 202
+    assert r.json()["source_book_idx"] == book_idx
+
+    job = wait_job(client, r.json()["id"])
+    assert job["state"] == jobs.SUCCEEDED
+    assert job["rows"]["vocas"] == 20
+    assert job["elapsed"] > 0
+    assert client.get(f"/books/{job['new_book_idx']}/tree").json()["book_title"] == "job (개정)"
+
+
+def test_copy_job_errors(client):
+    assert client.post("/books/999999/copy-jobs").status_code == 404
+    assert client.get("/copy-jobs/unknown").status_code == 404
+
+
+def test_copy_job_queue_full(client, make_book, monkeypatch):
+    book_idx = make_book(title="job-queue")
+    monkeypatch.setattr(jobs, "COPY_QUEUE_LIMIT", 0)
+    r = client.post(f"/books/{book_idx}/copy-jobs")
+    assert r.status_code == 503
+
+
+def test_snapshot_while_worker_updates():
+    job = jobs.CopyJob(id="test", source_book_idx=1)
+    job.mark_running()
+    stop = threading.Event()
+
+    def _worker():
+        n = 0
+        while not stop.is_set():
+            job.on_phase(f"phase{n % 50}", 1)
+            n += 1
+
+    worker = threading.Thread(target=_worker)
+    worker.start()
+    try:
+        for _ in range(2000):
+            assert job.snapshot()["state"] == jobs.RUNNING
+    finally:
+        stop.set()
+        worker.join()
+    job.on_finish(2)
+    snapshot = job.snapshot()
+    assert snapshot["state"] == jobs.SUCCEEDED
+    assert snapshot["new_book_idx"] == 2
+    assert sum(snapshot["rows"].values()) == sum(job.rows.values())
@@ -0,0 +1,53 @@
+# tests/test_loader.py
+"""교재 트리 읽기/복사의 SQL 문장 수가 교재 크기와 관계없이 일정한지 확인"""
+import pytest
+
+import benchmark
+import copier
+import database
+import loader
+
+# load_book_tree: 교재 1 + 챕터/유닛/매핑/단어/파생어/뜻/예문/유의어 각 1
+LOAD_BOOK_TREE_QUERIES = 9
+# copy_book: load_book_tree + 테이블별 INSERT 와 새 idx 재조회, 해시 복사
+COPY_BOOK_QUERIES = 23
+
+SHAPES = {
+    "small": benchmark.SIZES["small"],
+    "larger": benchmark.BookShape(chapters=3, units_per_chapter=3, vocas_per_unit=40, meanings_per_voca=3),
+}
+
+
+@pytest.fixture(scope="module")
+def books():
+    with database.SessionLocal() as db:
+        return {
+            name: benchmark.generate_book(db, shape, title=f"loader-{name}") for name, shape in SHAPES.items()
+        }
+
+
+def _row_counts(tree: loader.BookTree) -> dict:
+    return {
+        name: len(getattr(tree, name))
+        for name in ("chapters", "units", "mappings", "vocas", "derivatives", "meanings", "examples", "snyants")
+    }
+
+
+@pytest.mark.parametrize("size", list(SHAPES))
+def test_load_book_tree_query_count(db, books, size):
+    with database.assert_query_count(LOAD_BOOK_TREE_QUERIES):
+        tree = loader.load_book_tree(db, books[size])
+    shape = SHAPES[size]
+    assert len(tree.vocas) == shape.chapters * shape.units_per_chapter * shape.vocas_per_unit
+
+
+@pytest.mark.parametrize("size", list(SHAPES))
+def test_copy_book_query_count(db, books, size):
+    with database.assert_query_count(COPY_BOOK_QUERIES):
+        new_book_idx = copier.copy_book(db, loader.load_book_tree(db, books[size]))
+    db.commit()
+
+    source = loader.load_book_tree(db, books[size])
+    copied = loader.load_book_tree(db, new_book_idx)
+    assert copied.book.book_title == f"{source.book.book_title} (개정)"
+    assert _row_counts(copied) == _row_counts(source)
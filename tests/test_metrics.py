@@ -0,0 +1,64 @@
+# tests/test_metrics.py
+"""요청 단위 SQL 계측(DEBUG 헤더)과 /metrics"""
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+
+import database
+import metrics
+
+
+def _sample(body: str, prefix: str) -> float:
+    for line in body.splitlines():
+        if line.startswith(prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{prefix} not found")
+
+
+def test_metrics_endpoint(client, make_book):
+    book_idx = make_book(title="metrics")
+    assert client.get(f"/books/{book_idx}/vocas").status_code == 200
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    body = r.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/books/{book_id}/vocas",status="200"}' in body
+    assert _sample(body, 'db_pool_checkout_wait_seconds_count{engine="sync"}') > 0
+    assert "# TYPE db_pool_checkout_wait_seconds histogram" in body
+    assert "# TYPE db_pool_checked_out gauge" in body
+    assert _sample(body, "db_statements_total") > 0
+
+
+def test_debug_headers(client, make_book, monkeypatch):
+    book_idx = make_book(title="metrics-debug")
+    assert "X-DB-Statements" not in client.get(f"/books/{book_idx}/tree").headers
+
+    monkeypatch.setattr(metrics, "DEBUG", True)
+    # 캐시된 트리가 아닌 실제 조회가 되도록 새 교재 사용
+    r = client.get(f"/books/{make_book(title='metrics-debug-2')}/tree")
+    assert r.status_code == 200
+    assert int(r.headers["X-DB-Statements"]) > 0
+    assert float(r.headers["X-DB-Time-Ms"]) >= 0
+    assert int(r.headers["X-DB-Rows"]) >= 0  # SQLite 는 SELECT 의 rowcount 를 주지 않음
+
+
+def test_pool_checkout_wait_is_measured():
+    engine = create_engine(database.engine.url, poolclass=QueuePool, pool_size=1, max_overflow=0)
+    metrics.instrument_engine(engine, "test-wait")
+    held = engine.connect()
+    try:
+        def _release():
+            time.sleep(0.2)
+            held.close()
+
+        threading.Thread(target=_release).start()
+        with engine.connect() as conn:  # 첫 커넥션이 반납될 때까지 기다림
+            conn.execute(text("SELECT 1"))
+    finally:
+        engine.dispose()
+    body = metrics.render()
+    assert _sample(body, 'db_pool_checkout_wait_seconds_count{engine="test-wait"}') == 2
+    assert _sample(body, 'db_pool_checkout_wait_seconds_sum{engine="test-wait"}') >= 0.2
+    assert _sample(body, 'db_pool_checkout_wait_seconds_bucket{engine="test-wait",le="0.1"}') == 1
@@ -0,0 +1,39 @@
+# tests/test_pagination.py
+"""키셋 페이지네이션"""
+import loader
+
+
+def _walk(client, path: str, limit: int) -> list:
+    items, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        r = client.get(path, params=params)
+        assert r.status_code == 200
+        page = r.json()
+        assert len(page["items"]) <= limit
+        items += page["items"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items
+
+
+def test_book_vocas_pages(client, make_book):
+    book_idx = make_book(title="pages")
+    items = _walk(client, f"/books/{book_idx}/vocas", 7)
+    ids = [v["idx"] for v in items]
+    assert len(ids) == 20
+    assert ids == sorted(set(ids))
+
+
+def test_unit_vocas_pages(client, db, make_book):
+    book_idx = make_book(title="unit-pages")
+    unit_idx = loader.load_book_tree(db, book_idx).units[0].idx
+    items = _walk(client, f"/units/{unit_idx}/vocas", 2)
+    assert [(v["vc_order"], v["idx"]) for v in items] == sorted((v["vc_order"], v["idx"]) for v in items)
+    assert len(items) == 5
+
+
+def test_invalid_cursor(client, make_book):
+    book_idx = make_book(title="bad-cursor")
+    assert client.get(f"/books/{book_idx}/vocas", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/books/", params={"cursor": "not-a-cursor"}).status_code == 400
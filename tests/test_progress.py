@@ -0,0 +1,73 @@
+# tests/test_progress.py
+"""복사 진행 스트리밍 (NDJSON / SSE)"""
+import asyncio
+import json
+import threading
+
+import jobs
+import progress
+
+
+def _ndjson(body: str) -> list:
+    return [json.loads(line) for line in body.splitlines() if line]
+
+
+def _sse(body: str) -> list:
+    events = []
+    for block in body.strip().split("\n\n"):
+        name, data = block.split("\n")
+        assert name.startswith("event: ") and data.startswith("data: ")
+        event = json.loads(data[len("data: "):])
+        assert event["event"] == name[len("event: "):]
+        events.append(event)
+    return events
+
+
+def test_stream_ndjson(client, make_book):
+    book_idx = make_book(title="stream")
+    r = client.post(f"/books/{book_idx}/copy/stream")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    events = _ndjson(r.text)
+
+    assert events[0]["event"] == "start"
+    assert {e["phase"] for e in events if e["event"] == "progress"} >= {"chapters", "units", "vocas", "meanings"}
+    done = events[-1]
+    assert done["event"] == "done"
+    assert done["rows_done"] == events[0]["rows_total"]
+    assert len({e["job_id"] for e in events}) == 1
+
+    job = jobs.get_job(done["job_id"]).snapshot()
+    assert job["state"] == jobs.SUCCEEDED
+    assert job["new_book_idx"] == done["new_book_idx"]
+
+
+def test_stream_sse(client, make_book):
+    book_idx = make_book(title="stream-sse")
+    r = client.post(f"/books/{book_idx}/copy/stream", params={"format": "sse"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    events = _sse(r.text)
+    assert events[0]["event"] == "start"
+    assert events[-1]["event"] == "done"
+
+
+def test_stream_errors(client):
+    assert client.post("/books/999999/copy/stream").status_code == 404
+    assert client.post("/books/1/copy/stream", params={"format": "xml"}).status_code == 422
+
+
+def test_heartbeat_while_waiting():
+    observer = progress.EventQueueObserver()
+
+    async def _collect():
+        timer = threading.Timer(0.1, observer.on_finish, args=(7,))
+        timer.start()
+        events = [event async for event in observer.iter_events(timeout=0.02)]
+        timer.join()
+        return events
+
+    events = asyncio.run(_collect())
+    assert events[0]["event"] == "heartbeat"
+    assert events[-1] == {**events[-1], "event": "done", "new_book_idx": 7}
+    assert all(e["event"] == "heartbeat" for e in events[:-1])
@@ -0,0 +1,31 @@
+# tests/test_purge.py
+"""교재 삭제: dry-run, batch 삭제, 캐시 무효화"""
+
+
+def test_purge_dry_run_deletes_nothing(client, make_book):
+    book_idx = make_book(title="dry-run")
+    r = client.delete(f"/books/{book_idx}", params={"dry_run": "true", "batch_size": 8})
+    assert r.status_code == 200
+    result = r.json()
+    assert result["dry_run"] is True
+    assert result["rows"]["vocas"] == 20
+    assert result["rows"]["units"] == 4
+    assert result["rows"]["book"] == 1
+    assert result["batches"] == 3 + 1
+    assert client.get(f"/books/{book_idx}/tree").status_code == 200
+
+
+def test_purge_book(client, make_book):
+    book_idx = make_book(title="purge")
+    planned = client.delete(f"/books/{book_idx}", params={"dry_run": "true"}).json()["rows"]
+    assert client.get(f"/books/{book_idx}/tree").status_code == 200  # 캐시에 올림
+
+    r = client.delete(f"/books/{book_idx}", params={"batch_size": 8})
+    assert r.status_code == 200
+    result = r.json()
+    assert result["dry_run"] is False
+    assert result["rows"] == planned
+    assert result["batches"] == 3 + 1
+
+    assert client.get(f"/books/{book_idx}/tree").status_code == 404
+    assert client.delete(f"/books/{book_idx}").status_code == 404
@@ -0,0 +1,94 @@
+# tests/test_replicas.py
+"""읽기 복제본 라우팅과 X-Read-Your-Writes"""
+import itertools
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, insert, update
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+import database
+import models
+from loader import book_t
+
+PRIMARY = {database.READ_YOUR_WRITES_HEADER: "true"}
+
+
+@pytest.fixture
+def replica(db, make_book, tmp_path, monkeypatch):
+    """
+    지금 시점의 primary 를 복사한 SQLite 파일을 복제본으로 붙입니다.
+    이후 primary 에 쓴 내용은 복제본에 없으므로 복제 지연을 흉내냅니다.
+    → (복사 시점에 있던 교재 idx, 복제본 엔진)
+    """
+    book_idx = make_book(title="replica")
+    path = str(tmp_path / "replica.db")
+    src, dst = sqlite3.connect(database.engine.url.database), sqlite3.connect(path)
+    src.backup(dst)
+    src.close()
+    dst.close()
+
+    url = f"sqlite:///{path}"
+    replica_engine = create_engine(url, **database.engine_options(url))
+    async_replica_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)  # 테스트 루프 밖에서 정리할 커넥션이 남지 않도록
+    monkeypatch.setattr(database, "replica_engines", [replica_engine])
+    monkeypatch.setattr(database, "_replicas", itertools.cycle([replica_engine]))
+    monkeypatch.setattr(database, "async_replica_engines", [async_replica_engine])
+    monkeypatch.setattr(database, "_async_replicas", itertools.cycle([async_replica_engine]))
+    yield book_idx, replica_engine
+    replica_engine.dispose()
+
+
+def test_read_engine_selection(replica):
+    _, replica_engine = replica
+    assert database.read_engine() is replica_engine
+    assert database.read_engine(primary=True) is database.engine
+    assert database.async_read_engine().sync_engine is not database.async_engine.sync_engine
+    assert database.async_read_engine(primary=True) is database.async_engine
+
+    assert all(database.wants_primary(v) for v in ("true", "1", "yes", " TRUE "))
+    assert not any(database.wants_primary(v) for v in (None, "", "false", "0"))
+
+
+def test_reads_go_to_replica_unless_read_your_writes(client, db, replica):
+    category_idx = db.execute(insert(models.Category.__table__).values(cate_name="lagging", cate_lvl=1)).inserted_primary_key[0]
+    db.commit()
+
+    # 비동기 읽기 (get_async_read_db): 복제본에는 아직 없음
+    assert client.get(f"/categories/{category_idx}").status_code == 404
+    r = client.get(f"/categories/{category_idx}", headers=PRIMARY)
+    assert r.status_code == 200
+    assert r.json()["cate_name"] == "lagging"
+
+
+def test_sync_reads_use_replica(client, make_book, replica):
+    book_idx, _ = replica
+    new_book = make_book(title="after snapshot")
+
+    # 동기 읽기 (get_read_db)
+    assert client.get(f"/books/{book_idx}/diff/{new_book}").status_code == 404
+    assert client.get(f"/books/{book_idx}/diff/{new_book}", headers=PRIMARY).status_code == 200
+
+
+def test_copy_reads_source_from_replica_and_writes_primary(client, db, make_book, replica):
+    book_idx, replica_engine = replica
+    db.execute(update(book_t).where(book_t.c.idx == book_idx).values(book_title="renamed"))
+    db.commit()
+
+    # 원본 트리는 복제본(이름을 바꾸기 전)에서 읽음
+    r = client.post(f"/books/{book_idx}/copy")
+    assert r.status_code == 200, r.text
+    assert r.json()["book_title"] == "replica (개정)"
+    assert db.get(models.Book, r.json()["idx"]) is not None  # 새 교재는 primary 에 씀
+
+    r = client.post(f"/books/{book_idx}/copy", headers=PRIMARY)
+    assert r.json()["book_title"] == "renamed (개정)"
+
+    # 복제본에 아직 없는 교재는 primary 에서 다시 확인해 복사
+    new_book = make_book(title="after snapshot")
+    r = client.post(f"/books/{new_book}/copy")
+    assert r.status_code == 200, r.text
+    assert r.json()["book_title"] == "after snapshot (개정)"
+    with replica_engine.connect() as conn:
+        assert conn.execute(book_t.select().where(book_t.c.idx == new_book)).first() is None
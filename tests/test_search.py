@@ -0,0 +1,137 @@
+# tests/test_search.py
+"""단어/파생어/뜻 검색: 메모리 색인, LIKE, 순위, 결과 자르기, 색인 무효화"""
+import pytest
+from sqlalchemy import update
+
+import models
+import search
+from loader import voca_t
+
+
+def _search(client, **params) -> dict:
+    r = client.get("/search", params=params)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def _words(result: dict) -> list:
+    return [(hit["field"], hit["text"]) for hit in result["items"]]
+
+
+@pytest.fixture
+def book(make_book):
+    return make_book(title="search")
+
+
+def test_ranking_and_fields(client, book):
+    result = _search(client, q="word0_1", book_idx=book)
+    assert result["backend"] == "memory"
+    assert _words(result) == [("word", "word0_1")]
+
+    # 정확히 일치 → 접두어, 같은 종류 안에서는 짧은 문자열 순
+    prefix = _search(client, q="word0", mode="prefix", book_idx=book)
+    assert [text for _, text in _words(prefix)] == [f"word0_{v}" for v in range(5)]
+
+    # 파생어와 뜻(한글/영어)도 찾음
+    assert {field for field, _ in _words(_search(client, q="derived", book_idx=book))} == {"derivative"}
+    assert {field for field, _ in _words(_search(client, q="뜻 1", book_idx=book))} == {"meaning"}
+    assert {field for field, _ in _words(_search(client, q="MEANING 2", book_idx=book))} == {"engmeaning"}
+    assert _search(client, q="없는말", book_idx=book)["total"] == 0
+
+
+def test_pages_and_errors(client, book):
+    first = _search(client, q="word", book_idx=book, limit=8)
+    second = _search(client, q="word", book_idx=book, limit=8, cursor=first["next_cursor"])
+    assert first["total"] == second["total"] == 20
+    assert len({h["idx"] for h in first["items"] + second["items"]}) == 16
+
+    assert client.get("/search", params={"q": "word", "book_idx": book, "cursor": "bad"}).status_code == 400
+    assert client.get("/search", params={"q": "word"}).status_code == 422
+    assert client.get("/search", params={"q": "word", "book_idx": book, "category_idx": 1}).status_code == 422
+
+
+@pytest.mark.parametrize("backend", ["memory", "like"])
+def test_truncated(client, book, backend, monkeypatch):
+    monkeypatch.setattr(search, "SEARCH_BACKEND", backend)
+    monkeypatch.setattr(search, "SEARCH_MAX_RESULTS", 3)
+    result = _search(client, q="word1_", book_idx=book)
+    assert result["backend"] == backend
+    assert result["truncated"] is True
+    assert result["total"] == 3
+    # 잘리는 것은 순위가 낮은 결과
+    assert [text for _, text in _words(result)] == ["word1_0", "word1_1", "word1_2"]
+
+
+def test_like_backend_matches_memory(client, book, monkeypatch):
+    queries = [("word2", "prefix"), ("1_", "substring"), ("뜻", "substring"), ("w", "substring"), ("100%", "substring")]
+    memory = [_search(client, q=q, mode=mode, book_idx=book) for q, mode in queries]
+    monkeypatch.setattr(search, "SEARCH_BACKEND", "like")
+    like = [_search(client, q=q, mode=mode, book_idx=book) for q, mode in queries]
+    for m, l in zip(memory, like):
+        assert l["backend"] == "like"
+        assert (m["items"], m["total"]) == (l["items"], l["total"])
+
+
+def test_category_scope(client, db, make_book, monkeypatch):
+    category_idx = db.execute(
+        models.Category.__table__.insert().values(cate_name="search", cate_lvl=1)
+    ).inserted_primary_key[0]
+    child_idx = db.execute(
+        models.Category.__table__.insert().values(cate_name="search-child", cate_lvl=2, cate_pidx=category_idx)
+    ).inserted_primary_key[0]
+    books = [make_book(title="search-a"), make_book(title="search-b")]
+    db.execute(update(models.Book.__table__).where(models.Book.idx == books[0]).values(cate_lvl1_idx=category_idx))
+    db.execute(update(models.Book.__table__).where(models.Book.idx == books[1]).values(cate_lvl2_idx=child_idx))
+    db.commit()
+
+    result = _search(client, q="word0_0", category_idx=category_idx)
+    assert result["backend"] == "memory"
+    assert sorted(h["book_idx"] for h in result["items"]) == books
+
+    # 범위의 교재가 많으면 교재별 색인 대신 한 번의 LIKE 조회
+    monkeypatch.setattr(search, "SEARCH_CATEGORY_INDEX_BOOKS", 1)
+    like = _search(client, q="word0_0", category_idx=category_idx)
+    assert like["backend"] == "like"
+    assert like["items"] == result["items"]
+
+
+def test_index_follows_writes(client, db, book):
+    assert _search(client, q="word0_0", book_idx=book)["total"] == 1  # 색인을 만듦
+
+    # ORM 으로 고치면 커밋 시점에 색인 갱신
+    voca = db.query(models.Voca).filter(models.Voca.book_idx == book).order_by(models.Voca.idx).first()
+    voca.vc_word = "renamed"
+    db.commit()
+    assert _search(client, q="word0_0", book_idx=book)["total"] == 0
+    assert _words(_search(client, q="renamed", book_idx=book)) == [("word", "renamed")]
+
+    # 일괄 쓰기 경로는 cache.invalidate_book 으로 교재 색인을 버림
+    assert client.delete(f"/books/{book}").status_code == 200
+    assert _search(client, q="renamed", book_idx=book)["total"] == 0
+
+
+def test_index_built_during_invalidation_is_not_kept(db, book, monkeypatch):
+    index = search.SearchIndex()
+    load = search._load_book_hits
+
+    def _load_and_invalidate(db, book_idx):
+        hits = load(db, book_idx)
+        index.invalidate_book(book_idx)  # 색인을 만드는 동안 쓰기가 있었음
+        return hits
+
+    monkeypatch.setattr(search, "_load_book_hits", _load_and_invalidate)
+    assert index.book(db, book).candidates("word0_0")
+    assert book not in index._books
+
+    monkeypatch.setattr(search, "_load_book_hits", load)
+    index.book(db, book)
+    assert book in index._books
+
+
+def test_index_expires_after_ttl(db, book):
+    index = search.SearchIndex(ttl=0)
+    assert index.book(db, book).candidates("word0_0")
+    # ORM 을 거치지 않은 SQL 수정도 TTL 이 지나면 반영
+    db.execute(update(voca_t).where(voca_t.c.book_idx == book, voca_t.c.vc_word == "word0_0").values(vc_word="sql"))
+    db.commit()
+    assert not index.book(db, book).candidates("word0_0")
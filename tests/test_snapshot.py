@@ -0,0 +1,72 @@
+# tests/test_snapshot.py
+"""교재 스냅샷 내보내기/가져오기"""
+import gzip
+import json
+
+import loader
+
+
+def _export(client, book_idx: int) -> bytes:
+    r = client.get(f"/books/{book_idx}/export")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/gzip"
+    return r.content
+
+
+def _records(body: bytes) -> list:
+    return [json.loads(line) for line in gzip.decompress(body).splitlines()]
+
+
+def _import(client, body: bytes, **params):
+    return client.post("/books/import", content=body, params=params)
+
+
+def test_export_import_round_trip(client, db, make_book):
+    book_idx = make_book(title="snapshot")
+    body = _export(client, book_idx)
+    records = _records(body)
+    assert records[0] == {"t": "snapshot", "version": 1, "book_idx": book_idx}
+
+    r = _import(client, body, book_title="snapshot copy")
+    assert r.status_code == 200
+    result = r.json()
+    assert result["rows"]["vocas"] == 20
+
+    source = loader.load_book_tree(db, book_idx)
+    imported = loader.load_book_tree(db, result["book_idx"])
+    assert imported.book.book_title == "snapshot copy"
+    for name in ("chapters", "units", "mappings", "vocas", "derivatives", "meanings", "examples", "snyants"):
+        assert len(getattr(imported, name)) == len(getattr(source, name)), name
+
+    diff = client.get(f"/books/{book_idx}/diff/{result['book_idx']}").json()
+    assert diff["unchanged"] == 20
+    assert diff["added"] == diff["removed"] == diff["modified"] == []
+
+
+def _reimport_with(client, book_idx: int, kind: str, change) -> dict:
+    records = _records(_export(client, book_idx))
+    for record in records:
+        if record["t"] == kind:
+            change(record)
+            break
+    body = b"".join(json.dumps(record).encode() + b"\n" for record in records)
+    return _import(client, body)
+
+
+def test_import_rejects_missing_column(client, make_book):
+    book_idx = make_book(title="snapshot-missing")
+    r = _reimport_with(client, book_idx, "vocas", lambda record: record.pop("vc_word"))
+    assert r.status_code == 422
+    assert "vc_word" in r.json()["detail"]
+
+
+def test_import_rejects_missing_reference_key(client, make_book):
+    book_idx = make_book(title="snapshot-mapping")
+    r = _reimport_with(client, book_idx, "mappings", lambda record: record.pop("un_idx"))
+    assert r.status_code == 422
+    assert "un_idx" in r.json()["detail"]
+
+
+def test_import_rejects_bad_stream(client):
+    assert _import(client, b"\x1f\x8b\x08\x00garbage").status_code == 422
+    assert _import(client, b'{"t": "units", "idx": 1}\n').status_code == 422
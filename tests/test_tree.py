@@ -0,0 +1,18 @@
+# tests/test_tree.py
+"""교재 트리 조회와 ETag"""
+
+
+def test_tree_etag(client, make_book):
+    book_idx = make_book(title="etag")
+    r = client.get(f"/books/{book_idx}/tree")
+    assert r.status_code == 200
+    etag = r.headers["ETag"]
+    assert len(r.json()["units"]) == 4
+
+    cached = client.get(f"/books/{book_idx}/tree", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+
+    assert client.get(f"/books/{book_idx}/tree", headers={"If-None-Match": '"other"'}).status_code == 200
+    assert client.get("/books/999999/tree").status_code == 404
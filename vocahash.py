@@ -0,0 +1,174 @@
+# vocahash.py
+"""
+단어 하위 트리 내용 해시 (pt_voca_hash)
+
+단어 한 건과 그 파생어/뜻/예문/유의어·반의어의 내용(idx, 부모 idx, 작성 정보 제외)을
+정해진 순서로 직렬화해 SHA-1 로 요약합니다. 두 단어의 해시가 같으면 하위 트리 전체가 같으므로,
+교재 비교(bookdiff)는 해시만 보고 바뀌지 않은 단어를 O(1) 로 건너뜁니다.
+
+해시 유지 방식
+- 복사: 내용이 같으므로 copier.copy_vocas 가 원본 해시 행을 새 단어 idx 로 그대로 복사합니다.
+- ORM 으로 단어/하위 행을 수정·삭제: before_flush 훅이 해당 단어의 해시 행을 지웁니다.
+- 해시 행이 없는 단어는 비교(GET)할 때 메모리에서만 계산하고, 저장은 응답 뒤 백그라운드 작업
+  backfill_book_hashes 가 주 DB 에 합니다. (ORM 을 거치지 않고 SQL 로 직접 수정했다면 refresh_hashes 로 다시 계산)
+- 저장은 upsert(MySQL ON DUPLICATE KEY UPDATE, SQLite/PostgreSQL ON CONFLICT DO UPDATE)이므로
+  같은 단어를 여러 요청이 동시에 채워도 PK 충돌이 나지 않습니다. 그 밖의 DB 는 같은 트랜잭션에서 지우고 다시 넣습니다.
+"""
+import hashlib
+import json
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import delete, event, insert, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+
+import database
+import loader
+import models
+from loader import BookTree, hash_t, voca_t
+
+# 해시에 들어가는 컬럼 (비교 결과에도 이 컬럼들만 나타납니다)
+VOCA_FIELDS = ("vc_word", "vt_idx", "vc_type", "vc_order", "vc_root", "vc_unikey", "vc_mp3_link")
+DERIVATIVE_FIELDS = ("dr_word", "dr_meaning")
+MEANING_FIELDS = ("mi_meaning", "mi_engmeaning", "mi_order")
+EXAMPLE_FIELDS = ("ex_sentence", "ex_translation")
+SNYANT_FIELDS = ("snyant_type", "snyant_word", "snyant_meaning")
+
+
+def _pick(row, fields) -> dict:
+    return {f: getattr(row, f) for f in fields}
+
+
+def voca_contents(tree: BookTree) -> Dict[int, dict]:
+    """
+    단어 idx → 하위 트리 내용(dict). 순서는 파생어/예문/유의어는 idx 순, 뜻은 (mi_order, idx) 순입니다.
+    """
+    examples: Dict[int, List[dict]] = defaultdict(list)
+    for e in tree.examples:
+        examples[e.meaning_idx].append(_pick(e, EXAMPLE_FIELDS))
+    snyants: Dict[int, List[dict]] = defaultdict(list)
+    for s in tree.snyants:
+        snyants[s.meaning_idx].append(_pick(s, SNYANT_FIELDS))
+    meanings: Dict[int, List[dict]] = defaultdict(list)
+    for m in sorted(tree.meanings, key=lambda m: (m.mi_order, m.idx)):
+        meanings[m.voca_idx].append({
+            **_pick(m, MEANING_FIELDS), "examples": examples.get(m.idx, []), "snyants": snyants.get(m.idx, []),
+        })
+    derivatives: Dict[int, List[dict]] = defaultdict(list)
+    for d in tree.derivatives:
+        derivatives[d.voca_idx].append(_pick(d, DERIVATIVE_FIELDS))
+
+    return {
+        v.idx: {
+            **_pick(v, VOCA_FIELDS),
+            "derivatives": derivatives.get(v.idx, []),
+            "meanings": meanings.get(v.idx, []),
+        }
+        for v in tree.vocas
+    }
+
+
+def content_hash(content: dict) -> str:
+    raw = json.dumps(content, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def compute_hashes(db: Session, *voca_where) -> Dict[int, str]:
+    """voca_where 에 맞는 단어의 해시를 계산만 합니다. (저장하지 않음) {단어 idx: 해시}"""
+    contents = voca_contents(loader.load_voca_subtrees(db, *voca_where))
+    return {voca_idx: content_hash(content) for voca_idx, content in contents.items()}
+
+
+def _upsert_stmt(db: Session):
+    """방언별 upsert 문. 지원하지 않는 방언이면 None"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql.insert(hash_t)
+        return stmt.on_duplicate_key_update(vh_hash=stmt.inserted.vh_hash)
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite if dialect == "sqlite" else postgresql).insert(hash_t)
+        return stmt.on_conflict_do_update(index_elements=[hash_t.c.voca_idx], set_={"vh_hash": stmt.excluded.vh_hash})
+    return None
+
+
+def save_hashes(db: Session, hashes: Dict[int, str]) -> None:
+    """해시 행을 upsert 합니다. (동시에 같은 단어를 채워도 PK 충돌 없음)"""
+    if not hashes:
+        return
+    rows = [{"voca_idx": k, "vh_hash": v} for k, v in hashes.items()]
+    stmt = _upsert_stmt(db)
+    if stmt is None:
+        # upsert 가 없는 방언: 같은 트랜잭션에서 지우고 다시 넣음
+        db.execute(delete(hash_t).where(hash_t.c.voca_idx.in_(list(hashes))))
+        stmt = insert(hash_t)
+    db.execute(stmt, rows)
+
+
+def refresh_hashes(db: Session, *voca_where) -> Dict[int, str]:
+    """voca_where 에 맞는 단어의 해시를 다시 계산해 저장하고 {단어 idx: 해시} 를 반환합니다."""
+    hashes = compute_hashes(db, *voca_where)
+    save_hashes(db, hashes)
+    return hashes
+
+
+def ensure_book_hashes(db: Session, book_idx: int) -> int:
+    """교재에서 해시 행이 없는 단어만 계산해 채우고, 새로 계산한 단어 수를 반환합니다. (커밋은 호출자)"""
+    missing = (voca_t.c.book_idx == book_idx, voca_t.c.idx.notin_(select(hash_t.c.voca_idx)))
+    if db.execute(select(voca_t.c.idx).where(*missing).limit(1)).first() is None:
+        return 0
+    return len(refresh_hashes(db, *missing))
+
+
+def backfill_book_hashes(*book_idxs: int) -> None:
+    """백그라운드 작업 - 주 DB 에서 교재들의 빠진 해시를 채우고 커밋합니다."""
+    with database.SessionLocal() as db:
+        for book_idx in dict.fromkeys(book_idxs):
+            ensure_book_hashes(db, book_idx)
+            db.commit()
+
+
+def copy_hashes(db: Session, voca_map: Dict[int, int]) -> int:
+    """원본 단어의 해시 행을 새 단어 idx 로 복사합니다. (내용이 같으므로 다시 계산하지 않음)"""
+    if not voca_map:
+        return 0
+    rows = db.execute(
+        select(hash_t.c.voca_idx, hash_t.c.vh_hash).where(hash_t.c.voca_idx.in_(list(voca_map)))
+    ).all()
+    if rows:
+        db.execute(insert(hash_t), [{"voca_idx": voca_map[r.voca_idx], "vh_hash": r.vh_hash} for r in rows])
+    return len(rows)
+
+
+def invalidate(db: Session, voca_idxs: Iterable[int]) -> None:
+    voca_idxs = [i for i in set(voca_idxs) if i is not None]
+    if voca_idxs:
+        db.connection().execute(delete(hash_t).where(hash_t.c.voca_idx.in_(voca_idxs)))
+
+
+# =============================================
+#  ORM 변경 시 해시 무효화
+# =============================================
+_VOCA_CHILDREN = (models.VocaDr, models.VocaMeaning, models.MeaningExample, models.MeaningSnyant)
+
+
+def _owner_voca_idx(obj: Any):
+    if isinstance(obj, models.Voca):
+        return obj.idx
+    if obj.voca_idx is not None:
+        return obj.voca_idx
+    # 관계(relationship)로만 연결된 새 행
+    parent = getattr(obj, "voca", None) or getattr(getattr(obj, "meaning", None), "voca", None)
+    return getattr(parent, "idx", None)
+
+
+@event.listens_for(Session, "before_flush")
+def _invalidate_on_flush(session, flush_context, instances):
+    # 새 단어는 해시 행이 없으므로 기존 단어의 수정/삭제와 하위 행의 추가/수정/삭제만 봅니다.
+    touched = [
+        obj for obj in list(session.dirty) + list(session.deleted)
+        if isinstance(obj, (models.Voca,) + _VOCA_CHILDREN)
+    ]
+    touched += [obj for obj in session.new if isinstance(obj, _VOCA_CHILDREN)]
+    if touched:
+        invalidate(session, (_owner_voca_idx(obj) for obj in touched))